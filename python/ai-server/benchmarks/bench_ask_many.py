@@ -0,0 +1,66 @@
+"""
+Compare asking questions one by one with ModelEngine.ask_many at several concurrency levels.
+
+The fake model sleeps --latency milliseconds per question, standing in for generation time on the server.
+
+    python benchmarks/bench_ask_many.py --questions 200 --workers 1 8 32
+"""
+
+import argparse
+import time
+
+from ai_server.py_client.gaas.batching import AskStats
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=50.0, help="ms")
+    parser.add_argument("--strategy", default="per_worker")
+    args = parser.parse_args()
+
+    def llm(expression):
+        time.sleep(args.latency / 1000)
+        return {"response": "answer", "messageType": "CHAT"}
+
+    questions = [f"question {i}" for i in range(args.questions)]
+    with FakeAIServer() as fake:
+        fake.register_pixel("LLM", llm)
+        ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            pool_maxsize=max(args.workers),
+        )
+        model = ModelEngine(engine_id="bench")
+
+        print(
+            f"{'mode':>14} {'seconds':>8} {'questions/s':>12} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7}"
+        )
+        start = time.perf_counter()
+        for question in questions:
+            model.ask(question, use_history=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial ask':>14} {elapsed:>8.2f} {len(questions) / elapsed:>12.1f}")
+
+        for workers in args.workers:
+            stats = AskStats()
+            results = model.ask_many(
+                questions,
+                max_workers=workers,
+                insight_strategy=args.strategy,
+                stats=stats,
+            )
+            assert all(result.ok for result in results)
+            print(
+                f"{f'{workers} workers':>14} {stats.elapsed:>8.2f} {stats.questions_per_second:>12.1f} "
+                f"{stats.p50 * 1000:>7.0f} {stats.p90 * 1000:>7.0f} {stats.p99 * 1000:>7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time a fan-out of DatabaseEngine queries sent one by one, from a thread pool, and with execQueryAsync.
+
+The fake AI server sleeps --latency milliseconds per runPixel request to stand in for the round trip to a remote
+instance, which is what batching the RemoteEngineRun calls saves.
+
+    python benchmarks/bench_call_pipelining.py --calls 500 --latency 5
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_server.py_client.gaas.database import DatabaseEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with FakeAIServer() as fake:
+        fake.engine_methods["execQuery"] = lambda query, fmt: [
+            {"myArrayList": [{"map": {"QUERY": query}}]}
+        ]
+        fake.pixel_delay = args.latency / 1000
+        client = ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            pool_maxsize=args.threads,
+        )
+        database = DatabaseEngine(engine_id="bench")
+        queries = [f"SELECT {i}" for i in range(args.calls)]
+
+        def serial():
+            return [database.execQuery(query) for query in queries]
+
+        def threaded():
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                return list(pool.map(database.execQuery, queries))
+
+        def pipelined():
+            futures = [database.execQueryAsync(query) for query in queries]
+            return [future.result() for future in futures]
+
+        print(f"{'mode':>10} {'requests':>9} {'seconds':>8} {'calls/s':>9}")
+        for name, func in [
+            ("serial", serial),
+            (f"{args.threads} threads", threaded),
+            ("pipelined", pipelined),
+        ]:
+            requests_before = fake.request_counts.get("/engine/runPixel", 0)
+            start = time.perf_counter()
+            frames = func()
+            elapsed = time.perf_counter() - start
+            assert [df["QUERY"][0] for df in frames] == queries
+            requests = fake.request_counts["/engine/runPixel"] - requests_before
+            print(
+                f"{name:>10} {requests:>9} {elapsed:>8.2f} {args.calls / elapsed:>9.0f}"
+            )
+        client.logout()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare ServerClient.run_pixel throughput with and without connection reuse.
+
+Runs against the in-process fake AI server so the numbers reflect client side connection
+handling rather than pixel execution time.
+
+    python benchmarks/bench_connection_pool.py --requests 2000 --threads 1 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def run(base_url: str, keep_alive: bool, total: int, threads: int) -> float:
+    client = ServerClient(
+        base=base_url,
+        access_key="access",
+        secret_key="secret",
+        keep_alive=keep_alive,
+        pool_maxsize=max(threads, 10),
+    )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: client.run_pixel("1+1"), range(total)))
+    elapsed = time.perf_counter() - start
+
+    client.logout()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    with FakeAIServer() as fake:
+        print(
+            f"{'threads':>8} {'no pool (req/s)':>16} {'pooled (req/s)':>16} {'speedup':>8}"
+        )
+        for threads in args.threads:
+            without_pool = run(fake.base_url, False, args.requests, threads)
+            with_pool = run(fake.base_url, True, args.requests, threads)
+            print(
+                f"{threads:>8} {without_pool:>16.1f} {with_pool:>16.1f} {with_pool / without_pool:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure ModelEngine.embeddings_batch throughput against a fake model with per request and per text latency.
+
+The last two rows embed the corpus through an EmbeddingCache, once cold and once with every vector cached.
+
+    python benchmarks/bench_embeddings_batch.py --texts 20000 --workers 1 4 8
+"""
+
+import argparse
+import json
+import re
+import time
+
+from ai_server.py_client.gaas.batching import EmbeddingStats
+from ai_server.py_client.gaas.caching import EmbeddingCache
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--request-latency", type=float, default=20.0, help="ms")
+    parser.add_argument("--text-latency", type=float, default=0.05, help="ms")
+    args = parser.parse_args()
+
+    def embeddings(expression):
+        values = json.loads(re.search(r"values=(\[.*\])", expression).group(1))
+        time.sleep((args.request_latency + args.text_latency * len(values)) / 1000)
+        return {
+            "response": [[0.01] * args.dimensions for _ in values],
+            "numberOfTokensInPrompt": len(values),
+        }
+
+    texts = [f"chunk {i} of the corpus to embed" for i in range(args.texts)]
+    with FakeAIServer() as fake:
+        fake.register_pixel("Embeddings", embeddings)
+        ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            pool_maxsize=max(args.workers),
+        )
+        model = ModelEngine(engine_id="bench")
+
+        print(f"{'mode':>22} {'requests':>9} {'seconds':>8} {'texts/s':>9}")
+        start = time.perf_counter()
+        model.embeddings(texts)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'single request':>22} {1:>9} {elapsed:>8.2f} {len(texts) / elapsed:>9.0f}"
+        )
+
+        for workers in args.workers:
+            stats = EmbeddingStats()
+            output = model.embeddings_batch(
+                texts, batch_size=args.batch_size, max_workers=workers, stats=stats
+            )
+            assert len(output["response"]) == len(texts)
+            print(
+                f"{f'batched, {workers} workers':>22} {stats.total_batches:>9} "
+                f"{stats.elapsed:>8.2f} {stats.texts_per_second:>9.0f}"
+            )
+
+        model.embedding_cache = EmbeddingCache()
+        workers = max(args.workers)
+        for name in ["cache cold", "cache warm"]:
+            requests_before = fake.request_counts.get("/engine/runPixel", 0)
+            start = time.perf_counter()
+            output = model.embeddings_batch(
+                texts, batch_size=args.batch_size, max_workers=workers
+            )
+            elapsed = time.perf_counter() - start
+            assert len(output["response"]) == len(texts)
+            requests = fake.request_counts["/engine/runPixel"] - requests_before
+            print(
+                f"{name:>22} {requests:>9} {elapsed:>8.2f} {len(texts) / elapsed:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
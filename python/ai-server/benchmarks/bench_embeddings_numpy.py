@@ -0,0 +1,118 @@
+"""
+Compare peak memory of embedding a corpus into Python float lists and into float32/int8 ndarrays or a memmap.
+
+Each mode runs embeddings_batch in a fresh child process against the fake AI server, so its peak RSS only reflects
+that run.
+
+    python benchmarks/bench_embeddings_numpy.py --texts 20000 --dimensions 1536
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+MODES = ["lists", "float32", "int8", "memmap"]
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(base_url: str, texts: int, batch_size: int, mode: str) -> None:
+    ServerClient(base=base_url, access_key="access", secret_key="secret")
+    model = ModelEngine(engine_id="bench")
+    corpus = [str(i) for i in range(texts)]
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        if mode == "lists":
+            vectors = model.embeddings_batch(corpus, batch_size=batch_size)["response"]
+            rows = len(vectors)
+        elif mode == "memmap":
+            dimensions = len(model.embeddings(["probe"])["response"][0])
+            out = np.memmap(
+                os.path.join(directory, "vectors.f32"),
+                dtype=np.float32,
+                mode="w+",
+                shape=(texts, dimensions),
+            )
+            rows = len(
+                model.embeddings_batch(corpus, batch_size=batch_size, out=out)[
+                    "response"
+                ]
+            )
+            out.flush()
+        else:
+            vectors = model.embeddings_batch(
+                corpus, batch_size=batch_size, return_numpy=True, dtype=mode
+            )["response"]
+            rows = vectors.shape[0]
+    elapsed = time.perf_counter() - start
+
+    assert rows == texts
+    print(f"{baseline:.1f} {peak_rss_mb():.1f} {elapsed:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        base_url, texts, batch_size, mode = args.child
+        child(base_url, int(texts), int(batch_size), mode)
+        return
+
+    def embeddings(expression):
+        values = json.loads(re.search(r"values=(\[.*?\])", expression).group(1))
+        return {
+            "response": [
+                [(hash(text) % 1000 + d) / 1000 for d in range(args.dimensions)]
+                for text in values
+            ],
+            "numberOfTokensInPrompt": len(values),
+        }
+
+    with FakeAIServer() as fake:
+        fake.register_pixel("Embeddings", embeddings)
+        print(f"{'mode':>8} {'baseline RSS':>13} {'peak RSS':>10} {'seconds':>8}")
+        for mode in MODES:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    fake.base_url,
+                    str(args.texts),
+                    str(args.batch_size),
+                    mode,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            baseline, peak, elapsed = [float(value) for value in output]
+            print(f"{mode:>8} {baseline:>10.1f} MB {peak:>7.1f} MB {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
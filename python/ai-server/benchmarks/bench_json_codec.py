@@ -0,0 +1,108 @@
+"""
+Time JSON encode/decode of realistic pixel payloads with every installed codec.
+
+Payloads mirror what the SDK sends and receives: an embeddings pixelReturn, a query result pixelReturn and the
+PayloadStruct sent through RemoteEngineRun for an embeddings call.
+
+    python benchmarks/bench_json_codec.py --repeat 20
+"""
+
+import argparse
+import random
+import string
+import time
+
+from ai_server.server_resources.codec import CODECS, get_codec
+
+
+def pixel_return(output) -> dict:
+    return {
+        "insightID": "8b419eaf-df7d-4a7f-869e-8d7d59bbfde8",
+        "pixelReturn": [
+            {
+                "pixelId": "3",
+                "pixelExpression": "RemoteEngineRun(...);",
+                "isMeta": False,
+                "output": output,
+                "operationType": ["OPERATION"],
+            }
+        ],
+    }
+
+
+def payloads(rng: random.Random) -> dict:
+    embeddings = [[rng.uniform(-0.1, 0.1) for _ in range(1536)] for _ in range(64)]
+    rows = [
+        [
+            i,
+            "".join(rng.choices(string.ascii_letters, k=12)),
+            rng.random() * 1000,
+            rng.random() < 0.5,
+            None if i % 10 == 0 else "2024-05-01 12:00:00",
+        ]
+        for i in range(20000)
+    ]
+    texts = [
+        " ".join("".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(150))
+        for _ in range(64)
+    ]
+    return {
+        "embeddings response (64 x 1536)": pixel_return(
+            {"response": embeddings, "numberOfTokensInPrompt": 9600}
+        ),
+        "query response (20k rows)": pixel_return(
+            {"columns": ["ID", "NAME", "SCORE", "FLAG", "UPDATED"], "data": rows}
+        ),
+        "embeddings PayloadStruct (64 texts)": {
+            "epoc": "42",
+            "operation": "ENGINE",
+            "engineType": "MODEL",
+            "methodName": "embeddings",
+            "payload": [texts, "insight", {}],
+            "payloadClassNames": [
+                "java.util.List",
+                "java.lang.String",
+                "java.util.Map",
+            ],
+            "insightId": "8b419eaf-df7d-4a7f-869e-8d7d59bbfde8",
+        },
+    }
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"{name} is not installed, skipping")
+
+    print(
+        f"{'payload':<38} {'codec':>7} {'size (KB)':>10} {'encode (ms)':>12} {'decode (ms)':>12}"
+    )
+    for label, payload in payloads(random.Random(0)).items():
+        for codec in codecs:
+            encoded = codec.dumps(payload)
+            raw = encoded.encode("utf-8")
+            encode_ms = best_of(lambda: codec.dumps(payload), args.repeat)
+            decode_ms = best_of(lambda: codec.loads(raw), args.repeat)
+            print(
+                f"{label:<38} {codec.name:>7} {len(raw) / 1024:>10.0f} {encode_ms:>12.2f} {decode_ms:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Time LangChain chat calls one by one, with batch (threads) and with abatch (native asyncio).
+
+The fake model sleeps --latency milliseconds per answer.
+
+    python benchmarks/bench_langchain_batch.py --inputs 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import time
+
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--inputs", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=100.0, help="ms")
+    args = parser.parse_args()
+
+    def llm(expression):
+        time.sleep(args.latency / 1000)
+        return {"response": "answer", "messageType": "CHAT"}
+
+    inputs = [f"question {i}" for i in range(args.inputs)]
+    with FakeAIServer() as fake:
+        fake.register_pixel("GetModelAPI", lambda expression: "TEXT_GENERATION")
+        fake.register_pixel("GetRoomMessages", lambda expression: [])
+        fake.register_pixel("LLM", llm)
+        ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            pool_maxsize=args.concurrency,
+        )
+        chat = ModelEngine(engine_id="bench").to_langchain_chat_model(
+            max_concurrency=args.concurrency
+        )
+
+        def report(name, elapsed):
+            print(f"{name:>14} {elapsed:>8.2f} {len(inputs) / elapsed:>8.1f}")
+
+        def timed(run):
+            start = time.perf_counter()
+            assert len(run()) == len(inputs)
+            return time.perf_counter() - start
+
+        async def abatch():
+            # the first call also pays for creating the httpx client on this loop
+            try:
+                first = time.perf_counter()
+                await chat.abatch(inputs)
+                warm = time.perf_counter()
+                await chat.abatch(inputs)
+                end = time.perf_counter()
+                return warm - first, end - warm
+            finally:
+                await chat.aclose()
+
+        print(f"{'mode':>14} {'seconds':>8} {'calls/s':>8}")
+        report("invoke loop", timed(lambda: [chat.invoke(q) for q in inputs]))
+        report("batch", timed(lambda: chat.batch(inputs)))
+        first, warm = asyncio.run(abatch())
+        report("abatch, first", first)
+        report("abatch", warm)
+
+
+if __name__ == "__main__":
+    main()
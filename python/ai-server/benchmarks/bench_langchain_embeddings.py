@@ -0,0 +1,77 @@
+"""
+Time the LangChain embedder on a corpus: one request (the old behaviour), embed_documents in concurrent batches and
+aembed_documents on asyncio.
+
+The fake model sleeps --latency milliseconds per request plus --per-text milliseconds per text.
+
+    python benchmarks/bench_langchain_embeddings.py --texts 5000 --batch-size 64 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=50.0, help="ms")
+    parser.add_argument("--per-text", type=float, default=1.0, help="ms")
+    args = parser.parse_args()
+
+    def embeddings(expression):
+        values = json.loads(re.search(r"values=(\[.*?\])", expression).group(1))
+        time.sleep((args.latency + args.per_text * len(values)) / 1000)
+        return {
+            "response": [[float(d) for d in range(args.dimensions)] for _ in values],
+            "numberOfTokensInPrompt": len(values),
+        }
+
+    corpus = [f"chunk {i}" for i in range(args.texts)]
+    with FakeAIServer() as fake:
+        fake.register_pixel("Embeddings", embeddings)
+        ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            pool_maxsize=args.concurrency,
+        )
+        model = ModelEngine(engine_id="bench")
+        embedder = model.to_langchain_embedder(
+            batch_size=args.batch_size, max_concurrency=args.concurrency
+        )
+
+        def report(name, elapsed):
+            print(f"{name:>18} {elapsed:>8.2f} {len(corpus) / elapsed:>9.1f}")
+
+        def timed(run):
+            start = time.perf_counter()
+            assert len(run()) == len(corpus)
+            return time.perf_counter() - start
+
+        async def aembed():
+            try:
+                return await embedder.aembed_documents(corpus)
+            finally:
+                await embedder.aclose()
+
+        print(f"{'mode':>18} {'seconds':>8} {'texts/s':>9}")
+        report(
+            "single request",
+            timed(lambda: model.embeddings(strings_to_embed=corpus)["response"]),
+        )
+        report("embed_documents", timed(lambda: embedder.embed_documents(corpus)))
+        report("aembed_documents", timed(lambda: asyncio.run(aembed())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare peak memory of reading a large pixel output with run_pixel and with iter_pixel_output.
+
+The fake AI server answers a Rows pixel with a list of query-like rows. Each read runs in a fresh child process so its
+peak RSS only reflects that read; both modes sum a column, run_pixel also builds the DataFrame a caller would usually
+make from the output.
+
+    python benchmarks/bench_pixel_stream.py --rows 100000 1000000
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def rows(count: int) -> list:
+    return [
+        {"ID": i, "NAME": f"name {i}", "SCORE": i / 3, "UPDATED": "2024-05-01 12:00:00"}
+        for i in range(count)
+    ]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives exec and would report the parent's peak, VmHWM is reset for the new process image
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(base_url: str, count: int, streaming: bool) -> None:
+    client = ServerClient(base=base_url, access_key="access", secret_key="secret")
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if streaming:
+        total = sum(row["SCORE"] for row in client.iter_pixel_output(f"Rows({count})"))
+    else:
+        response = client.run_pixel(f"Rows({count})", full_response=True)
+        total = pd.DataFrame(response["pixelReturn"][0]["output"])["SCORE"].sum()
+    elapsed = time.perf_counter() - start
+
+    peak = peak_rss_mb()
+    assert round(total) == round(sum(i / 3 for i in range(count)))
+    print(f"{baseline:.1f} {peak:.1f} {elapsed:.2f}")
+
+
+def run(base_url: str, count: int, streaming: bool):
+    output = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--child",
+            base_url,
+            str(count),
+            str(int(streaming)),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        base_url, count, streaming = args.child
+        child(base_url, int(count), streaming == "1")
+        return
+
+    with FakeAIServer() as fake:
+        fake.register_pixel("Rows", lambda expression: rows(int(expression[5:-1])))
+        print(
+            f"{'rows':>10} {'mode':>10} {'baseline RSS':>13} {'peak RSS':>10} {'seconds':>8}"
+        )
+        for count in args.rows:
+            for streaming in (False, True):
+                baseline, peak, elapsed = run(fake.base_url, count, streaming)
+                mode = "streaming" if streaming else "run_pixel"
+                print(
+                    f"{count:>10} {mode:>10} {baseline:>10.1f} MB {peak:>7.1f} MB {elapsed:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
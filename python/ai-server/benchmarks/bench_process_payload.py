@@ -0,0 +1,94 @@
+"""
+Time decoding engine payloads with the previous process_payload loop and with decode_payload.
+
+The previous implementation looked every value up with list.index (quadratic) and tried jsonpickle on all of them.
+The lazy mode only wraps the list and decodes the few values that are read.
+
+    python benchmarks/bench_process_payload.py --size 10000
+"""
+
+import argparse
+import copy
+import datetime
+import random
+import string
+import time
+from typing import List
+
+import jsonpickle
+
+from ai_server.server_resources.server_proxy import decode_payload
+
+
+def legacy_process_payload(payload_struct):
+    """ServerProxy.process_payload before it was rewritten, kept here for comparison"""
+    import jsonpickle as jp
+
+    payload_data = None
+    if "payload" in payload_struct:
+        payload_data = payload_struct["payload"]
+    if payload_data is not None and isinstance(payload_data, List):
+        for data in payload_data:
+            index = payload_data.index(data)
+            try:
+                orig_obj = data
+                obj = jp.loads(orig_obj)
+                payload_struct["payload"][index] = obj
+            except Exception as e:
+                pass
+
+    return payload_struct
+
+
+def payloads(size: int, rng: random.Random) -> dict:
+    texts = [" ".join(rng.choices(string.ascii_lowercase, k=20)) for _ in range(size)]
+    return {
+        "numbers": list(range(size)),
+        "dicts": [{"id": i, "score": i / 3, "name": f"row {i}"} for i in range(size)],
+        "texts": texts,
+        # 1 in 100 values is a pickled object, the rest are plain strings
+        "mixed": [
+            (
+                jsonpickle.encode(datetime.date(2024, 1, 1 + i % 28))
+                if i % 100 == 0
+                else texts[i]
+            )
+            for i in range(size)
+        ],
+    }
+
+
+def best_of(func, data, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        payload_struct = {"payload": copy.copy(data)}
+        start = time.perf_counter()
+        func(payload_struct)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def lazy_read_ten(payload_struct):
+    payload = decode_payload(payload_struct, lazy=True)["payload"]
+    return [payload[i] for i in range(0, len(payload), max(len(payload) // 10, 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = {
+        "legacy": legacy_process_payload,
+        "single pass": decode_payload,
+        "lazy, 10 reads": lazy_read_ten,
+    }
+    print(f"{'payload':>10} " + " ".join(f"{mode + ' (ms)':>20}" for mode in modes))
+    for label, data in payloads(args.size, random.Random(0)).items():
+        timings = [best_of(func, data, args.repeat) for func in modes.values()]
+        print(f"{label:>10} " + " ".join(f"{ms:>20.2f}" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
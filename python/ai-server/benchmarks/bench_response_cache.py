@@ -0,0 +1,61 @@
+"""
+Time repeated deterministic ModelEngine.ask calls with and without a ResponseCache.
+
+The fake model sleeps --latency milliseconds per answer. Cache hits are timed for the memory tier and for the SQLite
+tier alone (memory budget of 0 bytes).
+
+    python benchmarks/bench_response_cache.py --repeat 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from ai_server.py_client.gaas.caching import ResponseCache
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=200.0, help="ms")
+    args = parser.parse_args()
+
+    answer = {"response": "Paris. " * 100, "messageType": "CHAT"}
+
+    def llm(expression):
+        time.sleep(args.latency / 1000)
+        return answer
+
+    params = {"temperature": 0, "max_new_tokens": 500}
+    with FakeAIServer() as fake, tempfile.TemporaryDirectory() as directory:
+        fake.register_pixel("LLM", llm)
+        ServerClient(base=fake.base_url, access_key="access", secret_key="secret")
+
+        caches = {
+            "no cache": None,
+            "memory": ResponseCache(),
+            "disk": ResponseCache(
+                max_bytes=0, path=os.path.join(directory, "answers.sqlite")
+            ),
+        }
+        print(f"{'mode':>10} {'first ask ms':>13} {'repeat ask us':>14}")
+        for name, cache in caches.items():
+            model = ModelEngine(engine_id="bench", response_cache=cache)
+            start = time.perf_counter()
+            model.ask("capital of France?", use_history=False, param_dict=params)
+            first = time.perf_counter() - start
+
+            repeat = args.repeat if cache is not None else 5
+            start = time.perf_counter()
+            for _ in range(repeat):
+                model.ask("capital of France?", use_history=False, param_dict=params)
+            per_call = (time.perf_counter() - start) / repeat
+            print(f"{name:>10} {first * 1000:>13.1f} {per_call * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
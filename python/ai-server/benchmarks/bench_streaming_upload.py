@@ -0,0 +1,90 @@
+"""
+Compare peak memory of ServerClient.upload_files with in-memory and streaming multipart bodies.
+
+Every upload runs in a fresh child process so its peak RSS only reflects that upload. The files are sparse so they
+take no disk space, and the fake AI server discards the bodies as it reads them.
+
+    python benchmarks/bench_streaming_upload.py --sizes 100 1024 4096
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.tests.fake_server import FakeAIServer
+
+
+def child(base_url: str, filepath: str, streaming: bool) -> None:
+    client = ServerClient(
+        base=base_url,
+        access_key="access",
+        secret_key="secret",
+        upload_stream_threshold=0 if streaming else None,
+    )
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    client.upload_files([filepath])
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on linux
+    print(f"{baseline / 1024:.1f} {peak / 1024:.1f} {elapsed:.2f}")
+
+
+def run(base_url: str, filepath: str, streaming: bool):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", base_url, filepath, str(int(streaming))],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1024, 4096])
+    parser.add_argument(
+        "--max-buffered",
+        type=int,
+        default=1024,
+        help="skip the in-memory upload for files larger than this many MB",
+    )
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        base_url, filepath, streaming = args.child
+        child(base_url, filepath, streaming == "1")
+        return
+
+    with FakeAIServer() as fake, tempfile.TemporaryDirectory() as temp_dir:
+        fake.discard_uploads = True
+        print(
+            f"{'size (MB)':>10} {'mode':>10} {'baseline RSS':>13} {'peak RSS':>10} {'MB/s':>8}"
+        )
+        for size in args.sizes:
+            filepath = os.path.join(temp_dir, f"upload_{size}.bin")
+            with open(filepath, "wb") as f:
+                f.truncate(size * 1024 * 1024)
+
+            for streaming in (False, True):
+                if not streaming and size > args.max_buffered:
+                    print(f"{size:>10} {'buffered':>10} {'skipped':>13}")
+                    continue
+                baseline, peak, elapsed = run(fake.base_url, filepath, streaming)
+                mode = "streaming" if streaming else "buffered"
+                print(
+                    f"{size:>10} {mode:>10} {baseline:>10.1f} MB {peak:>7.1f} MB {size / elapsed:>8.1f}"
+                )
+            os.remove(filepath)
+
+
+if __name__ == "__main__":
+    main()
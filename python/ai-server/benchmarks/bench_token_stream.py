@@ -0,0 +1,90 @@
+"""
+Compare stream_ask with open_stream at several coalescing settings: chunks emitted, time to first token, gaps between
+chunks and polls sent.
+
+The fake model releases one word every --interval milliseconds. --consumer-delay makes the consumer sleep after
+every chunk, to show how backpressure reduces polling.
+
+    python benchmarks/bench_token_stream.py --words 300 --interval 5
+"""
+
+import argparse
+import time
+
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.server_resources.server_client import ServerClient, StreamStats
+from ai_server.server_resources.token_stream import TokenStreamStats
+from ai_server.tests.fake_server import FakeAIServer
+
+SETTINGS = [
+    ("stream_ask", None, None),
+    ("open_stream", 0, None),
+    ("open_stream", 64, None),
+    ("open_stream", 64, 0.05),
+    ("open_stream", 256, 0.1),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=5.0, help="ms")
+    parser.add_argument("--poll-interval", type=float, default=10.0, help="ms")
+    parser.add_argument("--consumer-delay", type=float, default=0.0, help="ms")
+    parser.add_argument("--max-pending", type=int, default=4)
+    args = parser.parse_args()
+
+    answer = " ".join(f"word{i}" for i in range(args.words))
+    with FakeAIServer() as fake:
+        fake.register_pixel("LLM", lambda expression: answer)
+        fake.stream_chunk_interval = args.interval / 1000
+        ServerClient(
+            base=fake.base_url,
+            access_key="access",
+            secret_key="secret",
+            poll_interval=args.poll_interval / 1000,
+        )
+        model = ModelEngine(engine_id="bench")
+
+        print(
+            f"{'mode':>12} {'min_bytes':>9} {'max_delay':>9} {'chunks':>7} {'polls':>6} "
+            f"{'ttft':>7} {'mean gap':>9} {'p99 gap':>8} {'seconds':>8}"
+        )
+        for mode, min_bytes, max_delay in SETTINGS:
+            poll_stats = StreamStats()
+            stats = TokenStreamStats()
+            stats.start()
+            if mode == "stream_ask":
+                chunks = model.stream_ask("story", stats=poll_stats)
+            else:
+                chunks = model.open_stream(
+                    "story",
+                    min_bytes=min_bytes,
+                    max_delay=max_delay,
+                    max_pending=args.max_pending,
+                    stats=stats,
+                    poll_stats=poll_stats,
+                )
+
+            received = []
+            for chunk in chunks:
+                if mode == "stream_ask":
+                    stats.add_chunk(chunk, 1)
+                received.append(chunk)
+                if args.consumer_delay:
+                    time.sleep(args.consumer_delay / 1000)
+            stats.finish()
+            assert "".join(received).split() == answer.split()
+
+            def ms(value):
+                return "-" if value is None else f"{value * 1000:.1f}ms"
+
+            print(
+                f"{mode:>12} {str(min_bytes):>9} {str(max_delay):>9} {stats.chunks:>7} "
+                f"{poll_stats.polls:>6} {ms(stats.time_to_first_token):>7} "
+                f"{ms(stats.mean_gap):>9} {ms(stats.gap_percentile(99)):>8} {stats.elapsed():>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
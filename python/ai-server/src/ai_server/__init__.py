@@ -10,11 +10,12 @@ except metadata.PackageNotFoundError:
 del metadata
 
 from .server_resources.server_client import ServerClient
-from .py_client.gaas.model import ModelEngine
-from .py_client.gaas.storage import StorageEngine
-from .py_client.gaas.database import DatabaseEngine
-from .py_client.gaas.vector import VectorEngine
-from .py_client.gaas.function import FunctionEngine
+from .server_resources.async_server_client import AsyncServerClient
+from .py_client.gaas.model import ModelEngine, AsyncModelEngine
+from .py_client.gaas.storage import StorageEngine, AsyncStorageEngine
+from .py_client.gaas.database import DatabaseEngine, AsyncDatabaseEngine
+from .py_client.gaas.vector import VectorEngine, AsyncVectorEngine
+from .py_client.gaas.function import FunctionEngine, AsyncFunctionEngine
 
 
 def RESTServer(*args, **kwargs):
@@ -32,4 +33,10 @@ __all__ = [
     "DatabaseEngine",
     "VectorEngine",
     "FunctionEngine",
+    "AsyncServerClient",
+    "AsyncModelEngine",
+    "AsyncStorageEngine",
+    "AsyncDatabaseEngine",
+    "AsyncVectorEngine",
+    "AsyncFunctionEngine",
 ]
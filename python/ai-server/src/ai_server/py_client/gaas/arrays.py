@@ -0,0 +1,91 @@
+from typing import Dict, List, Optional
+import threading
+
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+
+class EmbeddingArrayWriter:
+    """Collects embedding vectors into one contiguous matrix, one block of rows at a time.
+
+    Each block is converted as soon as it arrives, so the Python float lists of a response only live until they are
+    written. The matrix is allocated on the first write, when the number of dimensions is known, unless the caller
+    provides `out` (e.g. an `np.memmap`) to write into.
+
+    With `dtype="int8"` every row is quantized symmetrically and its scale is kept in `scale`, so that
+    `response[i] * scale[i]` approximates the original vector.
+
+    Example:
+
+    ```python
+    >>> writer = EmbeddingArrayWriter(rows=2, dtype="float32")
+    >>> writer.write(0, [[0.1, 0.2], [0.3, 0.4]])
+    >>> writer.result()["response"].shape
+    (2, 2)
+    ```
+    """
+
+    def __init__(
+        self, rows: int, dtype: str = "float32", out: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            rows (`int`): Number of vectors that will be written
+            dtype (`str`): One of "float32", "float16" or "int8"
+            out (`Optional[np.ndarray]`): A `(rows, dimensions)` array of `dtype` to write into instead of allocating one
+        """
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding dtype {dtype!r}, expected one of {EMBEDDING_DTYPES}"
+            )
+        if out is not None:
+            if out.ndim != 2 or out.shape[0] != rows:
+                raise ValueError(
+                    f"out has shape {out.shape} but {rows} vectors will be written"
+                )
+            if out.dtype != np.dtype(dtype):
+                raise ValueError(f"out has dtype {out.dtype} but {dtype} was requested")
+
+        self.rows = rows
+        self.dtype = dtype
+        self.matrix: Optional[np.ndarray] = out
+        self.scale: Optional[np.ndarray] = (
+            np.ones(rows, dtype=np.float32) if dtype == "int8" else None
+        )
+        self.lock = threading.Lock()
+
+    def write(self, start: int, vectors: List[List[float]]) -> None:
+        """Write `vectors` to the rows starting at `start`. Blocks can be written from several threads at once."""
+        if not vectors:
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        if block.ndim != 2:
+            raise ValueError("Embedding vectors do not all have the same length")
+
+        with self.lock:
+            if self.matrix is None:
+                self.matrix = np.empty((self.rows, block.shape[1]), dtype=self.dtype)
+        if block.shape[1] != self.matrix.shape[1]:
+            raise ValueError(
+                f"Got vectors of {block.shape[1]} dimensions, expected {self.matrix.shape[1]}"
+            )
+
+        end = start + len(block)
+        if self.dtype == "int8":
+            scale = np.abs(block).max(axis=1) / 127
+            scale[scale == 0] = 1
+            self.scale[start:end] = scale
+            self.matrix[start:end] = np.rint(block / scale[:, None])
+        else:
+            self.matrix[start:end] = block
+
+    def result(self) -> Dict:
+        """The `response` matrix, plus the per row `scale` for int8"""
+        matrix = self.matrix
+        if matrix is None:
+            matrix = np.empty((self.rows, 0), dtype=self.dtype)
+        result = {"response": matrix}
+        if self.scale is not None:
+            result["scale"] = self.scale
+        return result
@@ -0,0 +1,163 @@
+from typing import List, Optional, Tuple
+import threading
+import time
+from ai_server.server_resources import codec
+
+
+def split_batches(
+    texts: List[str],
+    batch_size: Optional[int] = 64,
+    max_batch_bytes: Optional[int] = 1024 * 1024,
+) -> List[Tuple[int, int]]:
+    """
+    Split `texts` into consecutive `(start, end)` ranges of at most `batch_size` texts and `max_batch_bytes` UTF-8 bytes.
+
+    A single text larger than `max_batch_bytes` gets a batch of its own rather than being split.
+
+    Args:
+        texts (`List[str]`): The texts in input order
+        batch_size (`Optional[int]`): Maximum number of texts per batch, None for no limit
+        max_batch_bytes (`Optional[int]`): Maximum encoded size of a batch, None for no limit
+
+    Returns:
+        `List[Tuple[int, int]]`: Slice bounds into `texts`, covering every text exactly once
+    """
+    batches = []
+    start = 0
+    size = 0
+    for index, text in enumerate(texts):
+        # the pixel carries the JSON encoded list, count the quotes, escapes and separator too
+        text_bytes = len(codec.dumps(text).encode("utf-8")) + 2
+        full = (batch_size and index - start >= batch_size) or (
+            max_batch_bytes and size + text_bytes > max_batch_bytes
+        )
+        if full and index > start:
+            batches.append((start, index))
+            start = index
+            size = 0
+        size += text_bytes
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+class EmbeddingStats:
+    """Progress and throughput of a batched embeddings call, updated as batches complete."""
+
+    def __init__(self):
+        self.total_texts: int = 0
+        self.total_batches: int = 0
+        self.embedded_texts: int = 0
+        self.completed_batches: int = 0
+        self.failed_batches: int = 0
+        # attempts beyond the first, summed over all batches
+        self.retries: int = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def start(self, total_texts: int, total_batches: int) -> None:
+        self.total_texts = total_texts
+        self.total_batches = total_batches
+        self.started_at = time.monotonic()
+
+    def record(self, texts: int, attempts: int, ok: bool) -> None:
+        with self.lock:
+            self.retries += max(attempts - 1, 0)
+            if ok:
+                self.completed_batches += 1
+                self.embedded_texts += texts
+            else:
+                self.failed_batches += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def texts_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.embedded_texts / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"EmbeddingStats({self.embedded_texts}/{self.total_texts} texts, "
+            f"{self.completed_batches}/{self.total_batches} batches, failed={self.failed_batches}, "
+            f"retries={self.retries}, {self.texts_per_second:.1f} texts/s)"
+        )
+
+
+class AskStats:
+    """Throughput and latency percentiles of an `ask_many` call, updated as questions complete."""
+
+    def __init__(self):
+        self.total: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        # attempts beyond the first, summed over all questions
+        self.retries: int = 0
+        # seconds per question including retries, in completion order
+        self.latencies: List[float] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def start(self, total: int) -> None:
+        self.total = total
+        self.started_at = time.monotonic()
+
+    def record(self, latency: float, attempts: int, ok: bool) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+            self.retries += max(attempts - 1, 0)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def questions_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Latency in seconds below which `percent` % of the questions completed (nearest rank)"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        rank = max(int(-(-percent * len(latencies) // 100)), 1)
+        return latencies[min(rank, len(latencies)) - 1]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p90(self) -> float:
+        return self.percentile(90)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def __repr__(self) -> str:
+        return (
+            f"AskStats({self.completed}/{self.total} questions, failed={self.failed}, "
+            f"retries={self.retries}, {self.questions_per_second:.1f} questions/s, "
+            f"p50={self.p50:.3f}s p90={self.p90:.3f}s p99={self.p99:.3f}s)"
+        )
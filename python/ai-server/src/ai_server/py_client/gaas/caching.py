@@ -0,0 +1,423 @@
+from typing import Any, Dict, List, Optional, Tuple
+from array import array
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from ai_server.server_resources import codec
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# keep the number of bound parameters per statement well below SQLite's limit
+SQLITE_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def params_key(param_dict: Optional[Dict]) -> str:
+    """Canonical form of the model parameters, so the same parameters always hit the same entries"""
+    return json.dumps(param_dict or {}, sort_keys=True, default=str)
+
+
+def connect(path: str) -> Tuple[str, sqlite3.Connection]:
+    """Open (creating it and its directory if needed) the SQLite file of a cache, shared by threads"""
+    if path != ":memory:":
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(path, check_same_thread=False)
+    if path != ":memory:":
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+    return path, connection
+
+
+class EmbeddingCache:
+    """Content addressed, size bounded LRU cache of embedding vectors kept in a SQLite file.
+
+    Entries are keyed by (engine_id, param_dict, sha256(text)), so the cache can be shared by several engines and
+    survives between runs when `path` is a file. Once `max_entries` is exceeded the least recently used entries are
+    evicted.
+
+    Example:
+
+    ```python
+    >>> cache = EmbeddingCache("~/.cache/ai_server/embeddings.sqlite")
+    >>> model = ModelEngine(engine_id="e4449559-bcff-4941-ae72-0e3f18e06660", embedding_cache=cache)
+    >>> model.embeddings(["text1", "text2"])  # only texts that are not cached are sent to the server
+    >>> cache.hits, cache.misses
+    ```
+    """
+
+    def __init__(self, path: str = ":memory:", max_entries: Optional[int] = 1000000):
+        """
+        Args:
+            path (`str`): The SQLite file, created if it does not exist. ":memory:" keeps the cache for this process only
+            max_entries (`Optional[int]`): Maximum number of vectors kept, None for no limit
+        """
+        self.path, self.connection = connect(path)
+        self.max_entries = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.lock = threading.Lock()
+
+        with self.lock, self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    engine_id TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (engine_id, params, text_hash)
+                )
+                """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+
+    def get_many(
+        self, engine_id: str, param_dict: Optional[Dict], texts: List[str]
+    ) -> List[Optional[List[float]]]:
+        """
+        Look up the vectors of `texts`, marking every hit as recently used.
+
+        Returns:
+            `List[Optional[List[float]]]`: One vector per text in the same order, None where the text is not cached
+        """
+        params = params_key(param_dict)
+        hashes = [text_hash(text) for text in texts]
+        unique = list(dict.fromkeys(hashes))
+
+        found = {}
+        with self.lock, self.connection:
+            now = time.time()
+            for start in range(0, len(unique), SQLITE_CHUNK):
+                chunk = unique[start : start + SQLITE_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE engine_id = ? AND params = ? AND text_hash IN ({placeholders})",
+                    [engine_id, params, *chunk],
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    hit_placeholders = ",".join("?" * len(rows))
+                    self.connection.execute(
+                        f"UPDATE embeddings SET last_used = ? "
+                        f"WHERE engine_id = ? AND params = ? AND text_hash IN ({hit_placeholders})",
+                        [now, engine_id, params, *(row[0] for row in rows)],
+                    )
+
+            vectors = [
+                array("d", found[h]).tolist() if h in found else None for h in hashes
+            ]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(
+        self,
+        engine_id: str,
+        param_dict: Optional[Dict],
+        texts: List[str],
+        vectors: List[List[float]],
+    ) -> None:
+        """Store the vectors of `texts`, then evict the least recently used entries beyond `max_entries`."""
+        if len(texts) != len(vectors):
+            raise ValueError(f"Got {len(texts)} texts but {len(vectors)} vectors")
+
+        params = params_key(param_dict)
+        with self.lock, self.connection:
+            now = time.time()
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        engine_id,
+                        params,
+                        text_hash(text),
+                        array("d", vector).tobytes(),
+                        now,
+                    )
+                    for text, vector in zip(texts, vectors)
+                ],
+            )
+            if self.max_entries is not None:
+                excess = self._count() - self.max_entries
+                if excess > 0:
+                    self.connection.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions += excess
+
+    def _count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self._count()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"EmbeddingCache({self.path!r}, hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions})"
+        )
+
+
+def is_deterministic(use_history: Optional[bool], param_dict: Optional[Dict]) -> bool:
+    """Whether an ask can be answered from a cache: no conversation history and greedy decoding"""
+    if use_history or not param_dict:
+        # without an explicit temperature the model samples with its own default
+        return False
+    temperature = param_dict.get("temperature")
+    greedy = param_dict.get("do_sample") is False or (
+        isinstance(temperature, (int, float))
+        and not isinstance(temperature, bool)
+        and temperature == 0
+    )
+    several = any(
+        (param_dict.get(name) or 1) > 1 for name in ("n", "num_return_sequences")
+    )
+    return greedy and not several
+
+
+def normalize(value: Any) -> Any:
+    """Make values that mean the same compare equal once encoded, e.g. a temperature of 0 and of 0.0"""
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool) and abs(value) < 2**53:
+        return float(value)
+    return value
+
+
+def response_key(
+    engine_id: str,
+    question: str,
+    context: Optional[str],
+    param_dict: Optional[Dict],
+) -> str:
+    """sha256 of the canonical form of everything that determines the answer"""
+    canonical = json.dumps(
+        [engine_id, question, context, normalize(param_dict or {})],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Exact match cache of `ModelEngine.ask` answers, in memory and optionally in a SQLite file.
+
+    Answers are keyed by a hash of (engine_id, question, context, param_dict) and only cached when they are
+    reproducible, i.e. `use_history` is off and the parameters ask for greedy decoding (`temperature=0` or
+    `do_sample=False`). Other asks bypass the cache. Both tiers evict the least recently used answers beyond their
+    byte budget, and answers older than `ttl` seconds are never returned.
+
+    Example:
+
+    ```python
+    >>> cache = ResponseCache(max_bytes=64 * 1024 * 1024, ttl=24 * 3600, path="~/.cache/ai_server/answers.sqlite")
+    >>> model = ModelEngine(engine_id="2c6de0ff-62e0-4dd0-8380-782ac4d40245", response_cache=cache)
+    >>> model.ask("What is the capital of France?", use_history=False, param_dict={"temperature": 0})
+    >>> cache.hits, cache.misses, cache.bypassed
+    ```
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+    ):
+        """
+        Args:
+            max_bytes (`int`): Size of the encoded answers kept in memory
+            ttl (`Optional[float]`): Seconds an answer stays valid, None to keep it until evicted
+            path (`Optional[str]`): SQLite file of the on-disk tier, None for memory only
+            max_disk_bytes (`int`): Size of the encoded answers kept on disk
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.bypassed: int = 0
+        self.evictions: int = 0
+        self.lock = threading.Lock()
+
+        # key -> (expires_at, encoded answer), least recently used first
+        self.memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.memory_bytes: int = 0
+
+        self.path = None
+        self.connection = None
+        if path is not None:
+            self.path, self.connection = connect(path)
+            with self.lock, self.connection:
+                self.connection.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        answer TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                    """)
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+                )
+
+    def key(
+        self,
+        engine_id: str,
+        question: str,
+        context: Optional[str],
+        use_history: Optional[bool],
+        param_dict: Optional[Dict],
+    ) -> Optional[str]:
+        """The cache key of an ask, or None (counted as bypassed) when its answer must not be cached"""
+        if not is_deterministic(use_history, param_dict):
+            with self.lock:
+                self.bypassed += 1
+            return None
+        return response_key(engine_id, question, context, param_dict)
+
+    def get(self, key: str) -> Optional[Any]:
+        """A fresh copy of the cached answer, or None"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[0] <= now:
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self.memory.move_to_end(key)
+            elif self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT expires_at, answer FROM responses WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    with self.connection:
+                        self.connection.execute(
+                            "UPDATE responses SET last_used = ? WHERE key = ?",
+                            (now, key),
+                        )
+                    entry = row
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # decoding hands out a new object, so callers may modify it without touching the cache
+        return codec.loads(entry[1])
+
+    def put(self, key: str, answer: Any) -> None:
+        encoded = codec.dumps(answer)
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else float("inf")
+        with self.lock:
+            self._remember(key, (expires_at, encoded))
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                        (key, encoded, len(encoded), expires_at, now),
+                    )
+                    self._evict_disk(now)
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._discard(key)
+        if len(entry[1]) > self.max_bytes:
+            return
+        self.memory[key] = entry
+        self.memory_bytes += len(entry[1])
+        while self.memory_bytes > self.max_bytes:
+            _, (_, evicted) = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self.memory.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= len(entry[1])
+
+    def _evict_disk(self, now: float) -> None:
+        self.connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        excess = (
+            self.connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            - self.max_disk_bytes
+        )
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.memory)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def __repr__(self) -> str:
+        return (
+            f"ResponseCache(hits={self.hits}, misses={self.misses}, bypassed={self.bypassed}, "
+            f"evictions={self.evictions}, {self.memory_bytes} bytes in memory)"
+        )
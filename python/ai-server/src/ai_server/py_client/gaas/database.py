@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import Any, Iterator, Optional
+from concurrent.futures import Future
 import logging
-from ai_server.server_resources.server_proxy import ServerProxy
+from ai_server.server_resources.concurrency import chain_future
+from ai_server.server_resources.server_proxy import ServerProxy, AsyncServerProxy
 import pandas as pd
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -53,30 +55,47 @@ class DatabaseEngine(ServerProxy):
             method_arg_types=["java.lang.String", "java.lang.String"],
         )
 
-        if isinstance(fileLoc, list) and len(fileLoc) > 0:
-            fileLoc = fileLoc[0]
-
-        if return_pandas:
-            logger.info(f"The output is {fileLoc}")
-            logger.info(fileLoc)
-            if isinstance(fileLoc, dict) and len(fileLoc) > 0:
-                rows = []
-                # saftey check based on how java gson structure the response
-                if "myArrayList" in fileLoc.keys() and {
-                    rows.append(d[key]) if key == "map" else "notMap"
-                    for d in fileLoc["myArrayList"]
-                    for key in d.keys()
-                } == {None}:
-                    return pd.DataFrame.from_dict(rows)
-            elif isinstance(fileLoc, str):
-                return pd.read_json(fileLoc)
-            else:
-                return fileLoc
-        else:
-            if isinstance(fileLoc, dict) and len(fileLoc) > 0:
-                return fileLoc
-            else:
-                return open(fileLoc, "r", encoding="utf-8").read()
+        return _format_query_output(fileLoc, return_pandas)
+
+    def execQueryAsync(
+        self,
+        query: str,
+        insight_id: Optional[str] = None,
+        return_pandas: Optional[bool] = True,
+        server_output_format: Optional[str] = "json",
+    ) -> Future:
+        """Executes a query like `execQuery` without waiting for the result.
+
+        Queries submitted around the same time, from any thread, are sent to the server in one request, so fanning out
+        many queries costs about one round trip instead of one per query.
+
+        Args:
+            query: The SQL SELECT query to execute.
+            insight_id: Optional; The unique identifier for the temporal workspace.
+                        If None, the session's default insight_id is used.
+            return_pandas: Optional; If True, the future resolves to a pandas DataFrame.
+                           Defaults to True.
+            server_output_format: Optional; The format for the server to return data in,
+                                  either "json" or "file". Defaults to "json".
+
+        Returns:
+            A Future resolved with what `execQuery` would return, or with the error it would raise.
+        """
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        future = self.call_async(
+            engine_type="database",
+            engine_id=self.engine_id,
+            insight_id=insight_id,
+            method_name="execQuery",
+            method_args=[query, server_output_format],
+            method_arg_types=["java.lang.String", "java.lang.String"],
+        )
+
+        return chain_future(
+            future, lambda fileLoc: _format_query_output(fileLoc, return_pandas)
+        )
 
     def insertData(
         self, query: str, insight_id: Optional[str] = None, commit: bool = True
@@ -147,9 +166,7 @@ class DatabaseEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        commitStr = "true" if commit else "false"
-
-        pixel = f'Database(database = "{self.engine_id}")|Query("<encode>{query}</encode>")|ExecQuery(commit={commitStr});'
+        pixel = _run_query_pixel(self.engine_id, query, commit)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -160,6 +177,39 @@ class DatabaseEngine(ServerProxy):
 
         return output_payload_message["pixelReturn"][0]["output"]
 
+    def iterQuery(
+        self,
+        query: str,
+        insight_id: Optional[str] = None,
+        commit: bool = True,
+        item_path: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Executes a query like `runQuery` but yields the rows of the output while the response is being read.
+
+        The raw response, the parsed output and any DataFrame built from it are never in memory at the same time,
+        so large results can be aggregated or written out row by row. Requires ijson (`pip install ai-server-sdk[streaming]`).
+
+        Args:
+            query: The SQL query to execute.
+            insight_id: Optional; The unique identifier for the temporal workspace.
+                        If None, the session's default insight_id is used.
+            commit: Optional; If True, the transaction is committed. Defaults to True.
+            item_path: Optional; Dotted path to the list of rows when the output is an object, e.g. "data".
+
+        Returns:
+            An iterator over the rows of the output.
+
+        Raises:
+            PixelError: If the server returns an error during query execution.
+        """
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _run_query_pixel(self.engine_id, query, commit)
+        return self.server.iter_pixel_output(
+            payload=pixel, insight_id=insight_id, item_path=item_path
+        )
+
     def to_langchain_database(self):
         """Transform the database engine into a langchain BaseRetriever object so that it can be used with langchain code"""
         from langchain_core.retrievers import BaseRetriever
@@ -204,3 +254,100 @@ class DatabaseEngine(ServerProxy):
                 return "SQL Operations"
 
         return SemossLangchainDatabase(database_engine=self)
+
+
+class AsyncDatabaseEngine(AsyncServerProxy):
+    """asyncio counterpart of `DatabaseEngine` that sends its requests through an `AsyncServerClient`"""
+
+    def __init__(self, engine_id: str, insight_id: Optional[str] = None, server=None):
+        super().__init__(server=server)
+
+        self.engine_id = engine_id
+        self.insight_id = insight_id
+
+        logger.info("AsyncDatabaseEngine initialized with engine id " + engine_id)
+
+    async def execQuery(
+        self,
+        query: str,
+        insight_id: Optional[str] = None,
+        return_pandas: Optional[bool] = True,
+        server_output_format: Optional[str] = "json",
+    ) -> "pd.DataFrame | dict | str":
+        """Executes a query against the database engine. See `DatabaseEngine.execQuery`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        fileLoc = await self.call(
+            engine_type="database",
+            engine_id=self.engine_id,
+            insight_id=insight_id,
+            method_name="execQuery",
+            method_args=[query, server_output_format],
+            method_arg_types=["java.lang.String", "java.lang.String"],
+        )
+
+        return _format_query_output(fileLoc, return_pandas)
+
+    async def insertData(
+        self, query: str, insight_id: Optional[str] = None, commit: bool = True
+    ) -> None:
+        """Executes an insert query against the database engine."""
+        return await self.runQuery(query, insight_id, commit)
+
+    async def updateData(
+        self, query: str, insight_id: Optional[str] = None, commit: bool = True
+    ) -> None:
+        """Executes an update query against the database engine."""
+        return await self.runQuery(query, insight_id, commit)
+
+    async def removeData(
+        self, query: str, insight_id: Optional[str] = None, commit: bool = True
+    ) -> None:
+        """Executes a delete query against the database engine."""
+        return await self.runQuery(query, insight_id, commit)
+
+    async def runQuery(
+        self, query: str, insight_id: Optional[str] = None, commit: bool = True
+    ):
+        """A generic method to execute a query against the database engine. See `DatabaseEngine.runQuery`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _run_query_pixel(self.engine_id, query, commit)
+        return await self.run_pixel_output(pixel, insight_id)
+
+
+def _run_query_pixel(engine_id: str, query: str, commit: bool = True) -> str:
+    """Build the Database|Query|ExecQuery pixel used by runQuery"""
+    commitStr = "true" if commit else "false"
+
+    return f'Database(database = "{engine_id}")|Query("<encode>{query}</encode>")|ExecQuery(commit={commitStr});'
+
+
+def _format_query_output(fileLoc, return_pandas: Optional[bool] = True):
+    """Turn the execQuery output into a DataFrame, a dict or the contents of the result file"""
+    if isinstance(fileLoc, list) and len(fileLoc) > 0:
+        fileLoc = fileLoc[0]
+
+    if return_pandas:
+        logger.info(f"The output is {fileLoc}")
+        logger.info(fileLoc)
+        if isinstance(fileLoc, dict) and len(fileLoc) > 0:
+            rows = []
+            # saftey check based on how java gson structure the response
+            if "myArrayList" in fileLoc.keys() and {
+                rows.append(d[key]) if key == "map" else "notMap"
+                for d in fileLoc["myArrayList"]
+                for key in d.keys()
+            } == {None}:
+                return pd.DataFrame.from_dict(rows)
+        elif isinstance(fileLoc, str):
+            return pd.read_json(fileLoc)
+        else:
+            return fileLoc
+    else:
+        if isinstance(fileLoc, dict) and len(fileLoc) > 0:
+            return fileLoc
+        else:
+            return open(fileLoc, "r", encoding="utf-8").read()
@@ -1,7 +1,7 @@
 from typing import Optional, Any
 import logging
-import json
-from ai_server.server_resources.server_proxy import ServerProxy
+from ai_server.server_resources import codec
+from ai_server.server_resources.server_proxy import ServerProxy, AsyncServerProxy
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -36,7 +36,7 @@ class FunctionEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        pixel = f'ExecuteFunctionEngine(engine = "{self.engine_id}", map=[{json.dumps(parameterMap, ensure_ascii=False)}]);'
+        pixel = _execute_function_pixel(self.engine_id, parameterMap)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -67,3 +67,30 @@ class FunctionEngine(ServerProxy):
     #             return self.function_engine.execute(parameterMap)
 
     #     return SemossFunctionTool()
+
+
+class AsyncFunctionEngine(AsyncServerProxy):
+    """asyncio counterpart of `FunctionEngine` that sends its pixels through an `AsyncServerClient`"""
+
+    def __init__(self, engine_id: str, insight_id: Optional[str] = None, server=None):
+        super().__init__(server=server)
+
+        self.engine_id = engine_id
+        self.insight_id = insight_id
+
+        logger.info("AsyncFunctionEngine initialized with engine id " + engine_id)
+
+    def get_function_engine_id(self) -> str:
+        return self.engine_id
+
+    async def execute(self, parameterMap: dict, insight_id: Optional[str] = None):
+        """Executes a function on the function engine. See `FunctionEngine.execute`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _execute_function_pixel(self.engine_id, parameterMap)
+        return await self.run_pixel_output(pixel, insight_id)
+
+
+def _execute_function_pixel(engine_id: str, parameterMap: dict) -> str:
+    return f'ExecuteFunctionEngine(engine = "{engine_id}", map=[{codec.dumps(parameterMap)}]);'
@@ -1,16 +1,45 @@
-from typing import List, Optional, Dict, Union, Any, Generator
+from typing import (
+    List,
+    Optional,
+    Dict,
+    Tuple,
+    Union,
+    Any,
+    Callable,
+    Generator,
+    AsyncGenerator,
+)
 import logging
-import json
-from ai_server.server_resources.server_proxy import ServerProxy
+import threading
+from ai_server.server_resources import codec
+from ai_server.server_resources.concurrency import TaskResult, map_ordered
+from ai_server.py_client.gaas.batching import AskStats, EmbeddingStats, split_batches
+from ai_server.py_client.gaas.caching import EmbeddingCache, ResponseCache
+from ai_server.py_client.gaas.arrays import EmbeddingArrayWriter
+from ai_server.server_resources.server_proxy import ServerProxy, AsyncServerProxy
+from ai_server.server_resources.server_client import StreamStats
+from ai_server.server_resources.token_stream import TokenStream, TokenStreamStats
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+INSIGHT_STRATEGIES = ("shared", "per_worker", "per_question")
+
 
 class ModelEngine(ServerProxy):
-    def __init__(self, engine_id: Optional[str], insight_id: Optional[str] = None):
+    def __init__(
+        self,
+        engine_id: Optional[str],
+        insight_id: Optional[str] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
         super().__init__()
         self.engine_id = engine_id
         self.insight_id = insight_id
+        # vectors looked up here before the Embeddings pixel is sent, see `EmbeddingCache`
+        self.embedding_cache = embedding_cache
+        # answers of deterministic asks, see `ResponseCache`
+        self.response_cache = response_cache
 
         logger.info("ModelEngine initialized with engine id " + engine_id)
 
@@ -39,6 +68,9 @@ class ModelEngine(ServerProxy):
                         For OpenAI, this would be a list of dictionaris where the only keys within each dictionary are 'role' and 'content'
                         For TextGen, this could be a list simialr to OpenAI or a complete string that has all the pieces pre constructed
 
+        When the engine has a `response_cache`, an ask without history and with `temperature=0` is answered from
+        the cache if the same question, context and param_dict were asked before.
+
         Returns:
             A list of dictionaries containing the model's response.
 
@@ -48,18 +80,17 @@ class ModelEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        optionalContext = (
-            f',context=["<encode>{context}</encode>"]' if (context is not None) else ""
-        )
-        optionalParamDict = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if (param_dict is not None)
-            else ""
-        )
-
-        use_history_param = str(use_history).lower()
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.key(
+                self.engine_id, question, context, use_history, param_dict
+            )
+            if cache_key is not None:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
-        pixel = f'LLM(engine="{self.engine_id}", command="<encode>{question}</encode>", useHistory={use_history_param}{optionalContext}{optionalParamDict});'
+        pixel = _llm_pixel(self.engine_id, question, context, use_history, param_dict)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -68,7 +99,10 @@ class ModelEngine(ServerProxy):
         if output_payload_message["pixelReturn"][0]["operationType"] == ["ERROR"]:
             raise RuntimeError(output_payload_message["pixelReturn"][0]["output"])
 
-        return output_payload_message["pixelReturn"][0]["output"]
+        output = output_payload_message["pixelReturn"][0]["output"]
+        if cache_key is not None:
+            self.response_cache.put(cache_key, output)
+        return output
 
     def stream_ask(
         self,
@@ -77,6 +111,7 @@ class ModelEngine(ServerProxy):
         use_history: Optional[bool] = True,  # To control the history
         insight_id: Optional[str] = None,
         param_dict: Optional[Dict] = None,
+        stats: Optional[StreamStats] = None,
     ) -> Generator:
         """Streams the response from a text-generation model.
 
@@ -94,6 +129,7 @@ class ModelEngine(ServerProxy):
                         where full_prompt is the an multi faceted prompt construct before sending the payload
                         For OpenAI, this would be a list of dictionaris where the only keys within each dictionary are 'role' and 'content'
                         For TextGen, this could be a list simialr to OpenAI or a complete string that has all the pieces pre constructed
+            stats: Optional; A StreamStats that is filled in with the poll and chunk counts of the stream.
 
         Yields:
             A generator that yields the model's response in chunks.
@@ -104,41 +140,205 @@ class ModelEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        optionalContext = (
-            f',context=["<encode>{context}</encode>"]' if (context is not None) else ""
-        )
-        optionalParamDict = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if (param_dict is not None)
-            else ""
-        )
-
-        use_history_param = str(use_history).lower()
-
-        pixel = f'LLM(engine="{self.engine_id}", command="<encode>{question}</encode>", useHistory={use_history_param}{optionalContext}{optionalParamDict});'
+        pixel = _llm_pixel(self.engine_id, question, context, use_history, param_dict)
 
         for message in self.server.get_partial_responses(
-            self.server.run_pixel_async(payload=pixel, insight_id=insight_id)
+            self.server.run_pixel_async(payload=pixel, insight_id=insight_id),
+            stats=stats,
         ):
             if message and message.strip():
                 yield message
 
+    def open_stream(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        use_history: Optional[bool] = True,
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        min_bytes: int = 0,
+        max_delay: Optional[float] = None,
+        max_pending: int = 64,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        stats: Optional[TokenStreamStats] = None,
+        poll_stats: Optional[StreamStats] = None,
+    ) -> TokenStream:
+        """Starts streaming the response from a text-generation model and returns a `TokenStream` delivering it.
+
+        Unlike `stream_ask`, the partials are read on a background thread and coalesced into chunks of at least
+        `min_bytes` bytes, or whatever arrived within `max_delay` seconds. When the consumer falls behind, at most
+        `max_pending` partials are buffered before polling pauses. The chunks keep whitespace, so joining them gives
+        the full answer.
+
+        Args:
+            question: The question to ask the model.
+            context: Optional; Additional context to provide to the model.
+            use_history: Optional; If True, the model will use the conversation history.
+            insight_id: Optional; The unique identifier for the temporal workspace.
+                        If None, the session's default insight_id is used.
+            param_dict: Optional; A dictionary of additional parameters for the model, see `stream_ask`.
+            min_bytes: Minimum UTF-8 size of an emitted chunk, 0 emits every partial as it arrives.
+            max_delay: Optional; Maximum seconds a partial is held back waiting for `min_bytes`.
+            max_pending: Number of partials buffered for a slow consumer before polling pauses.
+            on_chunk: Optional; Called with every chunk from a delivery thread instead of iterating the stream,
+                      use `TokenStream.wait()` to block until it is done.
+            stats: Optional; A TokenStreamStats filled in with the time to first token, the gaps between chunks
+                   and the tokens per second.
+            poll_stats: Optional; A StreamStats filled in with the poll counts of the stream.
+
+        Returns:
+            A `TokenStream` to iterate, close or wait on.
+        """
+        if insight_id is None:
+            insight_id = self.insight_id
+        if stats is None:
+            stats = TokenStreamStats()
+        # the time to first token includes submitting the job
+        stats.start()
+
+        pixel = _llm_pixel(self.engine_id, question, context, use_history, param_dict)
+        job_id = self.server.run_pixel_async(payload=pixel, insight_id=insight_id)
+
+        return TokenStream(
+            self.server.get_partial_responses(job_id, stats=poll_stats),
+            min_bytes=min_bytes,
+            max_delay=max_delay,
+            max_pending=max_pending,
+            on_chunk=on_chunk,
+            stats=stats,
+        )
+
+    def ask_many(
+        self,
+        questions: List[str],
+        context: Optional[str] = None,
+        use_history: Optional[bool] = False,
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        max_workers: int = 8,
+        insight_strategy: str = "shared",
+        close_insights: bool = True,
+        retries: int = 0,
+        retry_backoff: float = 0.5,
+        stats: Optional[AskStats] = None,
+    ) -> List[TaskResult]:
+        """Sends many questions to a text-generation model concurrently.
+
+        Every question is sent with `ask` on up to `max_workers` threads. A failing question does not stop the
+        others, its error is returned in its own result instead.
+
+        Args:
+            questions: The questions to ask.
+            context: Optional; Additional context sent with every question.
+            use_history: Optional; If True, the model will use the conversation history of the insight the question
+                         is sent in. Defaults to False so that questions do not see each other's answers.
+            insight_id: Optional; The insight used by the "shared" strategy.
+                        If None, the session's default insight_id is used.
+            param_dict: Optional; A dictionary of additional parameters for the model, sent with every question.
+            max_workers: Maximum number of questions in flight at once.
+            insight_strategy: Which insight each question is sent in:
+                              "shared" - all in `insight_id`
+                              "per_worker" - one new insight per worker thread, reused for its questions
+                              "per_question" - a new insight for every question, so history can never leak
+            close_insights: If True, insights created by the strategy are dropped once all questions are answered.
+            retries: How many times a failed question is retried.
+            retry_backoff: Seconds before the first retry, doubled for every following retry.
+            stats: Optional; An `AskStats` updated as questions complete, with the throughput and p50/p90/p99 latency.
+
+        Returns:
+            One `TaskResult` per question in input order, with the `ask` output in `value` or the exception in `error`.
+        """
+        if insight_strategy not in INSIGHT_STRATEGIES:
+            raise ValueError(
+                f"Unknown insight_strategy {insight_strategy!r}, expected one of {INSIGHT_STRATEGIES}"
+            )
+        if insight_id is None:
+            insight_id = self.insight_id
+        if insight_strategy == "shared" and insight_id is None:
+            # resolve it once here, otherwise concurrent first calls could each create a current insight
+            insight_id = self.server.cur_insight or self.server.make_new_insight()
+
+        if stats is None:
+            stats = AskStats()
+        stats.start(len(questions))
+
+        created = []
+        created_lock = threading.Lock()
+        worker_insights = threading.local()
+
+        def new_insight() -> str:
+            new_id = self.server.make_new_insight(set_current=False)
+            with created_lock:
+                created.append(new_id)
+            return new_id
+
+        def ask_one(question: str) -> List[Dict]:
+            target = insight_id
+            if insight_strategy == "per_worker":
+                target = getattr(worker_insights, "insight_id", None)
+                if target is None:
+                    target = worker_insights.insight_id = new_insight()
+            elif insight_strategy == "per_question":
+                target = new_insight()
+            return self.ask(
+                question=question,
+                context=context,
+                use_history=use_history,
+                insight_id=target,
+                param_dict=param_dict,
+            )
+
+        results = map_ordered(
+            ask_one,
+            questions,
+            max_workers=max_workers,
+            retries=retries,
+            retry_backoff=retry_backoff,
+            on_done=lambda result: stats.record(
+                result.elapsed, result.attempts, result.ok
+            ),
+        )
+        stats.finish()
+        logger.info(f"Asked {stats}")
+
+        if close_insights and created:
+            map_ordered(self._drop_insight, created, max_workers=max_workers)
+        return results
+
+    def _drop_insight(self, insight_id: str) -> None:
+        self.server.run_pixel(payload="DropInsight();", insight_id=insight_id)
+        self.server.open_insights.discard(insight_id)
+
     def embeddings(
         self,
         strings_to_embed: List[str],
         insight_id: Optional[str] = None,
         param_dict: Optional[Dict] = None,
+        use_cache: bool = True,
+        return_numpy: bool = False,
+        dtype: str = "float32",
+        out=None,
     ) -> Dict:
         """Generates embeddings for a list of strings.
 
+        When the engine has an `embedding_cache`, cached vectors are returned without a request and only the
+        missing strings are sent to the server.
+
         Args:
             strings_to_embed: A list of strings to embed.
             insight_id: Optional; The unique identifier for the temporal workspace.
                         If None, the session's default insight_id is used.
             param_dict: Optional; A dictionary of additional parameters for the model.
+            use_cache: If False, skip the `embedding_cache` and embed every string.
+            return_numpy: If True, `response` is a contiguous `(len(strings_to_embed), dimensions)` ndarray
+                          instead of a list of float lists.
+            dtype: Optional; "float32", "float16" or "int8" for the ndarray. int8 rows are quantized symmetrically
+                   and the output gets a `scale` array such that `response[i] * scale[i]` approximates the vector.
+            out: Optional; An array of shape `(len(strings_to_embed), dimensions)` and type `dtype`, such as an
+                 `np.memmap`, that the vectors are written into. Implies `return_numpy`.
 
         Returns:
-            A dictionary containing the embeddings.
+            A dictionary containing the embeddings. With a cache, the token counts only cover the strings sent.
 
         Raises:
             RuntimeError: If the server returns an error.
@@ -155,22 +355,212 @@ class ModelEngine(ServerProxy):
 
         assert self.server is not None
 
-        optionalParamDict = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if (param_dict is not None)
-            else ""
-        )
+        writer = None
+        if return_numpy or out is not None:
+            writer = EmbeddingArrayWriter(len(strings_to_embed), dtype, out)
 
-        pixel = f'Embeddings(engine="{self.engine_id}", values={strings_to_embed}{optionalParamDict});'
+        if use_cache and self.embedding_cache is not None:
+            output = self._cached_embeddings(
+                strings_to_embed,
+                param_dict,
+                lambda missing: self.embeddings(
+                    missing, insight_id, param_dict, use_cache=False
+                ),
+            )
+        else:
+            pixel = _embeddings_pixel(self.engine_id, strings_to_embed, param_dict)
 
-        output_payload_message = self.server.run_pixel(
-            payload=pixel, insight_id=insight_id, full_response=True
+            output_payload_message = self.server.run_pixel(
+                payload=pixel, insight_id=insight_id, full_response=True
+            )
+
+            if output_payload_message["pixelReturn"][0]["operationType"] == ["ERROR"]:
+                raise RuntimeError(output_payload_message["pixelReturn"][0]["output"])
+
+            output = output_payload_message["pixelReturn"][0]["output"]
+
+        return _embeddings_array(output, writer)
+
+    def embeddings_batch(
+        self,
+        strings_to_embed: List[str],
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        batch_size: Optional[int] = 64,
+        max_batch_bytes: Optional[int] = 1024 * 1024,
+        max_workers: int = 4,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        stats: Optional[EmbeddingStats] = None,
+        use_cache: bool = True,
+        return_numpy: bool = False,
+        dtype: str = "float32",
+        out=None,
+    ) -> Dict:
+        """Generates embeddings for a large list of strings by sending it in batches.
+
+        The input is split into batches of at most `batch_size` strings and `max_batch_bytes` bytes, which are
+        embedded on up to `max_workers` threads. A failed batch is retried on its own and the vectors are returned
+        in input order. With an `embedding_cache`, only the strings missing from the cache are batched and sent.
+
+        With `return_numpy` or `out`, every batch is written into the matrix as soon as it arrives, so at most
+        `max_workers` responses are held as Python floats at once.
+
+        Args:
+            strings_to_embed: A list of strings to embed.
+            insight_id: Optional; The unique identifier for the temporal workspace.
+                        If None, the session's default insight_id is used.
+            param_dict: Optional; A dictionary of additional parameters for the model.
+            batch_size: Optional; Maximum number of strings sent per request.
+            max_batch_bytes: Optional; Maximum UTF-8 size of the strings sent per request.
+            max_workers: Maximum number of batches embedded at once.
+            retries: How many times a failed batch is retried.
+            retry_backoff: Seconds before the first retry, doubled for every following retry.
+            stats: Optional; An `EmbeddingStats` updated as batches complete, including the throughput in texts/s.
+            use_cache: If False, skip the `embedding_cache` and embed every string.
+            return_numpy: If True, `response` is a contiguous ndarray, see `embeddings`.
+            dtype: Optional; "float32", "float16" or "int8" for the ndarray, see `embeddings`.
+            out: Optional; An array, such as an `np.memmap`, that the vectors are written into. Implies `return_numpy`.
+
+        Returns:
+            A dictionary shaped like the `embeddings` output, with the vectors of every batch in `response` and
+            the token counts summed.
+
+        Raises:
+            RuntimeError: If a batch still fails after all retries.
+        """
+        if isinstance(strings_to_embed, str):
+            strings_to_embed = [strings_to_embed]
+        assert isinstance(strings_to_embed, list)
+
+        writer = None
+        if return_numpy or out is not None:
+            writer = EmbeddingArrayWriter(len(strings_to_embed), dtype, out)
+
+        if use_cache and self.embedding_cache is not None:
+            output = self._cached_embeddings(
+                strings_to_embed,
+                param_dict,
+                lambda missing: self.embeddings_batch(
+                    missing,
+                    insight_id,
+                    param_dict,
+                    batch_size=batch_size,
+                    max_batch_bytes=max_batch_bytes,
+                    max_workers=max_workers,
+                    retries=retries,
+                    retry_backoff=retry_backoff,
+                    stats=stats,
+                    use_cache=False,
+                ),
+            )
+            return _embeddings_array(output, writer)
+
+        if stats is None:
+            stats = EmbeddingStats()
+        batches = split_batches(strings_to_embed, batch_size, max_batch_bytes)
+        stats.start(len(strings_to_embed), len(batches))
+
+        def embed(batch: Tuple[int, int]) -> Dict:
+            start, end = batch
+            output = self.embeddings(
+                strings_to_embed=strings_to_embed[start:end],
+                insight_id=insight_id,
+                param_dict=param_dict,
+                use_cache=False,
+            )
+            if len(output["response"]) != end - start:
+                raise RuntimeError(
+                    f"Sent {end - start} strings but received {len(output['response'])} embeddings"
+                )
+            if writer is not None:
+                # drop the float lists right away, only the matrix keeps the vectors
+                writer.write(start, output.pop("response"))
+            return output
+
+        results = map_ordered(
+            embed,
+            batches,
+            max_workers=max_workers,
+            retries=retries,
+            retry_backoff=retry_backoff,
+            on_done=lambda result: stats.record(
+                result.item[1] - result.item[0], result.attempts, result.ok
+            ),
+        )
+        stats.finish()
+        logger.info(f"Embedded {stats}")
+
+        failed = [result for result in results if not result.ok]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(batches)} embedding batches failed. First error: {failed[0].error}"
+            ) from failed[0].error
+
+        combined = {"response": []}
+        for result in results:
+            for key, value in result.value.items():
+                if key == "response":
+                    combined["response"].extend(value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    combined[key] = combined.get(key, 0) + value
+        if writer is not None:
+            combined.update(writer.result())
+        return combined
+
+    def _cached_embeddings(
+        self,
+        strings_to_embed: List[str],
+        param_dict: Optional[Dict],
+        fetch: Callable[[List[str]], Dict],
+    ) -> Dict:
+        """Serve `strings_to_embed` from the embedding cache, calling `fetch` once with the distinct missing strings"""
+        vectors, missing = self._cache_lookup(strings_to_embed, param_dict)
+        if not missing:
+            return _cached_output(vectors)
+        return self._cache_fill(
+            strings_to_embed, param_dict, vectors, missing, fetch(missing)
         )
 
-        if output_payload_message["pixelReturn"][0]["operationType"] == ["ERROR"]:
-            raise RuntimeError(output_payload_message["pixelReturn"][0]["output"])
+    def _cache_lookup(
+        self, strings_to_embed: List[str], param_dict: Optional[Dict]
+    ) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """The cached vector (or None) of every string, and the distinct strings that are missing"""
+        vectors = self.embedding_cache.get_many(
+            self.engine_id, param_dict, strings_to_embed
+        )
+        missing = list(
+            dict.fromkeys(
+                text
+                for text, vector in zip(strings_to_embed, vectors)
+                if vector is None
+            )
+        )
+        return vectors, missing
 
-        return output_payload_message["pixelReturn"][0]["output"]
+    def _cache_fill(
+        self,
+        strings_to_embed: List[str],
+        param_dict: Optional[Dict],
+        vectors: List[Optional[List[float]]],
+        missing: List[str],
+        output: Dict,
+    ) -> Dict:
+        """Store the vectors fetched for `missing` and merge them with the cached ones, in input order"""
+        if len(output["response"]) != len(missing):
+            raise RuntimeError(
+                f"Sent {len(missing)} strings but received {len(output['response'])} embeddings"
+            )
+        self.embedding_cache.put_many(
+            self.engine_id, param_dict, missing, output["response"]
+        )
+
+        fetched = dict(zip(missing, output["response"]))
+        output["response"] = [
+            vector if vector is not None else fetched[text]
+            for text, vector in zip(strings_to_embed, vectors)
+        ]
+        return output
 
     def get_model_engine_id(self) -> str:
         return self.engine_id
@@ -224,29 +614,117 @@ class ModelEngine(ServerProxy):
 
         return output_payload_message["pixelReturn"][0]["output"]
 
-    def to_langchain_embedder(self):
-        """Transform the model engine into a langchain `Embeddings`object so that it can be used with langchain code"""
+    def to_langchain_embedder(
+        self,
+        batch_size: Optional[int] = 64,
+        max_concurrency: int = 4,
+        max_batch_bytes: Optional[int] = 1024 * 1024,
+    ):
+        """Transform the model engine into a langchain `Embeddings`object so that it can be used with langchain code
+
+        `embed_documents` splits the texts into batches that are embedded concurrently, see `embeddings_batch`.
+        `aembed_documents` and `aembed_query` run natively on asyncio through an `AsyncServerClient` that shares the
+        session of this engine's `ServerClient` (requires `pip install ai-server-sdk[async]`). One client is opened
+        per event loop and closed when the loop shuts down its async generators, as `asyncio.run` does. On a loop
+        that keeps running, or one closed without that step, `await embedder.aclose()` when done with it.
 
+        Args:
+            batch_size: Maximum number of texts sent per request.
+            max_concurrency: Maximum number of batches embedded at once.
+            max_batch_bytes: Maximum UTF-8 size of the texts sent per request.
+        """
+        import weakref
         from langchain_core.embeddings import Embeddings
 
         class SemossLangchainEmbeddingsModel(Embeddings):
 
-            def __init__(self, modelEngine: ModelEngine):
+            def __init__(
+                self,
+                modelEngine: ModelEngine,
+                batch_size: Optional[int] = 64,
+                max_concurrency: int = 4,
+                max_batch_bytes: Optional[int] = 1024 * 1024,
+            ):
                 self.modelEngine = modelEngine
+                self.batch_size = batch_size
+                self.max_concurrency = max_concurrency
+                self.max_batch_bytes = max_batch_bytes
+                # event loop -> AsyncModelEngine used by the async methods on that loop
+                self._async_engines = weakref.WeakKeyDictionary()
+                self._lock = threading.Lock()
 
             def embed_documents(self, texts: List[str]) -> List[List[float]]:
                 """Embed search docs."""
-                return self.modelEngine.embeddings(strings_to_embed=texts)["response"]
+                return self.modelEngine.embeddings_batch(
+                    strings_to_embed=list(texts),
+                    batch_size=self.batch_size,
+                    max_batch_bytes=self.max_batch_bytes,
+                    max_workers=self.max_concurrency,
+                )["response"]
 
             def embed_query(self, text: str) -> List[float]:
                 return self.modelEngine.embeddings(strings_to_embed=[text])["response"][
                     0
                 ]
 
-        return SemossLangchainEmbeddingsModel(modelEngine=self)
+            async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+                """Embed search docs, with at most `max_concurrency` batches in flight on the event loop."""
+                texts = list(texts)
+                engine = await _loop_async_engine(
+                    self._async_engines, self._lock, self.modelEngine
+                )
+
+                async def fetch(strings: List[str]) -> Dict:
+                    return await engine.embeddings_batch(
+                        strings,
+                        batch_size=self.batch_size,
+                        max_batch_bytes=self.max_batch_bytes,
+                        max_concurrency=self.max_concurrency,
+                    )
+
+                if self.modelEngine.embedding_cache is None:
+                    return (await fetch(texts))["response"]
+
+                vectors, missing = self.modelEngine._cache_lookup(texts, None)
+                if not missing:
+                    return vectors
+                output = await fetch(missing)
+                return self.modelEngine._cache_fill(
+                    texts, None, vectors, missing, output
+                )["response"]
+
+            async def aembed_query(self, text: str) -> List[float]:
+                return (await self.aembed_documents([text]))[0]
+
+            async def aclose(self) -> None:
+                """Close the connection pool the async methods opened on the running event loop"""
+                await _close_loop_async_engine(self._async_engines, self._lock)
+
+        return SemossLangchainEmbeddingsModel(
+            modelEngine=self,
+            batch_size=batch_size,
+            max_concurrency=max_concurrency,
+            max_batch_bytes=max_batch_bytes,
+        )
+
+    def to_langchain_chat_model(
+        self, cache_history: bool = True, max_concurrency: Optional[int] = 8
+    ):
+        """Transform the model engine into a langchain `BaseChatModel` object so that it can be used with langchain code
+
+        `ainvoke`, `astream` and `abatch` run natively on asyncio through an `AsyncServerClient` that shares the
+        session of this engine's `ServerClient` (requires `pip install ai-server-sdk[async]`). One client is opened
+        per event loop and closed when the loop shuts down its async generators, as `asyncio.run` does. On a loop
+        that keeps running, or one closed without that step, `await chat_model.aclose()` when done with it.
 
-    def to_langchain_chat_model(self):
-        """Transform the model engine into a langchain `BaseChatModel` object so that it can be used with langchain code"""
+        Args:
+            cache_history: Keep each insight's conversation history locally after the first fetch and append new
+                           turns to it. Call `invalidate_history()` on the model after the conversation changed elsewhere.
+            max_concurrency: Default number of inputs `batch` and `abatch` run at once, unless their config sets
+                             `max_concurrency`. None leaves LangChain's default.
+        """
+        import weakref
+        from collections.abc import AsyncIterator
         from langchain_core.language_models.chat_models import BaseChatModel
         from langchain_core.outputs import (
             ChatGeneration,
@@ -265,6 +743,7 @@ class ModelEngine(ServerProxy):
         from typing import Callable
         from langchain_core.runnables import Runnable
         from langchain_core.language_models.base import LanguageModelInput
+        from pydantic import PrivateAttr
 
         class SemossLangchainChatModel(BaseChatModel):
             engine_id: str
@@ -276,62 +755,199 @@ class ModelEngine(ServerProxy):
                 Union[Dict[str, Any], type, Callable, BaseTool]  # noqa: UP006
             ]
 
-            def __init__(self, model_engine: ModelEngine):
+            # keep the conversation of each insight locally and only append new turns to it,
+            # instead of fetching the whole history from the server on every call
+            cache_history: bool = True
+            _history: Dict[str, List[BaseMessage]] = PrivateAttr(default_factory=dict)
+            _history_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+            max_concurrency: Optional[int] = 8
+            # event loop -> AsyncModelEngine used by the async methods on that loop
+            _async_engines: Any = PrivateAttr(default_factory=weakref.WeakKeyDictionary)
+
+            def __init__(
+                self,
+                model_engine: ModelEngine,
+                cache_history: bool = True,
+                max_concurrency: Optional[int] = 8,
+            ):
                 data = {
                     "engine_id": model_engine.get_model_engine_id(),
                     "model_engine": model_engine,
                     "model_type": model_engine.get_model_type(),
                     "tools": [],
+                    "cache_history": cache_history,
+                    "max_concurrency": max_concurrency,
                 }
                 super().__init__(**data)
 
+            async def _async_engine(self) -> "AsyncModelEngine":
+                """The `AsyncModelEngine` of the running event loop, sharing the session of the sync client"""
+                return await _loop_async_engine(
+                    self._async_engines, self._history_lock, self.model_engine
+                )
+
+            async def aclose(self) -> None:
+                """Close the connection pool the async methods opened on the running event loop"""
+                await _close_loop_async_engine(self._async_engines, self._history_lock)
+
+            def _history_insight(self, insight_id: Optional[str] = None) -> str:
+                if insight_id is None:
+                    insight_id = self.model_engine.insight_id
+                if insight_id is None:
+                    insight_id = self.model_engine.server.cur_insight
+                return insight_id
+
             def get_chat_history(
                 self, insight_id: Optional[str] = None
             ) -> List[BaseMessage]:
-                """Retrieve past conversation history and format it for Langchain."""
+                """Retrieve past conversation history and format it for Langchain.
+
+                With `cache_history`, the server is only asked once per insight. Later turns are appended to the
+                cached copy as they are sent and received, until `invalidate_history` is called.
+                """
+                insight_id = self._history_insight(insight_id)
+                cached = self._cached_history(insight_id)
+                if cached is not None:
+                    return cached
 
                 # Fetch chat history from ModelEngine
-                history = self.model_engine.get_conversation_history()
+                history = self.model_engine.get_conversation_history(
+                    insight_id=insight_id
+                )
+                return self._store_history(insight_id, history)
+
+            async def aget_chat_history(
+                self, insight_id: Optional[str] = None
+            ) -> List[BaseMessage]:
+                """Async version of `get_chat_history`, sharing its cache"""
+                insight_id = self._history_insight(insight_id)
+                cached = self._cached_history(insight_id)
+                if cached is not None:
+                    return cached
+
+                engine = await self._async_engine()
+                history = await engine.get_conversation_history(insight_id=insight_id)
+                return self._store_history(insight_id, history)
+
+            def _cached_history(self, insight_id: str) -> Optional[List[BaseMessage]]:
+                if not self.cache_history:
+                    return None
+                with self._history_lock:
+                    cached = self._history.get(insight_id)
+                    return list(cached) if cached is not None else None
+
+            def _store_history(
+                self, insight_id: str, history: List[Dict]
+            ) -> List[BaseMessage]:
+                """Convert GetRoomMessages rows to messages and cache them"""
                 messages = []
                 for msg in sorted(history, key=lambda x: x["DATE_CREATED"]):
                     if msg["MESSAGE_TYPE"] == "INPUT":
                         messages.append(HumanMessage(content=msg["MESSAGE_DATA"]))
                     elif msg["MESSAGE_TYPE"] == "RESPONSE":
                         messages.append(AIMessage(content=msg["MESSAGE_DATA"]))
-                return messages
+
+                if self.cache_history:
+                    with self._history_lock:
+                        self._history.setdefault(insight_id, messages)
+                return list(messages)
+
+            def invalidate_history(self, insight_id: Optional[str] = None) -> None:
+                """Drop the cached history of `insight_id`, or of every insight when None, so it is fetched again"""
+                with self._history_lock:
+                    if insight_id is None:
+                        self._history.clear()
+                    else:
+                        self._history.pop(insight_id, None)
+
+            def _record_turn(
+                self,
+                insight_id: Optional[str],
+                messages: List[BaseMessage],
+                reply: BaseMessage,
+            ) -> None:
+                """Append a completed turn to the cached history, keeping what the server would return"""
+                if not self.cache_history:
+                    return
+                insight_id = self._history_insight(insight_id)
+                with self._history_lock:
+                    cached = self._history.get(insight_id)
+                    if cached is None:
+                        return
+                    cached.extend(
+                        HumanMessage(content=m.content)
+                        for m in messages
+                        if isinstance(m, HumanMessage)
+                    )
+                    cached.append(AIMessage(content=reply.content))
 
             class Config:
                 """Configuration for this pydantic object."""
 
                 validate_by_name = True
 
-            def _generate(
+            def _build_param_dict(
                 self,
+                history: List[BaseMessage],
                 messages: List[BaseMessage],
-                stop: Optional[List[str]] = None,
-                **kwargs: Any,
-            ) -> ChatResult:
-                """Top Level call"""
-                history = self.get_chat_history()
-
+                kwargs: Dict[str, Any],
+            ) -> Dict[str, Any]:
+                """The LLM paramValues for `messages` following `history`"""
                 # Combine history with new messages (if history exists)
                 full_messages = history + messages if history else messages
 
                 # Convert to appropriate prompt format
                 full_prompt = self.convert_messages_to_full_prompt(full_messages)
 
-                param_dict = {**kwargs, **{"full_prompt": full_prompt}}
+                # Remove non-serializable LangChain runtime keys
+                filtered_kwargs = {
+                    k: v
+                    for k, v in kwargs.items()
+                    if k not in {"callbacks", "run_manager"}
+                }
+                param_dict = {**filtered_kwargs, "full_prompt": full_prompt}
                 if kwargs.get("tools") is not None:
                     # Convert tools to json string
-                    processed_tools = self.convert_tools_to_list_dict(
-                        kwargs.pop("tools")
+                    param_dict["tools"] = self.convert_tools_to_list_dict(
+                        kwargs["tools"]
                     )
-                    param_dict["tools"] = processed_tools
+                return param_dict
+
+            def _generate(
+                self,
+                messages: List[BaseMessage],
+                stop: Optional[List[str]] = None,
+                **kwargs: Any,
+            ) -> ChatResult:
+                """Top Level call"""
+                history = self.get_chat_history()
+                param_dict = self._build_param_dict(history, messages, kwargs)
 
                 # Send the combined prompt to the model
                 response = self.model_engine.ask(question="", param_dict=param_dict)
 
-                return self._create_chat_result(response=response)
+                result = self._create_chat_result(response=response)
+                self._record_turn(None, messages, result.generations[0].message)
+                return result
+
+            async def _agenerate(
+                self,
+                messages: List[BaseMessage],
+                stop: Optional[List[str]] = None,
+                run_manager=None,
+                **kwargs: Any,
+            ) -> ChatResult:
+                """Async top level call, runs on the event loop instead of an executor thread"""
+                history = await self.aget_chat_history()
+                param_dict = self._build_param_dict(history, messages, kwargs)
+
+                engine = await self._async_engine()
+                response = await engine.ask(question="", param_dict=param_dict)
+
+                result = self._create_chat_result(response=response)
+                self._record_turn(None, messages, result.generations[0].message)
+                return result
 
             def _create_chat_result(self, response: Dict[str, Any]) -> ChatResult:
                 generations = []
@@ -380,36 +996,89 @@ class ModelEngine(ServerProxy):
             ) -> Iterator[ChatGenerationChunk]:
                 """Top Level call"""
                 history = self.get_chat_history()
-
-                # Combine history with new messages (if history exists)
-                full_messages = history + messages if history else messages
-
-                # Convert to appropriate prompt format
-                full_prompt = self.convert_messages_to_full_prompt(full_messages)
-
-                # Remove non-serializable LangChain runtime keys
-                filtered_kwargs = {
-                    k: v
-                    for k, v in kwargs.items()
-                    if k not in {"callbacks", "run_manager"}
-                }
-                param_dict = {**filtered_kwargs, "full_prompt": full_prompt}
-                if kwargs.get("tools") is not None:
-                    # Convert tools to json string
-                    processed_tools = self.convert_tools_to_list_dict(
-                        kwargs.pop("tools")
-                    )
-                    param_dict["tools"] = processed_tools
+                param_dict = self._build_param_dict(history, messages, kwargs)
 
                 # Send the combined prompt to the model
                 response = self.model_engine.stream_ask(
                     question="", param_dict=param_dict
                 )
 
-                for stream_message in response:
-                    yield ChatGenerationChunk(
-                        message=AIMessageChunk(content=stream_message)
-                    )
+                received = []
+                completed = False
+                try:
+                    for stream_message in response:
+                        received.append(stream_message)
+                        yield ChatGenerationChunk(
+                            message=AIMessageChunk(content=stream_message)
+                        )
+                    completed = True
+                finally:
+                    if completed:
+                        self._record_turn(
+                            None, messages, AIMessage(content="".join(received))
+                        )
+                    else:
+                        # the server may have stored a partial answer, read it again next time
+                        self.invalidate_history(self._history_insight())
+
+            async def _astream(
+                self, messages, stop=None, run_manager=None, **kwargs
+            ) -> AsyncIterator[ChatGenerationChunk]:
+                """Async top level call, polls the partial responses on the event loop"""
+                history = await self.aget_chat_history()
+                param_dict = self._build_param_dict(history, messages, kwargs)
+
+                engine = await self._async_engine()
+                received = []
+                completed = False
+                try:
+                    async for stream_message in engine.stream_ask(
+                        question="", param_dict=param_dict
+                    ):
+                        received.append(stream_message)
+                        yield ChatGenerationChunk(
+                            message=AIMessageChunk(content=stream_message)
+                        )
+                    completed = True
+                finally:
+                    if completed:
+                        self._record_turn(
+                            None, messages, AIMessage(content="".join(received))
+                        )
+                    else:
+                        self.invalidate_history(self._history_insight())
+
+            def _with_max_concurrency(self, config):
+                """Fill in the default `max_concurrency` where the batch config does not set one"""
+                if self.max_concurrency is None:
+                    return config
+                if isinstance(config, list):
+                    return [self._with_max_concurrency(c) for c in config]
+                if config is None:
+                    return {"max_concurrency": self.max_concurrency}
+                if config.get("max_concurrency") is None:
+                    return {**config, "max_concurrency": self.max_concurrency}
+                return config
+
+            def batch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+                """Run `invoke` over `inputs` on up to `max_concurrency` threads"""
+                return super().batch(
+                    inputs,
+                    self._with_max_concurrency(config),
+                    return_exceptions=return_exceptions,
+                    **kwargs,
+                )
+
+            async def abatch(
+                self, inputs, config=None, *, return_exceptions=False, **kwargs
+            ):
+                """Run `ainvoke` over `inputs` with up to `max_concurrency` requests in flight"""
+                return await super().abatch(
+                    inputs,
+                    self._with_max_concurrency(config),
+                    return_exceptions=return_exceptions,
+                    **kwargs,
+                )
 
             def convert_messages_to_full_prompt(
                 self,
@@ -504,4 +1173,282 @@ class ModelEngine(ServerProxy):
                 """Return type of chat model."""
                 return "SEMOSS"
 
-        return SemossLangchainChatModel(model_engine=self)
+        return SemossLangchainChatModel(
+            model_engine=self,
+            cache_history=cache_history,
+            max_concurrency=max_concurrency,
+        )
+
+
+class AsyncModelEngine(AsyncServerProxy):
+    """asyncio counterpart of `ModelEngine` that sends its pixels through an `AsyncServerClient`"""
+
+    def __init__(
+        self,
+        engine_id: Optional[str],
+        insight_id: Optional[str] = None,
+        server=None,
+    ):
+        super().__init__(server=server)
+        self.engine_id = engine_id
+        self.insight_id = insight_id
+
+        logger.info("AsyncModelEngine initialized with engine id " + engine_id)
+
+    async def ask(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        use_history: Optional[bool] = True,
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """Sends a question to a text-generation model and returns the response. See `ModelEngine.ask`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _llm_pixel(self.engine_id, question, context, use_history, param_dict)
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def stream_ask(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        use_history: Optional[bool] = True,
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        stats: Optional[StreamStats] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Streams the response from a text-generation model. See `ModelEngine.stream_ask`.
+
+        Yields:
+            The model's response in chunks, to be consumed with `async for`.
+        """
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _llm_pixel(self.engine_id, question, context, use_history, param_dict)
+
+        job_id = await self.server.run_pixel_async(payload=pixel, insight_id=insight_id)
+        async for message in self.server.get_partial_responses(job_id, stats=stats):
+            if message and message.strip():
+                yield message
+
+    async def embeddings(
+        self,
+        strings_to_embed: List[str],
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        return_numpy: bool = False,
+        dtype: str = "float32",
+        out=None,
+    ) -> Dict:
+        """Generates embeddings for a list of strings. See `ModelEngine.embeddings`."""
+        if isinstance(strings_to_embed, str):
+            strings_to_embed = [strings_to_embed]
+        assert isinstance(strings_to_embed, list)
+
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        writer = None
+        if return_numpy or out is not None:
+            writer = EmbeddingArrayWriter(len(strings_to_embed), dtype, out)
+
+        pixel = _embeddings_pixel(self.engine_id, strings_to_embed, param_dict)
+        return _embeddings_array(await self.run_pixel_output(pixel, insight_id), writer)
+
+    async def embeddings_batch(
+        self,
+        strings_to_embed: List[str],
+        insight_id: Optional[str] = None,
+        param_dict: Optional[Dict] = None,
+        batch_size: Optional[int] = 64,
+        max_batch_bytes: Optional[int] = 1024 * 1024,
+        max_concurrency: int = 4,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        stats: Optional[EmbeddingStats] = None,
+    ) -> Dict:
+        """Generates embeddings for a large list of strings by sending it in batches. See `ModelEngine.embeddings_batch`.
+
+        At most `max_concurrency` batches are in flight at once. The vectors are returned in input order.
+        """
+        import asyncio
+
+        if isinstance(strings_to_embed, str):
+            strings_to_embed = [strings_to_embed]
+        assert isinstance(strings_to_embed, list)
+
+        if stats is None:
+            stats = EmbeddingStats()
+        batches = split_batches(strings_to_embed, batch_size, max_batch_bytes)
+        stats.start(len(strings_to_embed), len(batches))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def embed(start: int, end: int) -> Dict:
+            async with semaphore:
+                attempts = 0
+                while True:
+                    attempts += 1
+                    try:
+                        output = await self.embeddings(
+                            strings_to_embed[start:end],
+                            insight_id=insight_id,
+                            param_dict=param_dict,
+                        )
+                        if len(output["response"]) != end - start:
+                            raise RuntimeError(
+                                f"Sent {end - start} strings but received {len(output['response'])} embeddings"
+                            )
+                    except Exception:
+                        if attempts > retries:
+                            stats.record(end - start, attempts, False)
+                            raise
+                        await asyncio.sleep(retry_backoff * 2 ** (attempts - 1))
+                        continue
+                    stats.record(end - start, attempts, True)
+                    return output
+
+        results = await asyncio.gather(
+            *(embed(start, end) for start, end in batches), return_exceptions=True
+        )
+        stats.finish()
+        logger.info(f"Embedded {stats}")
+
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(batches)} embedding batches failed. First error: {failed[0]}"
+            ) from failed[0]
+
+        combined = {"response": []}
+        for output in results:
+            for key, value in output.items():
+                if key == "response":
+                    combined["response"].extend(value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    combined[key] = combined.get(key, 0) + value
+        return combined
+
+    def get_model_engine_id(self) -> str:
+        return self.engine_id
+
+    async def get_model_type(self) -> str:
+        """Gets the model's API type (e.g., "OPEN_AI", "VERTEX")."""
+        pixel = f'GetModelAPI(model="{self.engine_id}");'
+        return await self.run_pixel_output(pixel, self.insight_id)
+
+    async def get_conversation_history(
+        self, insight_id: Optional[str] = None
+    ) -> List[Dict]:
+        """Gets the conversation history for a given insight. See `ModelEngine.get_conversation_history`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+        if insight_id is None:
+            insight_id = await self.server.resolve_insight(None)
+
+        pixel = f'GetRoomMessages(roomId="{insight_id}");'
+        return await self.run_pixel_output(pixel, insight_id)
+
+
+async def _loop_async_engine(
+    engines, lock: threading.Lock, model_engine: ModelEngine
+) -> AsyncModelEngine:
+    """The `AsyncModelEngine` kept in `engines` for the running event loop, created on first use.
+
+    It sends its pixels through an `AsyncServerClient` sharing the session of `model_engine`'s `ServerClient`. Its
+    connection pool is closed when the loop shuts down its async generators, e.g. at the end of `asyncio.run`, or
+    earlier by `_close_loop_async_engine`.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with lock:
+        entry = engines.get(loop)
+        if entry is not None:
+            return entry[0]
+
+        from ai_server.server_resources.async_server_client import (
+            AsyncServerClient,
+        )
+
+        engine = AsyncModelEngine(
+            model_engine.engine_id,
+            insight_id=model_engine.insight_id,
+            server=AsyncServerClient.from_server_client(model_engine.server),
+        )
+        closer = _close_on_loop_shutdown(engine)
+        engines[loop] = (engine, closer)
+    # the loop only tracks async generators that were started on it
+    await closer.asend(None)
+    return engine
+
+
+async def _close_on_loop_shutdown(engine: AsyncModelEngine):
+    """Suspended until its event loop finalizes it, then closes the connection pool of `engine`"""
+    try:
+        yield
+    finally:
+        await engine.server.close()
+
+
+async def _close_loop_async_engine(engines, lock: threading.Lock) -> None:
+    """Close the connection pool of the `AsyncModelEngine` kept in `engines` for the running event loop, if any"""
+    import asyncio
+
+    with lock:
+        entry = engines.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+
+def _cached_output(vectors: List[List[float]]) -> Dict:
+    """The embeddings output of a request fully served from the cache"""
+    return {
+        "response": vectors,
+        "numberOfTokensInPrompt": 0,
+        "numberOfTokensInResponse": 0,
+    }
+
+
+def _embeddings_array(
+    output: Dict, writer: Optional[EmbeddingArrayWriter] = None
+) -> Dict:
+    """Replace the `response` vectors of an embeddings output with the ndarray built by `writer`, if there is one"""
+    if writer is None:
+        return output
+    writer.write(0, output["response"])
+    output.update(writer.result())
+    return output
+
+
+def _llm_pixel(
+    engine_id: str,
+    question: str,
+    context: Optional[str] = None,
+    use_history: Optional[bool] = True,
+    param_dict: Optional[Dict] = None,
+) -> str:
+    """Build the LLM pixel used by ask and stream_ask"""
+    optionalContext = (
+        f',context=["<encode>{context}</encode>"]' if (context is not None) else ""
+    )
+    optionalParamDict = (
+        f",paramValues=[{codec.dumps(param_dict)}]" if (param_dict is not None) else ""
+    )
+
+    use_history_param = str(use_history).lower()
+
+    return f'LLM(engine="{engine_id}", command="<encode>{question}</encode>", useHistory={use_history_param}{optionalContext}{optionalParamDict});'
+
+
+def _embeddings_pixel(
+    engine_id: str, strings_to_embed: List[str], param_dict: Optional[Dict] = None
+) -> str:
+    """Build the Embeddings pixel for a list of strings"""
+    optionalParamDict = (
+        f",paramValues=[{codec.dumps(param_dict)}]" if (param_dict is not None) else ""
+    )
+
+    return f'Embeddings(engine="{engine_id}", values={codec.dumps(strings_to_embed)}{optionalParamDict});'
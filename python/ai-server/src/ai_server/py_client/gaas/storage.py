@@ -1,6 +1,6 @@
 from typing import Optional, Dict
 import logging
-from ai_server.server_resources.server_proxy import ServerProxy
+from ai_server.server_resources.server_proxy import ServerProxy, AsyncServerProxy
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -41,9 +41,7 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        pixel = (
-            f'Storage("{self.engine_id}")|ListStoragePath(storagePath="{storagePath}");'
-        )
+        pixel = _list_pixel(self.engine_id, storagePath)
         return self.__execute_pixel(pixel, insight_id)
 
     def listDetails(self, storagePath: str, insight_id: Optional[str] = None):
@@ -60,7 +58,7 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        pixel = f'Storage("{self.engine_id}")|ListStoragePathDetails(storagePath="{storagePath}");'
+        pixel = _list_details_pixel(self.engine_id, storagePath)
         return self.__execute_pixel(pixel, insight_id)
 
     def syncLocalToStorage(
@@ -88,9 +86,9 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        spaceStr = f',space="{space}"' if space is not None else ""
-        metadataStr = f",metadata=[{metadata}]" if metadata is not None else ""
-        pixel = f'Storage("{self.engine_id}")|SyncLocalToStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr}{metadataStr});'
+        pixel = _sync_local_to_storage_pixel(
+            self.engine_id, storagePath, localPath, space, metadata
+        )
 
         return self.__execute_pixel(pixel, insight_id)
 
@@ -117,8 +115,9 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        spaceStr = f',space="{space}"' if space is not None else ""
-        pixel = f'Storage("{self.engine_id}")|SyncStorageToLocal(storagePath="{storagePath}",filePath="{localPath}"{spaceStr});'
+        pixel = _sync_storage_to_local_pixel(
+            self.engine_id, storagePath, localPath, space
+        )
 
         return self.__execute_pixel(pixel, insight_id)
 
@@ -145,8 +144,7 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        spaceStr = f',space="{space}"' if space is not None else ""
-        pixel = f'Storage("{self.engine_id}")|PullFromStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr});'
+        pixel = _copy_to_local_pixel(self.engine_id, storagePath, localPath, space)
 
         return self.__execute_pixel(pixel, insight_id)
 
@@ -175,9 +173,9 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        spaceStr = f',space="{space}"' if space is not None else ""
-        metadataStr = f",metadata=[{metadata}]" if metadata is not None else ""
-        pixel = f'Storage("{self.engine_id}")|PushToStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr}{metadataStr});'
+        pixel = _copy_to_storage_pixel(
+            self.engine_id, storagePath, localPath, space, metadata
+        )
 
         return self.__execute_pixel(pixel, insight_id)
 
@@ -202,8 +200,9 @@ class StorageEngine(ServerProxy):
         Raises:
             RuntimeError: If the server returns an error.
         """
-        leaveFolderStructureStr = "true" if leaveFolderStructure else "false"
-        pixel = f'Storage("{self.engine_id}")|DeleteFromStorage(storagePath="{storagePath}",leaveFolderStructure={leaveFolderStructureStr});'
+        pixel = _delete_from_storage_pixel(
+            self.engine_id, storagePath, leaveFolderStructure
+        )
 
         return self.__execute_pixel(pixel, insight_id)
 
@@ -264,3 +263,150 @@ class StorageEngine(ServerProxy):
                 pass
 
         return SemossLangchainStorage(storage_engine=self)
+
+
+class AsyncStorageEngine(AsyncServerProxy):
+    """asyncio counterpart of `StorageEngine` that sends its pixels through an `AsyncServerClient`"""
+
+    def __init__(self, engine_id: str, insight_id: Optional[str] = None, server=None):
+        super().__init__(server=server)
+
+        self.engine_id = engine_id
+        self.insight_id = insight_id
+
+        logger.info(f"AsyncStorageEngine initialized with engine id {engine_id}")
+
+    async def _execute_pixel(self, pixel: str, insight_id: Optional[str] = None):
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def list(self, storagePath: str, insight_id: Optional[str] = None):
+        """Lists the files and folders in a given storage path. See `StorageEngine.list`."""
+        pixel = _list_pixel(self.engine_id, storagePath)
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def listDetails(self, storagePath: str, insight_id: Optional[str] = None):
+        """Lists the files and folders in a given storage path with additional details. See `StorageEngine.listDetails`."""
+        pixel = _list_details_pixel(self.engine_id, storagePath)
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def syncLocalToStorage(
+        self,
+        storagePath: str,
+        localPath: str,
+        space: Optional[str] = None,
+        metadata: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ):
+        """Syncs files from a local path to a storage path. See `StorageEngine.syncLocalToStorage`."""
+        pixel = _sync_local_to_storage_pixel(
+            self.engine_id, storagePath, localPath, space, metadata
+        )
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def syncStorageToLocal(
+        self,
+        storagePath: str,
+        localPath: str,
+        space: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ):
+        """Syncs files from a storage path to a local path. See `StorageEngine.syncStorageToLocal`."""
+        pixel = _sync_storage_to_local_pixel(
+            self.engine_id, storagePath, localPath, space
+        )
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def copyToLocal(
+        self,
+        storagePath: str,
+        localPath: str,
+        space: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ):
+        """Copies files from a storage path to a local path. See `StorageEngine.copyToLocal`."""
+        pixel = _copy_to_local_pixel(self.engine_id, storagePath, localPath, space)
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def copyToStorage(
+        self,
+        storagePath: str,
+        localPath: str,
+        space: Optional[str] = None,
+        metadata: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ):
+        """Copies files from a local path to a storage path. See `StorageEngine.copyToStorage`."""
+        pixel = _copy_to_storage_pixel(
+            self.engine_id, storagePath, localPath, space, metadata
+        )
+        return await self._execute_pixel(pixel, insight_id)
+
+    async def deleteFromStorage(
+        self,
+        storagePath: str,
+        leaveFolderStructure: Optional[bool] = False,
+        insight_id: Optional[str] = None,
+    ):
+        """Deletes files from a storage path. See `StorageEngine.deleteFromStorage`."""
+        pixel = _delete_from_storage_pixel(
+            self.engine_id, storagePath, leaveFolderStructure
+        )
+        return await self._execute_pixel(pixel, insight_id)
+
+
+def _list_pixel(engine_id: str, storagePath: str) -> str:
+    return f'Storage("{engine_id}")|ListStoragePath(storagePath="{storagePath}");'
+
+
+def _list_details_pixel(engine_id: str, storagePath: str) -> str:
+    return (
+        f'Storage("{engine_id}")|ListStoragePathDetails(storagePath="{storagePath}");'
+    )
+
+
+def _sync_local_to_storage_pixel(
+    engine_id: str,
+    storagePath: str,
+    localPath: str,
+    space: Optional[str],
+    metadata: Optional[Dict],
+) -> str:
+    spaceStr = f',space="{space}"' if space is not None else ""
+    metadataStr = f",metadata=[{metadata}]" if metadata is not None else ""
+    return f'Storage("{engine_id}")|SyncLocalToStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr}{metadataStr});'
+
+
+def _sync_storage_to_local_pixel(
+    engine_id: str, storagePath: str, localPath: str, space: Optional[str]
+) -> str:
+    spaceStr = f',space="{space}"' if space is not None else ""
+    return f'Storage("{engine_id}")|SyncStorageToLocal(storagePath="{storagePath}",filePath="{localPath}"{spaceStr});'
+
+
+def _copy_to_local_pixel(
+    engine_id: str, storagePath: str, localPath: str, space: Optional[str]
+) -> str:
+    spaceStr = f',space="{space}"' if space is not None else ""
+    return f'Storage("{engine_id}")|PullFromStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr});'
+
+
+def _copy_to_storage_pixel(
+    engine_id: str,
+    storagePath: str,
+    localPath: str,
+    space: Optional[str],
+    metadata: Optional[Dict],
+) -> str:
+    spaceStr = f',space="{space}"' if space is not None else ""
+    metadataStr = f",metadata=[{metadata}]" if metadata is not None else ""
+    return f'Storage("{engine_id}")|PushToStorage(storagePath="{storagePath}",filePath="{localPath}"{spaceStr}{metadataStr});'
+
+
+def _delete_from_storage_pixel(
+    engine_id: str, storagePath: str, leaveFolderStructure: Optional[bool]
+) -> str:
+    leaveFolderStructureStr = "true" if leaveFolderStructure else "false"
+    return f'Storage("{engine_id}")|DeleteFromStorage(storagePath="{storagePath}",leaveFolderStructure={leaveFolderStructureStr});'
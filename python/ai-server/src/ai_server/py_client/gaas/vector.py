@@ -1,7 +1,7 @@
-from typing import List, Dict, Optional, Union
-import json
+from typing import Iterator, List, Dict, Optional, Union
 import logging
-from ai_server.server_resources.server_proxy import ServerProxy
+from ai_server.server_resources import codec
+from ai_server.server_resources.server_proxy import ServerProxy, AsyncServerProxy
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -27,6 +27,7 @@ class VectorEngine(ServerProxy):
         file_paths: List[str],
         param_dict: Optional[Dict] = {},
         insight_id: Optional[str] = None,
+        max_workers: int = 1,
     ) -> Union[bool, List[Dict]]:
         """Adds documents to the vector database.
 
@@ -35,6 +36,7 @@ class VectorEngine(ServerProxy):
             param_dict: Optional; A dictionary of additional parameters for processing the documents.
             insight_id: Optional; The unique identifier for the temporal workspace.
                         If None, the session's default insight_id is used.
+            max_workers: Optional; Number of files uploaded at once before they are indexed.
 
         Returns:
             Union[bool, List[Dict]]:  List of dicts with metadata around the state of uploading each document provided.
@@ -53,15 +55,10 @@ class VectorEngine(ServerProxy):
         insight_files = self.server.upload_files(
             files=file_paths,
             insight_id=insight_id,
+            max_workers=max_workers,
         )
 
-        optionalParams = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if param_dict is not None and len(param_dict) > 0
-            else ""
-        )
-
-        pixel = f'CreateEmbeddingsFromDocuments(engine="{self.engine_id}",filePaths={json.dumps(insight_files, ensure_ascii=False)}{optionalParams});'
+        pixel = _add_document_pixel(self.engine_id, insight_files, param_dict)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -100,18 +97,10 @@ class VectorEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        optionalSpace = (
-            f",space=['{space}']" if (space is not None and space != "") else ""
-        )
-
-        optionalParams = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if param_dict is not None and len(param_dict) > 0
-            else ""
+        pixel = _add_vector_csv_file_pixel(
+            self.engine_id, file_paths, space, param_dict
         )
 
-        pixel = f'CreateEmbeddingsFromVectorCSVFile(engine="{self.engine_id}",filePaths={file_paths}{optionalSpace}{optionalParams});'
-
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
         )
@@ -148,17 +137,7 @@ class VectorEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        optionalSpace = (
-            f",space=['{space}']" if (space is not None and space != "") else ""
-        )
-
-        optionalParams = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if param_dict is not None and len(param_dict) > 0
-            else ""
-        )
-
-        pixel = f'RemoveDocumentFromVectorDatabase(engine="{self.engine_id}",fileNames={file_names}{optionalSpace}{optionalParams});'
+        pixel = _remove_document_pixel(self.engine_id, file_names, space, param_dict)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -207,76 +186,16 @@ class VectorEngine(ServerProxy):
             else:
                 insight_id = self.server.cur_insight
 
-        pixel = f'VectorDatabaseQuery(engine = "{self.engine_id}", command = ["<e>{search_statement}</e>"], limit = {limit}'
-
-        # 1. Check if filters_str parameter is provided (if so use this)
-        # 2. If not, check if filters parameter is provided and check if it is a string (if so use this)
-        # 3. If not, check if filters parameter is provided and check if it is a dictionary (if so build the string)
-        optional_filters = ""
-        if filters_str is not None:
-            optional_filters = f",filters=[{filters_str}]"
-        if filters is not None and optional_filters == "":
-            if isinstance(filters, str):
-                optional_filters = f",filters=[{filters}]"
-            elif isinstance(filters, dict):
-                filter_conditions = []
-                for key, value in filters.items():
-                    formatted_key = key.capitalize()
-                    if isinstance(value, str):
-                        formatted_values = f'"{value}"'
-                    else:
-                        formatted_values = ", ".join([f'"{v}"' for v in value])
-                    filter_conditions.append(f"{formatted_key} == [{formatted_values}]")
-
-                optional_filters = (
-                    f",filters = [ Filter({', '.join(filter_conditions)})]"
-                    if filter_conditions
-                    else ""
-                )
-
-            else:
-                raise ValueError(
-                    "Invalid filters type. Filter must be string or dictionary"
-                )
-
-        # 1. Check if metafilters_str parameter is provided (if so use this)
-        # 2. If not, check if metafilters parameter is provided and check if it is a string (if so use this)
-        # 3. If not, check if metafilters parameter is provided and check if it is a dictionary (if so build the string)
-        optional_meta_filters = ""
-        if metafilters_str is not None:
-            optional_meta_filters = f",metaFilters=[{metafilters_str}]"
-        if metafilters is not None and optional_meta_filters == "":
-            if isinstance(metafilters, str):
-                optional_meta_filters = f",metaFilters=[{metafilters}]"
-            elif isinstance(metafilters, dict):
-                metafilter_conditions = []
-                for key, value in metafilters.items():
-                    formatted_key = key.capitalize()
-                    if isinstance(value, str):
-                        formatted_values = f'"{value}"'
-                    else:
-                        formatted_values = ", ".join([f'"{v}"' for v in value])
-                    metafilter_conditions.append(
-                        f"{formatted_key} == [{formatted_values}]"
-                    )
-
-                optional_meta_filters = (
-                    f",metaFilters = [ Filter({', '.join(metafilter_conditions)})]"
-                    if metafilter_conditions
-                    else ""
-                )
-
-            else:
-                raise ValueError(
-                    "Invalid metafilters type. Metafilters must be string or dictionary"
-                )
-
-        pixel += optional_filters + optional_meta_filters
-
-        if len(param_dict) != 0:
-            pixel += ", paramValues = " + json.dumps(param_dict, ensure_ascii=False)
-
-        pixel += ");"
+        pixel = _nearest_neighbor_pixel(
+            self.engine_id,
+            search_statement,
+            limit,
+            filters,
+            filters_str,
+            metafilters,
+            metafilters_str,
+            param_dict,
+        )
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -308,15 +227,7 @@ class VectorEngine(ServerProxy):
         if insight_id is None:
             insight_id = self.insight_id
 
-        optionalParams = (
-            f",paramValues=[{json.dumps(param_dict, ensure_ascii=False)}]"
-            if param_dict is not None and len(param_dict) > 0
-            else ""
-        )
-
-        pixel = (
-            f'ListDocumentsInVectorDatabase(engine="{self.engine_id}"{optionalParams});'
-        )
+        pixel = _list_documents_pixel(self.engine_id, param_dict)
 
         output_payload_message = self.server.run_pixel(
             payload=pixel, insight_id=insight_id, full_response=True
@@ -327,6 +238,32 @@ class VectorEngine(ServerProxy):
 
         return output_payload_message["pixelReturn"][0]["output"]
 
+    def iterDocuments(
+        self,
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """Lists the documents in the vector database one at a time while the response is being read.
+
+        Unlike `listDocuments` the full listing is never held in memory. Requires ijson (`pip install ai-server-sdk[streaming]`).
+
+        Args:
+            param_dict: Optional; A dictionary of additional parameters for listing the documents.
+            insight_id: Optional; The unique identifier for the temporal workspace.
+                        If None, the session's default insight_id is used.
+
+        Returns:
+            An iterator over dictionaries representing the documents.
+
+        Raises:
+            PixelError: If the server returns an error.
+        """
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _list_documents_pixel(self.engine_id, param_dict)
+        return self.server.iter_pixel_output(payload=pixel, insight_id=insight_id)
+
     def to_langchain_vector_store(self):
         """Transform the vector engine into a langchain BaseRetriever object so that it can be used with langchain code."""
         from langchain_core.callbacks import CallbackManagerForRetrieverRun
@@ -387,3 +324,237 @@ class VectorEngine(ServerProxy):
                 return self.similarity_search(query, k)
 
         return SemossLangchainVector(vector_engine=self)
+
+
+class AsyncVectorEngine(AsyncServerProxy):
+    """asyncio counterpart of `VectorEngine` that sends its pixels through an `AsyncServerClient`"""
+
+    engine_type = "VECTOR"
+
+    def __init__(
+        self,
+        engine_id: str,
+        insight_id: Optional[str] = None,
+        server=None,
+    ):
+        super().__init__(server=server)
+        self.engine_id = engine_id
+        self.insight_id = insight_id
+
+        logger.info("AsyncVectorEngine initialized with engine id " + engine_id)
+
+    async def addDocument(
+        self,
+        file_paths: List[str],
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+        max_concurrency: int = 1,
+    ) -> Union[bool, List[Dict]]:
+        """Uploads local files and adds them to the vector database. See `VectorEngine.addDocument`."""
+        insight_id = await self.server.resolve_insight(
+            insight_id if insight_id is not None else self.insight_id
+        )
+
+        insight_files = await self.server.upload_files(
+            files=file_paths,
+            insight_id=insight_id,
+            max_concurrency=max_concurrency,
+        )
+
+        pixel = _add_document_pixel(self.engine_id, insight_files, param_dict)
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def addVectorCSVFile(
+        self,
+        file_paths: List[str],
+        space: Optional[str] = None,
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ) -> Union[bool, List[Dict]]:
+        """Adds documents from a vector CSV file to the vector database. See `VectorEngine.addVectorCSVFile`."""
+        assert file_paths is not None
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _add_vector_csv_file_pixel(
+            self.engine_id, file_paths, space, param_dict
+        )
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def removeDocument(
+        self,
+        file_names: List[str],
+        space: Optional[str] = None,
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ) -> bool:
+        """Removes documents from the vector database. See `VectorEngine.removeDocument`."""
+        assert file_names is not None
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _remove_document_pixel(self.engine_id, file_names, space, param_dict)
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def nearestNeighbor(
+        self,
+        search_statement: str,
+        limit: Optional[int] = 5,
+        filters: Optional[Dict] | Optional[str] = None,
+        filters_str: Optional[str] = None,
+        metafilters: Optional[Dict] | Optional[str] = None,
+        metafilters_str: Optional[str] = None,
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Performs a nearest neighbor search in the vector database. See `VectorEngine.nearestNeighbor`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _nearest_neighbor_pixel(
+            self.engine_id,
+            search_statement,
+            limit,
+            filters,
+            filters_str,
+            metafilters,
+            metafilters_str,
+            param_dict,
+        )
+        return await self.run_pixel_output(pixel, insight_id)
+
+    async def listDocuments(
+        self,
+        param_dict: Optional[Dict] = {},
+        insight_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Lists the documents in the vector database. See `VectorEngine.listDocuments`."""
+        if insight_id is None:
+            insight_id = self.insight_id
+
+        pixel = _list_documents_pixel(self.engine_id, param_dict)
+        return await self.run_pixel_output(pixel, insight_id)
+
+
+def _param_values(param_dict: Optional[Dict]) -> str:
+    """Build the optional paramValues argument shared by the vector pixels"""
+    return (
+        f",paramValues=[{codec.dumps(param_dict)}]"
+        if param_dict is not None and len(param_dict) > 0
+        else ""
+    )
+
+
+def _space(space: Optional[str]) -> str:
+    return f",space=['{space}']" if (space is not None and space != "") else ""
+
+
+def _add_document_pixel(
+    engine_id: str, insight_files: List[str], param_dict: Optional[Dict]
+) -> str:
+    return f'CreateEmbeddingsFromDocuments(engine="{engine_id}",filePaths={codec.dumps(insight_files)}{_param_values(param_dict)});'
+
+
+def _add_vector_csv_file_pixel(
+    engine_id: str,
+    file_paths: List[str],
+    space: Optional[str],
+    param_dict: Optional[Dict],
+) -> str:
+    return f'CreateEmbeddingsFromVectorCSVFile(engine="{engine_id}",filePaths={file_paths}{_space(space)}{_param_values(param_dict)});'
+
+
+def _remove_document_pixel(
+    engine_id: str,
+    file_names: List[str],
+    space: Optional[str],
+    param_dict: Optional[Dict],
+) -> str:
+    return f'RemoveDocumentFromVectorDatabase(engine="{engine_id}",fileNames={file_names}{_space(space)}{_param_values(param_dict)});'
+
+
+def _list_documents_pixel(engine_id: str, param_dict: Optional[Dict]) -> str:
+    return f'ListDocumentsInVectorDatabase(engine="{engine_id}"{_param_values(param_dict)});'
+
+
+def _nearest_neighbor_pixel(
+    engine_id: str,
+    search_statement: str,
+    limit: Optional[int] = 5,
+    filters: Optional[Dict] | Optional[str] = None,
+    filters_str: Optional[str] = None,
+    metafilters: Optional[Dict] | Optional[str] = None,
+    metafilters_str: Optional[str] = None,
+    param_dict: Optional[Dict] = {},
+) -> str:
+    """Build the VectorDatabaseQuery pixel, turning filter dicts into Filter(...) expressions"""
+    pixel = f'VectorDatabaseQuery(engine = "{engine_id}", command = ["<e>{search_statement}</e>"], limit = {limit}'
+
+    # 1. Check if filters_str parameter is provided (if so use this)
+    # 2. If not, check if filters parameter is provided and check if it is a string (if so use this)
+    # 3. If not, check if filters parameter is provided and check if it is a dictionary (if so build the string)
+    optional_filters = ""
+    if filters_str is not None:
+        optional_filters = f",filters=[{filters_str}]"
+    if filters is not None and optional_filters == "":
+        if isinstance(filters, str):
+            optional_filters = f",filters=[{filters}]"
+        elif isinstance(filters, dict):
+            filter_conditions = []
+            for key, value in filters.items():
+                formatted_key = key.capitalize()
+                if isinstance(value, str):
+                    formatted_values = f'"{value}"'
+                else:
+                    formatted_values = ", ".join([f'"{v}"' for v in value])
+                filter_conditions.append(f"{formatted_key} == [{formatted_values}]")
+
+            optional_filters = (
+                f",filters = [ Filter({', '.join(filter_conditions)})]"
+                if filter_conditions
+                else ""
+            )
+
+        else:
+            raise ValueError(
+                "Invalid filters type. Filter must be string or dictionary"
+            )
+
+    # 1. Check if metafilters_str parameter is provided (if so use this)
+    # 2. If not, check if metafilters parameter is provided and check if it is a string (if so use this)
+    # 3. If not, check if metafilters parameter is provided and check if it is a dictionary (if so build the string)
+    optional_meta_filters = ""
+    if metafilters_str is not None:
+        optional_meta_filters = f",metaFilters=[{metafilters_str}]"
+    if metafilters is not None and optional_meta_filters == "":
+        if isinstance(metafilters, str):
+            optional_meta_filters = f",metaFilters=[{metafilters}]"
+        elif isinstance(metafilters, dict):
+            metafilter_conditions = []
+            for key, value in metafilters.items():
+                formatted_key = key.capitalize()
+                if isinstance(value, str):
+                    formatted_values = f'"{value}"'
+                else:
+                    formatted_values = ", ".join([f'"{v}"' for v in value])
+                metafilter_conditions.append(f"{formatted_key} == [{formatted_values}]")
+
+            optional_meta_filters = (
+                f",metaFilters = [ Filter({', '.join(metafilter_conditions)})]"
+                if metafilter_conditions
+                else ""
+            )
+
+        else:
+            raise ValueError(
+                "Invalid metafilters type. Metafilters must be string or dictionary"
+            )
+
+    pixel += optional_filters + optional_meta_filters
+
+    if len(param_dict) != 0:
+        pixel += ", paramValues = " + codec.dumps(param_dict)
+
+    pixel += ");"
+
+    return pixel
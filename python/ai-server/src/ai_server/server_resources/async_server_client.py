@@ -0,0 +1,884 @@
+from typing import Any, Callable, List, Dict, Union, Optional, Set, AsyncGenerator
+import asyncio
+import base64
+import logging
+import os
+import time
+from pathlib import Path
+
+from ai_server.server_resources.codec import JSONCodec, get_codec
+from ai_server.server_resources.transfers import (
+    MultipartFileEncoder,
+    TransferError,
+    TransferProgress,
+    UploadResult,
+)
+from ai_server.server_resources.server_client import (
+    AuthenticationError,
+    PollSchedule,
+    StreamStats,
+    STREAM_FAILED_STATUSES,
+    STREAM_TERMINAL_STATUSES,
+    chunk_payloads,
+    get_download_asset_pixel,
+    get_filename_from_url,
+    get_unique_filename,
+    get_upload_url,
+    is_login_page,
+    is_login_required,
+    join_pixel_batch,
+    split_pixel_batch,
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# bytes read from or written to a local file per worker thread call by uploads and downloads
+FILE_BLOCK_SIZE = 1024 * 1024
+
+
+class AsyncServerClient:
+    """asyncio counterpart of `ServerClient` to make non-blocking calls to an ai server instance
+
+    All requests share one httpx connection pool, so many coroutines can run pixels concurrently without a thread each.
+    Requires the optional `httpx` dependency (`pip install ai-server-sdk[async]`).
+
+    Example:
+
+    ```python
+    >>> import ai_server
+
+    >>> async with ai_server.AsyncServerClient(access_key=loginKeys['accessKey'], secret_key=loginKeys['secretKey'], base='<Your deployed server Monolith URL>') as server_connection:
+    ...     await server_connection.run_pixel('1+1')
+    ```
+    """
+
+    # Class attribute to hold a singleton instance
+    da_server = None
+
+    def __init__(
+        self,
+        base: str,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        bearer_token: Optional[str] = None,
+        bearer_token_provider: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: Optional[float] = None,
+        session_ttl: float = 300.0,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+        poll_backoff: float = 1.5,
+        stream_timeout: Optional[float] = None,
+        json_codec: Union[str, JSONCodec] = "auto",
+    ) -> None:
+        """
+        Creating the client does not contact the server. Login, CSRF setup and the first insight happen on `connect()`, on entering `async with`, or lazily on the first call.
+
+        Args:
+            base (`str`):
+                main url to access the server api
+            access_key (`Optional[str]`):
+                A user's access key used for authentication and authorization
+            secret_key (`Optional[str]`):
+                A user's secret key that complements the access key
+            bearer_token (`Optional[str]`):
+                A token provided from a successful login of a user to an existing IdP
+            bearer_token_provider (`Optional[str]`):
+                The existing IdP login type as recognized by the AuthProvider enum list
+            max_connections (`int`):
+                Maximum number of concurrent connections to the server
+            max_keepalive_connections (`int`):
+                Maximum number of idle keep-alive connections kept in the pool
+            keepalive_expiry (`float`):
+                Seconds an idle keep-alive connection is kept before it is closed
+            timeout (`Optional[float]`):
+                Per request timeout in seconds. None waits indefinitely, like `ServerClient`
+            session_ttl (`float`):
+                Seconds the session cookie is trusted before it is re-validated against /config
+            poll_interval (`float`):
+                Seconds between /engine/partial polls while a stream is producing chunks
+            max_poll_interval (`float`):
+                Upper bound the poll interval backs off to while a stream produces nothing
+            poll_backoff (`float`):
+                Factor the poll interval is multiplied by after every poll that returned no new chunk
+            stream_timeout (`Optional[float]`):
+                Seconds a stream may run before `get_partial_responses` raises TimeoutError. None waits indefinitely
+            json_codec (`Union[str, JSONCodec]`):
+                JSON library used for requests and responses, see `ServerClient`
+        """
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "AsyncServerClient requires httpx. Install it with `pip install ai-server-sdk[async]`"
+            ) from e
+
+        self.main_url: str = base
+
+        if self.main_url is None or self.main_url == "":
+            raise Exception("Must provide a valid URL for the running instance")
+
+        if self.main_url.endswith(r"\/"):
+            self.main_url = self.main_url[:-1]
+
+        self.codec: JSONCodec = get_codec(json_codec)
+
+        self.access_key: str = access_key
+        self.secret_key: str = secret_key
+        self.bearer_token: str = bearer_token
+        self.bearer_token_provider: str = bearer_token_provider
+
+        if self.access_key and self.secret_key:
+            combined = self.access_key + ":" + self.secret_key
+            combined_enc = base64.b64encode(combined.encode("utf-8"))
+            self.auth_headers: Dict = {
+                "Authorization": f"Basic {combined_enc.decode('utf-8')}"
+            }
+        elif self.bearer_token and self.bearer_token_provider:
+            self.auth_headers: Dict = {
+                "Authorization": f"Bearer {self.bearer_token}",
+                "Bearer-Provider": self.bearer_token_provider,
+            }
+        else:
+            raise Exception(
+                "Must provide either access_key and secret_key for user access login or provide bearer_token and bearer_token_provider for login using your IdP access key"
+            )
+
+        # one pooled client for every request; it also keeps the session cookie in its jar
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout,
+        )
+
+        # This will hold CSRF and any other required headers (merge into all calls)
+        self.required_headers: Dict = {}
+
+        self.session_ttl: float = session_ttl
+        self.session_validated_at: Optional[float] = None
+        self.session_generation: int = 0
+        # created lazily so the client can be constructed outside of a running event loop
+        self._auth_lock: Optional[asyncio.Lock] = None
+
+        self.poll_interval: float = poll_interval
+        self.max_poll_interval: float = max_poll_interval
+        self.poll_backoff: float = poll_backoff
+        self.stream_timeout: Optional[float] = stream_timeout
+
+        self.open_insights: Set = set()
+        self.cur_insight: Optional[str] = None
+
+        # set the instance of this class as the class attribute da_server
+        AsyncServerClient.da_server = self
+
+    @classmethod
+    def from_server_client(cls, server_client, **kwargs) -> "AsyncServerClient":
+        """
+        Create an async client that shares the session of a logged in `ServerClient`.
+
+        The session cookie, CSRF token and current insight are copied over, so no new login happens and pixels run in
+        the same insights as the sync client. Close it with `close()`, since `logout()` would also end the session of
+        `server_client`. Unlike the constructor it does not replace `AsyncServerClient.da_server`.
+
+        Args:
+            server_client (`ServerClient`): The client whose session is reused
+            **kwargs: Other `AsyncServerClient` arguments, e.g. `max_connections`
+
+        Returns:
+            `AsyncServerClient`: A client ready to use without `connect()`
+        """
+        settings = {
+            "poll_interval": server_client.poll_interval,
+            "max_poll_interval": server_client.max_poll_interval,
+            "poll_backoff": server_client.poll_backoff,
+            "stream_timeout": server_client.stream_timeout,
+            "session_ttl": server_client.session_ttl,
+            "json_codec": server_client.codec,
+        }
+        settings.update(kwargs)
+        # a helper client, e.g. the one of a langchain adapter, must not become the default of every AsyncServerProxy
+        default_server = AsyncServerClient.da_server
+        try:
+            client = cls(
+                base=server_client.main_url,
+                access_key=server_client.access_key,
+                secret_key=server_client.secret_key,
+                bearer_token=server_client.bearer_token,
+                bearer_token_provider=server_client.bearer_token_provider,
+                **settings,
+            )
+        finally:
+            AsyncServerClient.da_server = default_server
+
+        for jar in (server_client.session.cookies, server_client.cookies):
+            for cookie in jar or []:
+                client.client.cookies.set(
+                    cookie.name, cookie.value, domain=cookie.domain, path=cookie.path
+                )
+        client.required_headers.update(server_client.required_headers)
+        client.cur_insight = server_client.cur_insight
+        client.open_insights = set(server_client.open_insights)
+        if server_client.session_validated_at is not None:
+            client.session_validated_at = time.monotonic()
+        return client
+
+    async def __aenter__(self) -> "AsyncServerClient":
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.logout()
+
+    def _get_auth_lock(self) -> asyncio.Lock:
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
+
+    async def connect(self) -> "AsyncServerClient":
+        """Log in, set up CSRF and create the current insight."""
+        await self.ensure_session()
+        if self.cur_insight is None:
+            await self.make_new_insight()
+        return self
+
+    async def login(self) -> None:
+        """
+        Register / validate the user's credentials.
+
+        The session cookie returned by the server is kept in the client's cookie jar.
+        """
+        is_logged_in = await self.is_session_login(self.auth_headers)
+        if not is_logged_in:
+            raise AuthenticationError("User could not successfully login")
+
+        self.session_validated_at = time.monotonic()
+        self.session_generation += 1
+        await self.set_csrf_if_enabled()
+
+    async def is_session_login(self, headers: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Check if user is logged in.
+
+        Args:
+            headers: Optional dictionary of HTTP headers to include in the request
+
+        Returns:
+            `bool`: True if the server reports login details for the session
+        """
+        try:
+            response = await self.client.get(self.main_url + "/config", headers=headers)
+            response.raise_for_status()
+            return bool(self.codec.loads(response.content).get("loginDetails"))
+        except Exception as e:
+            logger.error(f"Could not determine if user is logged in. Error: {str(e)}")
+            return False
+
+    async def set_csrf_if_enabled(self) -> None:
+        """Fetch a CSRF token and add it to the required headers if the server has CSRF enabled."""
+        try:
+            resp = await self.client.get(self.main_url + "/config")
+            resp.raise_for_status()
+            if self.codec.loads(resp.content).get("csrf", False):
+                logger.info("CSRF enabled; fetching CSRF token.")
+                csrf_resp = await self.client.get(
+                    self.main_url + "/config/fetchCsrf",
+                    headers={
+                        "x-csrf-token": "fetch",
+                        "Accept": "application/json, text/plain, */*",
+                    },
+                )
+                csrf_resp.raise_for_status()
+                csrf_token = csrf_resp.headers.get("X-Csrf-Token")
+                if csrf_token:
+                    self.required_headers["X-Csrf-Token"] = csrf_token
+                    logger.info("CSRF token set.")
+                else:
+                    logger.warning("CSRF enabled but token not found in headers.")
+            else:
+                logger.info("CSRF not enabled; continuing without CSRF header.")
+        except Exception as e:
+            logger.error(f"Could not fetch or parse config for csrf. Error: {str(e)}")
+
+    async def ensure_session(self) -> None:
+        """Log in if the client has not yet, or if the session cookie is older than `session_ttl` and no longer valid."""
+        if (
+            self.session_validated_at is not None
+            and time.monotonic() - self.session_validated_at < self.session_ttl
+        ):
+            return
+
+        if self.session_validated_at is not None and await self.is_session_login():
+            self.session_validated_at = time.monotonic()
+            return
+
+        await self.reauthenticate(self.session_generation)
+
+    async def reauthenticate(self, generation: Optional[int] = None) -> None:
+        """
+        Log in again with the stored credentials, keeping the client and its insights.
+
+        Args:
+            generation (`Optional[int]`):
+                The `session_generation` the caller saw when its request failed. If another task has already logged in again since then, nothing is done.
+        """
+        async with self._get_auth_lock():
+            if generation is not None and generation != self.session_generation:
+                return
+
+            self.client.cookies.clear()
+            self.required_headers.pop("X-Csrf-Token", None)
+            await self.login()
+
+    async def send_pixel_request(self, endpoint: str, data: Dict) -> Dict:
+        """
+        POST a form payload to a pixel endpoint and return the parsed JSON response.
+
+        If the server answers with an auth failure, the client re-authenticates once and retries the request.
+
+        Args:
+            endpoint (`str`): The endpoint under the main url, e.g. /engine/runPixel
+            data (`Dict`): The form data to send
+
+        Returns:
+            `Dict`: The JSON response
+        """
+        await self.ensure_session()
+
+        for attempt in range(2):
+            generation = self.session_generation
+            response = await self.client.post(
+                self.main_url + endpoint,
+                data=data,
+                headers=self.required_headers,
+                follow_redirects=True,
+            )
+
+            try:
+                response_dict = self.codec.loads(response.content)
+            except ValueError:
+                response_dict = None
+
+            if response_dict is None:
+                is_auth_failure = is_login_page(response)
+            else:
+                is_auth_failure = is_login_required(response_dict)
+            is_auth_failure = (
+                is_auth_failure
+                or response.status_code == 401
+                or (response.history and "login" in str(response.url).lower())
+            )
+
+            if not is_auth_failure:
+                break
+
+            if attempt == 0:
+                await self.reauthenticate(generation)
+            else:
+                raise AuthenticationError(
+                    "Session expired and could not be re-authenticated"
+                )
+
+        if response_dict is None:
+            # raise HTTP error if one occurs
+            response.raise_for_status()
+            raise ValueError(
+                f"Server returned a non JSON response from {endpoint}: {response.text[:200]}"
+            )
+
+        # a successful round trip proves the cookie is still good
+        self.session_validated_at = time.monotonic()
+        return response_dict
+
+    async def make_new_insight(self, set_current: bool = True) -> str:
+        """
+        Create a new insight (temporal space) to operate within the ai-server at set it as the current insight.
+
+        Args:
+            set_current (`bool`): If False, the new insight is only returned and the current insight is left unchanged
+        """
+        json_output = await self.send_pixel_request(
+            "/engine/runPixel", {"expression": "META | true", "insightId": "new"}
+        )
+        insight_id = json_output["insightID"]
+        self.open_insights.add(insight_id)
+        if set_current:
+            self.cur_insight = insight_id
+
+        return insight_id
+
+    async def resolve_insight(self, insight_id: Optional[str]) -> str:
+        """Return `insight_id`, falling back to the current insight (created on first use)."""
+        if insight_id is not None:
+            return insight_id
+        if self.cur_insight is None:
+            await self.make_new_insight()
+        return self.cur_insight
+
+    async def run_pixel(
+        self,
+        payload: str,
+        insight_id: Optional[str] = None,
+        full_response: Optional[bool] = False,
+    ):
+        """
+        Send a pixel payload to the platforms /api/engine/runPixel endpoint.
+
+        Args:
+            payload (`str`): DSL (Pixel) instruction on what specific action should be performed
+            insight_id (`str`): Unique identifier for the temporal worksapce where actions are being isolated. Same options as `ServerClient.run_pixel`
+            full_response (`bool`): Indicate whether to return the full json response or only the actions output
+
+        Returns:
+            `Union[Any, Dict]`: The output object from the runPixel response or the entire runPixel response.
+        """
+        insight_id = await self.resolve_insight(insight_id)
+
+        response_dict = await self.send_pixel_request(
+            "/engine/runPixel", {"expression": payload, "insightId": insight_id}
+        )
+        if "ERROR" in response_dict["pixelReturn"][0]["operationType"]:
+            raise Exception(response_dict["pixelReturn"][0]["output"])
+
+        if full_response:
+            return response_dict
+        else:
+            return self.get_pixel_output(response_dict)
+
+    async def run_pixel_batch(
+        self,
+        payloads: List[str],
+        insight_id: Optional[str] = None,
+        full_response: Optional[bool] = False,
+        batch_size: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Send several pixel payloads to /api/engine/runPixel in a single request, see `ServerClient.run_pixel_batch`.
+
+        Args:
+            payloads (`List[str]`): DSL (Pixel) instructions, each must produce exactly one pixelReturn entry
+            insight_id (`str`): Unique identifier for the temporal worksapce where actions are being isolated
+            full_response (`bool`): Return the raw pixelReturn entry for each payload instead of its output
+            batch_size (`int`): Maximum number of payloads sent per request
+
+        Returns:
+            `List[Any]`: One output (or pixelReturn entry) per payload, or a `PixelError` for the payloads that failed
+        """
+        insight_id = await self.resolve_insight(insight_id)
+
+        results = []
+        for chunk in chunk_payloads(payloads, batch_size):
+            response_dict = await self.send_pixel_request(
+                "/engine/runPixel",
+                {"expression": join_pixel_batch(chunk), "insightId": insight_id},
+            )
+            results.extend(split_pixel_batch(response_dict, chunk, full_response))
+
+        return results
+
+    async def run_pixel_async(
+        self, payload: str, insight_id: Optional[str] = None
+    ) -> Union[Any, dict]:
+        """
+        Send a pixel payload to the platforms /api/engine/runPixelAsync endpoint.
+
+        Args:
+            payload (`str`): DSL (Pixel) instruction on what specific action should be performed
+            insight_id (`str`): Unique identifier for the temporal worksapce where actions are being isolated
+
+        Returns:
+            `Union[Any, Dict]`: The jobId of the job started on the server
+        """
+        insight_id = await self.resolve_insight(insight_id)
+
+        response_dict = await self.send_pixel_request(
+            "/engine/runPixelAsync", {"expression": payload, "insightId": insight_id}
+        )
+        return response_dict.get("jobId")
+
+    async def get_partial_responses(
+        self,
+        job_id: str,
+        poll_interval: Optional[float] = None,
+        max_poll_interval: Optional[float] = None,
+        poll_backoff: Optional[float] = None,
+        timeout: Optional[float] = None,
+        stats: Optional[StreamStats] = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Poll the partial endpoint until the job reaches a terminal state, yielding each new chunk.
+
+        Uses the same adaptive polling as `ServerClient.get_partial_responses`.
+
+        Args:
+            job_id (`str`): The identifier of the job being run
+            poll_interval (`float`): Overrides the client's `poll_interval` for this stream
+            max_poll_interval (`float`): Overrides the client's `max_poll_interval` for this stream
+            poll_backoff (`float`): Overrides the client's `poll_backoff` for this stream
+            timeout (`float`): Overrides the client's `stream_timeout` for this stream
+            stats (`StreamStats`): Optional; filled in with the poll and chunk counts of this stream
+
+        Returns:
+            `AsyncGenerator`: An async generator that can be iterated through with `async for` to get partials
+
+        Raises:
+            TimeoutError: If the stream is still running after `timeout` seconds
+        """
+        if not job_id:
+            raise ValueError("Job ID must be provided to get partial responses.")
+
+        schedule = PollSchedule(
+            self.poll_interval if poll_interval is None else poll_interval,
+            self.max_poll_interval if max_poll_interval is None else max_poll_interval,
+            self.poll_backoff if poll_backoff is None else poll_backoff,
+        )
+        if timeout is None:
+            timeout = self.stream_timeout
+        if stats is None:
+            stats = StreamStats()
+        stats.start(job_id)
+
+        started_streaming = False
+
+        while True:
+            response = await self.client.post(
+                self.main_url + "/engine/partial",
+                data={"jobId": job_id},
+                headers=self.required_headers,
+            )
+            response = self.codec.loads(response.content)
+            stats.polls += 1
+
+            msg = response.get("message", {})
+            status = response.get("status")
+            new_chunk = msg.get("new", "")
+
+            if new_chunk:
+                started_streaming = True
+                stats.add_chunk()
+                yield new_chunk
+            elif started_streaming and status in STREAM_TERMINAL_STATUSES:
+                break
+            elif status in STREAM_FAILED_STATUSES:
+                raise RuntimeError(f"Stream failed or canceled. Status: {status}")
+
+            if timeout is not None and stats.elapsed() > timeout:
+                raise TimeoutError(
+                    f"Stream {job_id} did not complete within {timeout} seconds"
+                )
+            await asyncio.sleep(schedule.next_delay(bool(new_chunk)))
+
+        stats.finish()
+        logger.debug(f"Stream {job_id} finished: {stats}")
+
+    def get_pixel_output(self, response: Dict, index: int = 0) -> Union[Any, List]:
+        """
+        Utility method to grab the output of runPixel call.
+
+        Args:
+            response (`Dict`): The runPixel response from the Tomcat Server
+            index (`int`): Which pixelReturn entry to read when the expression ran several pixels
+
+        Returns:
+            `Union[Any, List]`: The output object or a list of objects
+        """
+        main_output = response["pixelReturn"][index]["output"]
+
+        if isinstance(main_output, list):
+            output = main_output[0]
+        else:
+            output = main_output
+
+        return output
+
+    async def send_request(self, payload_struct: Dict) -> Dict:
+        """
+        Send a PayloadStruct to the RemoteEngineRun reactor and return the response PayloadStruct.
+
+        Args:
+            payload_struct (`dict`): the actual payload being sent to the AI Server
+
+        Returns:
+            `Dict`: the PayloadStruct returned by the server
+        """
+        input_payload_message = self.codec.dumps(payload_struct)
+
+        logger.info("Sending a PayloadStruct " + input_payload_message)
+
+        return await self.run_pixel(
+            payload='RemoteEngineRun(payload="<e>' + input_payload_message + '</e>");',
+            insight_id=payload_struct["insightId"],
+        )
+
+    async def upload_files(
+        self,
+        files: List[str],
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+        path: Optional[str] = None,
+        max_concurrency: int = 1,
+    ) -> List[str]:
+        """
+        Uploads files from the local device to the server.
+
+        Args:
+            files (`List[str]`):
+                List of file paths to upload from local device
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            path (Optional[`str`]):
+                Specific upload path
+            max_concurrency (`int`):
+                Number of files uploaded at once. Above 1 the upload goes through `upload_files_parallel` and a
+                `TransferError` is raised after all files were attempted if any of them failed
+
+        Returns (`List[str]`):
+            List of file names that have been successfully uploaded
+        """
+        if not files:
+            raise Exception("Must provide atleast one file to upload")
+
+        if isinstance(files, str):
+            files = [files]
+
+        if max_concurrency > 1:
+            results = await self.upload_files_parallel(
+                files,
+                project_id=project_id,
+                insight_id=insight_id,
+                path=path,
+                max_concurrency=max_concurrency,
+            )
+            failed = [result for result in results if not result.ok]
+            if failed:
+                raise TransferError(
+                    f"{len(failed)} of {len(results)} files failed to upload, first error: {failed[0].error}",
+                    results,
+                )
+            return [result.file_name for result in results]
+
+        upload_post_request = await self.get_upload_url(project_id, insight_id, path)
+
+        insight_file_paths = []
+        for filepath in files:
+            insight_file_paths.append(
+                await self.upload_file(filepath, upload_post_request)
+            )
+
+        return insight_file_paths
+
+    async def get_upload_url(
+        self,
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> str:
+        await self.ensure_session()
+        cur_insight = await self.resolve_insight(None)
+        upload_post_request = get_upload_url(
+            self.main_url, cur_insight, project_id, insight_id, path
+        )
+
+        logger.info("The upload url is " + upload_post_request)
+        return upload_post_request
+
+    async def upload_file(self, filepath: str, upload_url: str) -> str:
+        """
+        Uploads a single file to an upload url built by `get_upload_url`.
+
+        Args:
+            filepath (`str`): Path of the local file
+            upload_url (`str`): The /uploadFile/baseUpload url including its query parameters
+
+        Returns (`str`):
+            The file name the server stored the file under
+        """
+        # the file is opened and read on worker threads so a large upload does not block the event loop
+        encoder = await asyncio.to_thread(MultipartFileEncoder, filepath)
+        try:
+
+            async def body() -> AsyncGenerator[bytes, None]:
+                while True:
+                    block = await asyncio.to_thread(encoder.read, FILE_BLOCK_SIZE)
+                    if not block:
+                        return
+                    yield block
+
+            response = await self.client.post(
+                upload_url,
+                content=body(),
+                headers={
+                    **self.required_headers,
+                    "Content-Type": encoder.content_type,
+                    "Content-Length": str(len(encoder)),
+                },
+            )
+        finally:
+            await asyncio.to_thread(encoder.close)
+        response.raise_for_status()
+        return self.codec.loads(response.content)[0]["fileName"]
+
+    async def upload_files_parallel(
+        self,
+        files: List[str],
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+        path: Optional[str] = None,
+        max_concurrency: int = 4,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        progress_callback: Optional[Callable[[TransferProgress], None]] = None,
+    ) -> List[UploadResult]:
+        """
+        Uploads files from the local device to the server, at most `max_concurrency` at once. See
+        `ServerClient.upload_files_parallel`.
+
+        Each file is retried on its own, a file that still fails is reported in its result instead of aborting the
+        remaining uploads.
+
+        Args:
+            files (`List[str]`):
+                List of file paths to upload from local device
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+            path (Optional[`str`]):
+                Specific upload path
+            max_concurrency (`int`):
+                Maximum number of files uploaded at once
+            retries (`int`):
+                How many times a failed file is retried
+            retry_backoff (`float`):
+                Seconds before the first retry of a file, doubled for each following retry
+            progress_callback (Optional[`Callable`]):
+                Called with a `TransferProgress` (files done, files/s, MB/s) each time a file finishes
+
+        Returns (`List[UploadResult]`):
+            One result per file in the order of `files`, with the server file name or the error
+        """
+        if not files:
+            raise Exception("Must provide atleast one file to upload")
+
+        if isinstance(files, str):
+            files = [files]
+
+        upload_post_request = await self.get_upload_url(project_id, insight_id, path)
+
+        sizes = [os.path.getsize(f) if os.path.exists(f) else 0 for f in files]
+        progress = TransferProgress(len(files), sum(sizes))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def upload(filepath: str, size: int) -> UploadResult:
+            async with semaphore:
+                started = time.monotonic()
+                attempts = 0
+                while True:
+                    attempts += 1
+                    try:
+                        file_name = await self.upload_file(
+                            filepath, upload_post_request
+                        )
+                        error = None
+                        break
+                    except Exception as e:
+                        file_name = None
+                        error = e
+                        if attempts > retries:
+                            break
+                        await asyncio.sleep(retry_backoff * 2 ** (attempts - 1))
+
+            progress.record(error is None, size)
+            if progress_callback is not None:
+                progress_callback(progress)
+            return UploadResult(
+                filepath=filepath,
+                file_name=file_name,
+                error=error,
+                size=size,
+                attempts=attempts,
+                elapsed=time.monotonic() - started,
+            )
+
+        results = await asyncio.gather(
+            *[upload(filepath, size) for filepath, size in zip(files, sizes)]
+        )
+
+        logger.info(f"Uploaded files: {progress}")
+
+        return list(results)
+
+    async def download_file(
+        self,
+        file: str,
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+        custom_filename: str = None,
+    ) -> str:
+        """
+        Download files from the server to the local device.
+
+        Args:
+            file (`str`):
+                The file path on the server to download
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            custom_filename (Optional[`str`]):
+                A custom filename for the download
+
+        Returns (`str`):
+            The file name that was downloaded
+        """
+        if not file:
+            raise Exception("Must provide a file to download")
+
+        insight_param = await self.resolve_insight(insight_id)
+        download_file_key = await self.run_pixel(
+            payload=get_download_asset_pixel(file, project_id), insight_id=insight_param
+        )
+
+        download_get_url = f"{self.main_url}/engine/downloadFile?insightId={insight_param}&fileKey={download_file_key}"
+
+        async with self.client.stream("GET", download_get_url) as response:
+            response.raise_for_status()
+
+            if custom_filename:
+                filename = custom_filename
+            else:
+                filename = get_filename_from_url(
+                    download_get_url, response.headers, Path(file).name
+                )
+
+            # Get unique filename to avoid overwriting
+            unique_filename = get_unique_filename(filename)
+
+            # disk writes run on worker threads, only the network reads stay on the event loop
+            fobj = await asyncio.to_thread(open, unique_filename, "wb")
+            try:
+                async for chunk in response.aiter_bytes(FILE_BLOCK_SIZE):
+                    await asyncio.to_thread(fobj.write, chunk)
+            finally:
+                await asyncio.to_thread(fobj.close)
+
+        logger.info(f"File downloaded successfully: {unique_filename}")
+        return unique_filename
+
+    async def close(self) -> None:
+        """Close the connection pool without ending the server session."""
+        await self.client.aclose()
+
+    async def logout(self) -> None:
+        """Logs out of the server and closes the connection pool."""
+        try:
+            if self.session_validated_at is not None:
+                await self.client.get(self.main_url + "/logout/all")
+        finally:
+            await self.client.aclose()
+            self.session_validated_at = None
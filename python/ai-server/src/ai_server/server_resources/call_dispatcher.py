@@ -0,0 +1,191 @@
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+
+from ai_server.server_resources.server_client import (
+    AuthenticationError,
+    PixelError,
+    remote_engine_run_pixel,
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class CallDispatcher:
+    """Coalesces PayloadStructs submitted by concurrent engine calls into batched RemoteEngineRun requests.
+
+    `submit` registers a future for the struct's epoc and queues it. A dispatcher thread waits up to `window` seconds
+    after the first queued struct for more to arrive, then sends every struct of the same insight as one multi pixel
+    runPixel through `ServerClient.run_pixel_batch`. Each reply is routed back to its caller by epoc. Batches are sent
+    from a small pool so a slow batch does not hold up the next one.
+
+    Example:
+
+    ```python
+    >>> database = DatabaseEngine(engine_id="4a1f9466-4e6d-49cd-894d-7d22182344cd")
+    >>> futures = [database.execQueryAsync(f"SELECT * FROM diab WHERE AGE = {age}") for age in range(20, 80)]
+    >>> frames = [future.result() for future in futures]
+    ```
+    """
+
+    def __init__(
+        self,
+        server,
+        window: float = 0.005,
+        max_batch: int = 50,
+        max_in_flight: int = 4,
+    ):
+        self.server = server
+        self.window = window
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+
+        self.pending: List[Dict] = []
+        self.condition = threading.Condition()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.dispatcher: Optional[threading.Thread] = None
+        self.closed = False
+        self.batches_sent: int = 0
+        self.calls_sent: int = 0
+
+    def start(self) -> None:
+        """Start the dispatcher thread and send pool, called on the first submit."""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("CallDispatcher has been closed")
+            if self.dispatcher is not None:
+                return
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix="call-dispatch"
+            )
+            self.dispatcher = threading.Thread(
+                target=self._run, name="call-dispatcher", daemon=True
+            )
+            self.dispatcher.start()
+
+    def submit(self, payload_struct: Dict) -> Future:
+        """
+        Queue a PayloadStruct to be sent with the next batch.
+
+        Args:
+            payload_struct (`Dict`): The struct to send, its epoc must not be in use by another call
+
+        Returns:
+            `Future`: Resolved with the response PayloadStruct, or the exception that failed its batch
+        """
+        self.start()
+        future = self.server.register_monitor(payload_struct["epoc"])
+        with self.condition:
+            if self.closed:
+                self.server.release_monitor(payload_struct["epoc"])
+                raise RuntimeError("CallDispatcher has been closed")
+            self.pending.append(payload_struct)
+            self.condition.notify_all()
+        return future
+
+    def close(self) -> None:
+        """Send whatever is still queued, wait for the batches in flight and stop the dispatcher thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        if self.dispatcher is not None:
+            self.dispatcher.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _next_batch(self) -> List[Dict]:
+        """Wait for a struct, then up to `window` seconds for a full batch. Caller holds the condition."""
+        while not self.pending and not self.closed:
+            self.condition.wait()
+
+        deadline = time.monotonic() + self.window
+        while len(self.pending) < self.max_batch and not self.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.condition.wait(timeout=remaining)
+
+        batch = self.pending[: self.max_batch]
+        del self.pending[: self.max_batch]
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                batch = self._next_batch()
+                if not batch and self.closed:
+                    return
+
+            # run_pixel_batch sends one insight per request
+            by_insight: Dict[Optional[str], List[Dict]] = {}
+            for payload_struct in batch:
+                by_insight.setdefault(payload_struct["insightId"], []).append(
+                    payload_struct
+                )
+            for insight_id, payload_structs in by_insight.items():
+                self.executor.submit(self._send, insight_id, payload_structs)
+
+    def _send(self, insight_id: Optional[str], payload_structs: List[Dict]) -> None:
+        pixels = []
+        sent = []
+        for payload_struct in payload_structs:
+            # a struct that cannot be encoded only fails its own call
+            try:
+                pixels.append(
+                    remote_engine_run_pixel(self.server.codec.dumps(payload_struct))
+                )
+            except Exception as e:
+                self._resolve(payload_struct["epoc"], error=e)
+                continue
+            sent.append(payload_struct)
+        if not sent:
+            return
+
+        try:
+            results = self.server.run_pixel_batch(pixels, insight_id=insight_id)
+            if not isinstance(results, list):
+                raise AuthenticationError(results)
+        except Exception as e:
+            for payload_struct in sent:
+                self._resolve(payload_struct["epoc"], error=e)
+            return
+
+        with self.condition:
+            self.batches_sent += 1
+            self.calls_sent += len(sent)
+        logger.debug(f"Sent {len(sent)} engine calls in one runPixel")
+
+        answered = set()
+        for payload_struct, result in zip(sent, results):
+            if isinstance(result, PixelError):
+                answered.add(payload_struct["epoc"])
+                self._resolve(payload_struct["epoc"], error=result)
+                continue
+            # replies carry the epoc they answer, the position is only a fallback
+            epoc = payload_struct["epoc"]
+            if isinstance(result, dict) and result.get("epoc") is not None:
+                epoc = result["epoc"]
+            answered.add(epoc)
+            self._resolve(epoc, result=result)
+
+        for payload_struct in sent:
+            if payload_struct["epoc"] not in answered:
+                self._resolve(
+                    payload_struct["epoc"],
+                    error=RuntimeError(
+                        f"Sent {len(sent)} engine calls but received {len(results)} replies"
+                    ),
+                )
+
+    def _resolve(self, epoc: str, result=None, error: Exception = None) -> None:
+        future = self.server.release_monitor(epoc)
+        if future is None or future.done():
+            logger.warning(f"Dropping a reply for epoc {epoc}, no call is waiting")
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -0,0 +1,135 @@
+from typing import Any, Callable, Dict, Union
+import json
+import logging
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class JSONCodec:
+    """Encodes pixel payloads and decodes server responses, the stdlib `json` module by default.
+
+    Subclasses swap in a faster library. Anything the faster library cannot handle (e.g. integers beyond 64 bits or
+    non string dict keys) is passed to the stdlib implementation, so every codec accepts the same inputs.
+    """
+
+    name = "stdlib"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self.orjson.dumps(
+                obj, option=self.orjson.OPT_SERIALIZE_NUMPY
+            ).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        try:
+            return self.orjson.loads(data)
+        except ValueError:
+            # let the stdlib parser either handle it or raise its usual error
+            return super().loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self.ujson.dumps(
+                obj, ensure_ascii=False, escape_forward_slashes=False
+            )
+        except (TypeError, OverflowError):
+            return super().dumps(obj)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        try:
+            return self.ujson.loads(data)
+        except ValueError:
+            return super().loads(data)
+
+
+# tried in this order by get_codec("auto")
+CODECS: Dict[str, Callable[[], JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "stdlib": JSONCodec,
+}
+
+
+def get_codec(codec: Union[str, JSONCodec] = "auto") -> JSONCodec:
+    """
+    Resolve a codec name to a codec instance.
+
+    Args:
+        codec (`Union[str, JSONCodec]`): "auto" for the fastest installed library, "orjson", "ujson", "stdlib", or a
+            `JSONCodec` instance which is returned as is
+
+    Returns:
+        `JSONCodec`: The codec
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    if codec == "auto":
+        for factory in CODECS.values():
+            try:
+                return factory()
+            except ImportError:
+                continue
+
+    if codec not in CODECS:
+        raise ValueError(
+            f"Unknown json codec {codec!r}, expected 'auto' or one of {list(CODECS)}"
+        )
+    try:
+        return CODECS[codec]()
+    except ImportError as e:
+        raise ImportError(
+            f"The {codec} json codec requires the {codec} package to be installed"
+        ) from e
+
+
+# used by the pixel builders of the engine classes, which do not have a client at hand
+default_codec: JSONCodec = get_codec("auto")
+
+
+def set_default_codec(codec: Union[str, JSONCodec]) -> JSONCodec:
+    """Change the codec used by `dumps` and `loads` module functions."""
+    global default_codec
+    default_codec = get_codec(codec)
+    return default_codec
+
+
+def dumps(obj: Any) -> str:
+    return default_codec.dumps(obj)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    return default_codec.loads(data)
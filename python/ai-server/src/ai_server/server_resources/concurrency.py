@@ -0,0 +1,130 @@
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import logging
+import time
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class TaskResult:
+    """Outcome of running one item through `map_ordered`."""
+
+    def __init__(self, index: int, item: Any):
+        self.index = index
+        self.item = item
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.attempts: int = 0
+        self.elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = "ok" if self.ok else f"error={self.error!r}"
+        return f"TaskResult(index={self.index}, {state}, attempts={self.attempts})"
+
+
+def run_with_retry(
+    func: Callable[[Any], Any],
+    item: Any,
+    result: TaskResult,
+    retries: int = 0,
+    retry_backoff: float = 0.5,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+) -> TaskResult:
+    """Call `func(item)`, retrying up to `retries` times with exponential backoff, and record the outcome on `result`."""
+    start = time.monotonic()
+    while True:
+        result.attempts += 1
+        try:
+            result.value = func(item)
+            result.error = None
+            break
+        except retry_on as e:
+            result.error = e
+            if result.attempts > retries:
+                break
+            delay = retry_backoff * (2 ** (result.attempts - 1))
+            logger.debug(
+                f"Attempt {result.attempts} for item {result.index} failed with {e!r}, retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def map_ordered(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = 4,
+    retries: int = 0,
+    retry_backoff: float = 0.5,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    on_done: Optional[Callable[[TaskResult], None]] = None,
+) -> List[TaskResult]:
+    """
+    Run `func` over `items` on at most `max_workers` threads.
+
+    Failures are captured per item instead of aborting the rest, and results are returned in input order no matter
+    which order they complete in.
+
+    Args:
+        func (`Callable`): Called once per item (plus retries)
+        items (`Iterable`): The inputs
+        max_workers (`int`): Maximum number of items processed at once
+        retries (`int`): How many times a failed item is retried
+        retry_backoff (`float`): Seconds before the first retry, doubled for every following retry
+        retry_on (`Tuple[Type[BaseException]]`): Exception types that are caught and retried
+        on_done (`Callable`): Optional; called from the calling thread with each `TaskResult` as it completes
+
+    Returns:
+        `List[TaskResult]`: One result per item, in the order of `items`
+    """
+    results = [TaskResult(index, item) for index, item in enumerate(items)]
+    if not results:
+        return results
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(results)))
+    ) as executor:
+        futures = [
+            executor.submit(
+                run_with_retry,
+                func,
+                result.item,
+                result,
+                retries,
+                retry_backoff,
+                retry_on,
+            )
+            for result in results
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if on_done is not None:
+                on_done(result)
+
+    return results
+
+
+def chain_future(future: Future, transform: Callable[[Any], Any]) -> Future:
+    """
+    Return a future resolved with `transform(future.result())` once `future` is done.
+
+    An exception from `future` or from `transform` is set on the returned future instead.
+    """
+    chained = Future()
+
+    def done(source: Future) -> None:
+        if source.cancelled():
+            chained.cancel()
+            return
+        try:
+            chained.set_result(transform(source.result()))
+        except BaseException as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(done)
+    return chained
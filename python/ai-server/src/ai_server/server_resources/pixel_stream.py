@@ -0,0 +1,145 @@
+from typing import Any, Iterator, List, Optional
+import logging
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+PIXEL_PREFIX = "pixelReturn.item"
+CONTAINER_START = ("start_map", "start_array")
+
+
+def import_ijson():
+    try:
+        import ijson
+    except ImportError as e:
+        raise ImportError(
+            "Streaming pixel outputs requires ijson, install it with `pip install ai-server-sdk[streaming]`"
+        ) from e
+    return ijson
+
+
+class PixelOutputReader:
+    """Incrementally parses a runPixel response body and yields the entries of one pixel's output list.
+
+    Only the entry being built is held in memory, so a query result or document listing with millions of rows is
+    never materialised as a whole. The rest of the pixelReturn (operationType, expression, an error message) is
+    recorded on the reader while parsing and can be inspected once iteration finished.
+
+    Example:
+
+    ```python
+    >>> reader = PixelOutputReader(response.raw, index=0, item_path="data")
+    >>> total = sum(row[2] for row in reader)
+    >>> reader.failed
+    False
+    ```
+    """
+
+    def __init__(
+        self,
+        stream,
+        index: int = 0,
+        item_path: Optional[str] = None,
+        buf_size: int = 64 * 1024,
+    ):
+        """
+        Args:
+            stream: A binary file-like object with the JSON body, e.g. `response.raw` of a streamed request
+            index (`int`): Position of the pixel in pixelReturn whose output is read
+            item_path (`Optional[str]`): Dotted path from the output to the list to iterate, e.g. "data" for an output
+                shaped `{"columns": [...], "data": [...]}`. None iterates the output itself.
+            buf_size (`int`): Number of bytes read from `stream` at a time
+        """
+        self.stream = stream
+        self.index = index
+        self.item_path = item_path
+        self.buf_size = buf_size
+
+        self.found: bool = False
+        self.is_list: bool = False
+        self.items: int = 0
+        self.expression: Optional[str] = None
+        self.operation_type: List[str] = []
+        # the output when it is a plain value instead of a list, which is how errors are reported
+        self.scalar_output: Any = None
+        self.error_message: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return "ERROR" in self.operation_type
+
+    def __iter__(self) -> Iterator[Any]:
+        ijson = import_ijson()
+
+        output_prefix = PIXEL_PREFIX + ".output"
+        list_prefix = (
+            f"{output_prefix}.{self.item_path}" if self.item_path else output_prefix
+        )
+        items_prefix = list_prefix + ".item"
+        operation_prefix = PIXEL_PREFIX + ".operationType.item"
+        expression_prefix = PIXEL_PREFIX + ".pixelExpression"
+
+        pixel = -1
+        # containers of the entry being built, innermost last. Building it inline instead of with
+        # ijson.ObjectBuilder roughly halves the per event overhead.
+        stack = None
+        key = None
+        for prefix, event, value in ijson.parse(
+            self.stream, buf_size=self.buf_size, use_float=True
+        ):
+            if stack is not None:
+                if event == "map_key":
+                    key = value
+                    continue
+                top = stack[-1]
+                if event == "start_map" or event == "start_array":
+                    container = {} if event == "start_map" else []
+                    if type(top) is list:
+                        top.append(container)
+                    else:
+                        top[key] = container
+                    stack.append(container)
+                elif event == "end_map" or event == "end_array":
+                    stack.pop()
+                    if not stack:
+                        stack = None
+                        self.items += 1
+                        yield entry
+                elif type(top) is list:
+                    top.append(value)
+                else:
+                    top[key] = value
+                continue
+
+            if prefix == PIXEL_PREFIX:
+                if event == "start_map":
+                    pixel += 1
+                    self.found = self.found or pixel == self.index
+                elif event == "end_map" and pixel == self.index:
+                    # everything after the requested pixel is of no interest
+                    break
+                continue
+
+            if pixel != self.index:
+                if prefix == "errorMessage":
+                    self.error_message = value
+                continue
+
+            if prefix == items_prefix:
+                if event == "start_map" or event == "start_array":
+                    entry = {} if event == "start_map" else []
+                    stack = [entry]
+                else:
+                    self.items += 1
+                    yield value
+            elif prefix == list_prefix and event == "start_array":
+                self.is_list = True
+            elif prefix == output_prefix and event not in CONTAINER_START:
+                self.scalar_output = value
+            elif prefix == operation_prefix:
+                self.operation_type.append(value)
+            elif prefix == expression_prefix:
+                self.expression = value
+
+        logger.debug(
+            f"Streamed {self.items} entries from the output of pixel {self.index}"
+        )
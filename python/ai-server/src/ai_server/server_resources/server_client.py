@@ -1,15 +1,51 @@
-from typing import Any, List, Dict, Union, Optional, Set, Generator, Tuple
+from typing import Any, Callable, List, Dict, Union, Optional, Set, Generator, Tuple
 import requests
-import json
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import base64
 import logging
 from urllib.parse import urlparse, unquote
 from pathlib import Path
 import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from ai_server.server_resources.concurrency import map_ordered
+from ai_server.server_resources.codec import JSONCodec, get_codec
+from ai_server.server_resources.pixel_stream import PixelOutputReader
+from ai_server.server_resources.ttl_cache import TTLCache
+from ai_server.server_resources.transfers import (
+    DownloadStream,
+    MultipartFileEncoder,
+    RangedDownload,
+    TransferError,
+    TransferProgress,
+    UploadResult,
+)
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# lower-cased fragments the server uses when a pixel is rejected because the session is no longer authenticated
+LOGIN_REQUIRED_MESSAGES = (
+    "please login",
+    "login required",
+    "user is not logged in",
+    "not authenticated",
+    "session has expired",
+    "session is invalid",
+)
+
+# job statuses returned by /engine/partial once a streaming job has stopped producing output
+STREAM_TERMINAL_STATUSES = {
+    "ProgressComplete",
+    "Complete",
+    "Error",
+    "UnknownJob",
+    "Canceled",
+}
+STREAM_FAILED_STATUSES = {"Error", "UnknownJob", "Canceled"}
+
 
 class ServerClient:
     """ServerClient to make calls to a ai server instance
@@ -37,6 +73,22 @@ class ServerClient:
         secret_key: Optional[str] = None,
         bearer_token: Optional[str] = None,
         bearer_token_provider: Optional[str] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        session_ttl: float = 300.0,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+        poll_backoff: float = 1.5,
+        stream_timeout: Optional[float] = None,
+        multiplex_streams: bool = False,
+        stream_poll_workers: int = 8,
+        upload_stream_threshold: Optional[int] = 16 * 1024 * 1024,
+        data_product_cache_size: int = 32,
+        json_codec: Union[str, JSONCodec] = "auto",
+        call_batch_window: float = 0.005,
+        call_batch_size: int = 50,
     ) -> None:
         """
         Args:
@@ -50,6 +102,38 @@ class ServerClient:
                 A token provided from a successful login of a user to an existing IdP
             bearer_token_provider (`Optional[str]`):
                 The existing IdP login type as recognized by the AuthProvider enum list
+            pool_connections (`int`):
+                Number of per-host connection pools the HTTP session keeps cached
+            pool_maxsize (`int`):
+                Maximum number of keep-alive connections kept open per host
+            pool_block (`bool`):
+                If True, requests wait for a free connection once `pool_maxsize` connections are in use for a host instead of opening extra throwaway connections
+            keep_alive (`bool`):
+                If False, every request asks the server to close the connection after responding
+            session_ttl (`float`):
+                Seconds the session cookie is trusted before it is re-validated against /config. An auth failure from the server always triggers a re-login regardless of the TTL. Use 0 to validate before every pixel.
+            poll_interval (`float`):
+                Seconds between /engine/partial polls while a stream is producing chunks
+            max_poll_interval (`float`):
+                Upper bound the poll interval backs off to while a stream produces nothing
+            poll_backoff (`float`):
+                Factor the poll interval is multiplied by after every poll that returned no new chunk
+            stream_timeout (`Optional[float]`):
+                Seconds a stream may run before `get_partial_responses` raises TimeoutError. None waits indefinitely
+            multiplex_streams (`bool`):
+                If True, every stream is polled by one shared `StreamMultiplexer` instead of a poll loop in the consuming thread
+            stream_poll_workers (`int`):
+                Maximum number of /engine/partial polls the multiplexer has in flight at once
+            upload_stream_threshold (`Optional[int]`):
+                Files of at least this many bytes are uploaded with a streaming multipart body read from disk in small blocks instead of being encoded in memory. None always encodes in memory
+            data_product_cache_size (`int`):
+                Maximum number of `import_data_product` results kept when it is called with a `cache_ttl`
+            json_codec (`Union[str, JSONCodec]`):
+                JSON library used for requests and responses: "auto" picks orjson or ujson when installed and falls back to the stdlib, or one of "orjson", "ujson", "stdlib"
+            call_batch_window (`float`):
+                Seconds engine calls made with `call_async` are held back so calls made around the same time share one runPixel request
+            call_batch_size (`int`):
+                Maximum number of engine calls sent in one runPixel request
         """
         # set the base url as an instance attribute
         self.main_url: str = base
@@ -60,6 +144,9 @@ class ServerClient:
         if self.main_url.endswith(r"\/"):
             self.main_url = self.main_url[:-1]
 
+        # every response is decoded and every PayloadStruct encoded with this codec
+        self.codec: JSONCodec = get_codec(json_codec)
+
         # set the access key as an instance attribute
         self.access_key: str = access_key
         # set the secret key as an instance attribute
@@ -83,6 +170,50 @@ class ServerClient:
                 "Must provide either access_key and secret_key for user access login or provide bearer_token and bearer_token_provider for login using your IdP access key"
             )
 
+        # connection pool settings, like every other setting below they are kept so reconnect() can rebuild the
+        # same client
+        self.pool_connections: int = pool_connections
+        self.pool_maxsize: int = pool_maxsize
+        self.pool_block: bool = pool_block
+        self.keep_alive: bool = keep_alive
+
+        # every call to the server goes through this pooled session so TCP/TLS connections are reused
+        self.session: requests.Session = self._create_session()
+
+        # track when the session cookie was last known to be valid instead of probing /config before every pixel
+        self.session_ttl: float = session_ttl
+        self.session_validated_at: Optional[float] = None
+        # bumped on every (re)login so concurrent callers that hit the same auth failure only re-login once
+        self.session_generation: int = 0
+        self.auth_lock = threading.Lock()
+
+        # defaults for polling /engine/partial, each can be overridden per stream
+        self.poll_interval: float = poll_interval
+        self.max_poll_interval: float = max_poll_interval
+        self.poll_backoff: float = poll_backoff
+        self.stream_timeout: Optional[float] = stream_timeout
+
+        self.upload_stream_threshold: Optional[int] = upload_stream_threshold
+        # (project_id, insight_id, sql) -> DataFrame, only used when import_data_product is given a cache_ttl
+        self.data_product_cache_size: int = data_product_cache_size
+        self.data_product_cache = TTLCache(maxsize=data_product_cache_size)
+
+        # one scheduler thread polling every active stream, started on the first stream
+        self.multiplex_streams: bool = multiplex_streams
+        self.stream_poll_workers: int = stream_poll_workers
+        self.stream_multiplexer = None
+        if multiplex_streams:
+            from ai_server.server_resources.stream_multiplexer import StreamMultiplexer
+
+            self.stream_multiplexer = StreamMultiplexer(
+                self, max_workers=stream_poll_workers
+            )
+
+        # batches the PayloadStructs of ServerProxy.call_async, started on the first call
+        self.call_batch_window: float = call_batch_window
+        self.call_batch_size: int = call_batch_size
+        self.call_dispatcher = None
+
         # TODO provide definitons for all of these attributes
         # used to keep track of the authorization header after the user has authenticated
         self.auth_headers: Dict = {}
@@ -100,12 +231,34 @@ class ServerClient:
         self.open_insights: Set = set()
         self.cur_insight: str = self.make_new_insight()
 
-        # map to keep track of requests and responses outside of this class or in separate threads
-        self.monitors = {}
+        # epoc -> Future of the engine call waiting for that epoc's response, see register_monitor
+        self.monitors: Dict[str, Future] = {}
+        self.monitors_lock = threading.Lock()
 
         # set the instance of this class as the class attribute da_server
         ServerClient.da_server = self
 
+    def _create_session(self) -> requests.Session:
+        """
+        Build the pooled HTTP session shared by every call this client makes.
+
+        Returns:
+            `requests.Session`: A session with an HTTPAdapter mounted for http and https using the client's pool settings
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+
+        return session
+
     def loginUserAccessKey(self):
         """
         Register / validate the users secret & access key combination.
@@ -123,6 +276,7 @@ class ServerClient:
             raise AuthenticationError("User could not successfully login")
 
         self.cookies = response.cookies
+        self.mark_session_valid()
         # display the cookies
         logger.info(self.cookies)
 
@@ -144,6 +298,7 @@ class ServerClient:
             raise AuthenticationError("User could not successfully login")
 
         self.cookies = response.cookies
+        self.mark_session_valid()
         # display the cookies
         logger.info(self.cookies)
 
@@ -156,8 +311,162 @@ class ServerClient:
             self.secret_key,
             self.bearer_token,
             self.bearer_token_provider,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            keep_alive=self.keep_alive,
+            session_ttl=self.session_ttl,
+            poll_interval=self.poll_interval,
+            max_poll_interval=self.max_poll_interval,
+            poll_backoff=self.poll_backoff,
+            stream_timeout=self.stream_timeout,
+            multiplex_streams=self.multiplex_streams,
+            stream_poll_workers=self.stream_poll_workers,
+            upload_stream_threshold=self.upload_stream_threshold,
+            data_product_cache_size=self.data_product_cache_size,
+            json_codec=self.codec,
+            call_batch_window=self.call_batch_window,
+            call_batch_size=self.call_batch_size,
         )
 
+    def mark_session_valid(self) -> None:
+        """Record that the session cookie was just confirmed to be valid."""
+        self.session_validated_at = time.monotonic()
+        self.session_generation += 1
+
+    def is_session_fresh(self) -> bool:
+        """Whether the session cookie was validated within the last `session_ttl` seconds."""
+        return (
+            self.session_validated_at is not None
+            and time.monotonic() - self.session_validated_at < self.session_ttl
+        )
+
+    def ensure_session(self) -> bool:
+        """
+        Make sure the session is usable before sending a request.
+
+        The cookie is trusted until `session_ttl` expires. After that a single /config probe is made and, if the session has expired, the client logs in again with its stored credentials.
+
+        Returns:
+            `bool`: True if the session is logged in
+        """
+        if self.is_session_fresh():
+            return True
+
+        _, is_logged_in = self.is_session_login()
+        if is_logged_in:
+            self.session_validated_at = time.monotonic()
+            return True
+
+        try:
+            self.reauthenticate()
+        except AuthenticationError as e:
+            logger.error(f"Could not re-authenticate the session. Error: {str(e)}")
+            return False
+        return True
+
+    def reauthenticate(self, generation: Optional[int] = None) -> None:
+        """
+        Log in again with the stored credentials and refresh the CSRF token.
+
+        Unlike `reconnect`, the client, its open insights and its current insight are kept as they are.
+
+        Args:
+            generation (`Optional[int]`):
+                The `session_generation` the caller saw when its request failed. If another thread has already logged in again since then, nothing is done.
+        """
+        with self.auth_lock:
+            if generation is not None and generation != self.session_generation:
+                return
+
+            logger.info("Session is no longer valid; logging in again.")
+            # drop the stale session cookie so the server issues a new one
+            self.cookies = None
+            self.session.cookies.clear()
+            if self.access_key and self.secret_key:
+                self.loginUserAccessKey()
+            else:
+                self.loginBearerToken()
+
+            self.required_headers.pop("X-Csrf-Token", None)
+            self.set_csrf_if_enabled()
+
+    def is_auth_failure(
+        self, response: requests.Response, response_dict: Optional[Dict] = None
+    ) -> bool:
+        """
+        Check whether a response means the session is no longer authenticated.
+
+        Args:
+            response (`requests.Response`): The raw HTTP response
+            response_dict (`Optional[Dict]`): The parsed JSON body, if it could be parsed
+
+        Returns:
+            `bool`: True on a 401, a redirect to the login page, an HTML login page or a login-required pixelReturn.
+                Other HTML responses, e.g. a 502 page from a proxy, are left to `raise_for_status`.
+        """
+        if response.status_code == 401:
+            return True
+
+        if response.history and "login" in response.url.lower():
+            return True
+
+        if response_dict is None:
+            return is_login_page(response)
+
+        return is_login_required(response_dict)
+
+    def send_pixel_request(self, endpoint: str, data: Dict) -> Dict:
+        """
+        POST a form payload to a pixel endpoint and return the parsed JSON response.
+
+        If the server answers with an auth failure, the client re-authenticates once and retries the request.
+
+        Args:
+            endpoint (`str`): The endpoint under the main url, e.g. /engine/runPixel
+            data (`Dict`): The form data to send
+
+        Returns:
+            `Dict`: The JSON response
+        """
+        for attempt in range(2):
+            generation = self.session_generation
+            headers = self.required_headers.copy()
+            headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+
+            response = self.session.post(
+                self.main_url + endpoint,
+                cookies=self.cookies,
+                data=data,
+                headers=headers,
+            )
+
+            try:
+                response_dict = self.codec.loads(response.content)
+            except ValueError:
+                response_dict = None
+
+            if not self.is_auth_failure(response, response_dict):
+                break
+
+            if attempt == 0:
+                self.reauthenticate(generation)
+            else:
+                raise AuthenticationError(
+                    "Session expired and could not be re-authenticated"
+                )
+
+        if response_dict is None:
+            # raise HTTP error if one occurs
+            response.raise_for_status()
+            raise ValueError(
+                f"Server returned a non JSON response from {endpoint}: {response.text[:200]}"
+            )
+
+        # a successful round trip proves the cookie is still good
+        self.session_validated_at = time.monotonic()
+        return response_dict
+
     def is_session_login(
         self, headers: Optional[Dict[str, str]] = None
     ) -> Tuple[Optional[requests.Response], bool]:
@@ -172,11 +481,11 @@ class ServerClient:
         """
         config_url = self.main_url + "/config"
         try:
-            response = requests.get(
+            response = self.session.get(
                 config_url, cookies=getattr(self, "cookies", None), headers=headers
             )
             response.raise_for_status()
-            config_data = response.json()
+            config_data = self.codec.loads(response.content)
             loginDetails = config_data.get("loginDetails")
             if loginDetails:
                 return response, True
@@ -211,9 +520,9 @@ class ServerClient:
         """
         config_url = self.main_url + "/config"
         try:
-            resp = requests.get(config_url, cookies=getattr(self, "cookies", None))
+            resp = self.session.get(config_url, cookies=getattr(self, "cookies", None))
             resp.raise_for_status()
-            config_data = resp.json()
+            config_data = self.codec.loads(resp.content)
             use_csrf = config_data.get("csrf", False)
             if use_csrf:
                 logger.info("CSRF enabled; fetching CSRF token.")
@@ -221,7 +530,7 @@ class ServerClient:
                     "x-csrf-token": "fetch",
                     "Accept": "application/json, text/plain, */*",
                 }
-                csrf_resp = requests.get(
+                csrf_resp = self.session.get(
                     self.main_url + "/config/fetchCsrf",
                     headers=csrf_headers,
                     cookies=getattr(self, "cookies", None),
@@ -246,29 +555,25 @@ class ServerClient:
         """Get the corrensponding openai endpoint for the CFG AI server"""
         return self.main_url + "/model/openai"
 
-    def make_new_insight(self) -> str:
+    def make_new_insight(self, set_current: bool = True) -> str:
         """
         Create a new insight (temporal space) to operate within the ai-server at set it as the current insight.
+
+        Args:
+            set_current (`bool`): If False, the new insight is only returned and the current insight is left unchanged
         """
-        _, is_logged_in = self.is_session_login()
-        if not is_logged_in:
+        if not self.ensure_session():
             return "Please login"
 
-        response = requests.post(
-            self.main_url + "/engine/runPixel",
-            cookies=self.cookies,
-            data={"expression": "META | true", "insightId": "new"},
-            headers=self.required_headers,
+        json_output = self.send_pixel_request(
+            "/engine/runPixel", {"expression": "META | true", "insightId": "new"}
         )
+        insight_id = json_output["insightID"]
+        self.open_insights.add(insight_id)
+        if set_current:
+            self.cur_insight = insight_id
 
-        # raise HTTP error if one occurs
-        response.raise_for_status()
-
-        json_output = response.json()
-        self.cur_insight = json_output["insightID"]
-        self.open_insights.add(self.cur_insight)
-
-        return self.cur_insight
+        return insight_id
 
     def run_pixel(
         self,
@@ -294,8 +599,7 @@ class ServerClient:
         Returns:
             `Union[Any, Dict]`: The output object from the runPixel response or the entire runPixel response.
         """
-        _, is_logged_in = self.is_session_login()
-        if not is_logged_in:
+        if not self.ensure_session():
             return "Please login"
 
         if insight_id is None:
@@ -305,17 +609,7 @@ class ServerClient:
                 insight_id = self.cur_insight
 
         pixel_payload = {"expression": payload, "insightId": insight_id}
-        headers = self.required_headers.copy()
-        headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
-
-        response = requests.post(
-            self.main_url + "/engine/runPixel",
-            cookies=self.cookies,
-            data=pixel_payload,
-            headers=headers,
-        )
-
-        response_dict = response.json()
+        response_dict = self.send_pixel_request("/engine/runPixel", pixel_payload)
         if "ERROR" in response_dict["pixelReturn"][0]["operationType"]:
             raise Exception(response_dict["pixelReturn"][0]["output"])
 
@@ -324,6 +618,102 @@ class ServerClient:
         else:
             return self.get_pixel_output(response_dict)
 
+    def run_pixel_batch(
+        self,
+        payloads: List[str],
+        insight_id: Optional[str] = None,
+        full_response: Optional[bool] = False,
+        batch_size: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Send several pixel payloads to /api/engine/runPixel in a single request.
+
+        The payloads are joined with `;` into one expression and each entry of the returned pixelReturn list is mapped back
+        to the payload at the same position. A failing payload does not fail the batch, its position holds a `PixelError`
+        instead of an output.
+
+        Args:
+            payloads (`List[str]`): DSL (Pixel) instructions, each must produce exactly one pixelReturn entry
+            insight_id (`str`): Unique identifier for the temporal worksapce where actions are being isolated. Same options as `run_pixel`
+            full_response (`bool`): Return the raw pixelReturn entry for each payload instead of its output
+            batch_size (`int`): Maximum number of payloads sent per request, all payloads are sent together if not set
+
+        Returns:
+            `List[Any]`: One output (or pixelReturn entry) per payload, or a `PixelError` for the payloads that failed
+        """
+        if not self.ensure_session():
+            return "Please login"
+
+        if insight_id is None:
+            insight_id = self.cur_insight
+            if insight_id is None:
+                self.cur_insight = self.make_new_insight()
+                insight_id = self.cur_insight
+
+        results = []
+        for chunk in chunk_payloads(payloads, batch_size):
+            pixel_payload = {
+                "expression": join_pixel_batch(chunk),
+                "insightId": insight_id,
+            }
+            response_dict = self.send_pixel_request("/engine/runPixel", pixel_payload)
+            results.extend(split_pixel_batch(response_dict, chunk, full_response))
+
+        return results
+
+    @contextmanager
+    def pixel_batch(
+        self, insight_id: Optional[str] = None, batch_size: Optional[int] = None
+    ) -> Generator["PixelBatch", None, None]:
+        """
+        Collect pixels inside a `with` block and send them in one round trip when the block exits.
+
+        Example:
+
+        ```python
+        >>> with server_client.pixel_batch() as batch:
+        ...     futures = [batch.add(f"Storage(storage = \"{engine_id}\")|ListStoragePath(storagePath='{path}');") for path in paths]
+        >>> listings = [future.result() for future in futures]
+        ```
+
+        Args:
+            insight_id (`str`): Unique identifier for the temporal worksapce where actions are being isolated. Same options as `run_pixel`
+            batch_size (`int`): Maximum number of payloads sent per request
+
+        Returns:
+            `PixelBatch`: Collects the payloads, `add` returns a `Future` resolved with the output or the `PixelError`
+        """
+        batch = PixelBatch()
+        try:
+            yield batch
+        except BaseException:
+            # nothing is sent when the block fails
+            for _, future in batch.pending:
+                future.cancel()
+            raise
+
+        if not batch.pending:
+            return
+
+        try:
+            results = self.run_pixel_batch(
+                [payload for payload, _ in batch.pending],
+                insight_id=insight_id,
+                batch_size=batch_size,
+            )
+            if not isinstance(results, list):
+                raise AuthenticationError(results)
+        except Exception as e:
+            for _, future in batch.pending:
+                future.set_exception(e)
+            raise
+
+        for (_, future), result in zip(batch.pending, results):
+            if isinstance(result, PixelError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
     def run_pixel_async(
         self, payload: str, insight_id: Optional[str] = None
     ) -> Union[Any, dict]:
@@ -344,8 +734,7 @@ class ServerClient:
         Returns:
             `Union[Any, Dict]`: The output object from the runPixelAsync containing the jobId
         """
-        _, is_logged_in = self.is_session_login()
-        if not is_logged_in:
+        if not self.ensure_session():
             return "Please login"
 
         if insight_id is None:
@@ -355,47 +744,88 @@ class ServerClient:
                 insight_id = self.cur_insight
 
         pixel_payload = {"expression": payload, "insightId": insight_id}
-        headers = self.required_headers.copy()
-        headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+        response_dict = self.send_pixel_request("/engine/runPixelAsync", pixel_payload)
+        return response_dict.get("jobId")
 
-        response = requests.post(
-            self.main_url + "/engine/runPixelAsync",
+    def poll_partial(self, job_id: str) -> Dict:
+        """Make a single post to the partial endpoint and return the job's status and newest chunk."""
+        response = self.session.post(
+            url=self.main_url + "/engine/partial",
             cookies=self.cookies,
-            data=pixel_payload,
-            headers=headers,
+            data={"jobId": job_id},
+            headers=self.required_headers,
         )
+        return self.codec.loads(response.content)
 
-        response_dict = response.json()
-        return response_dict.get("jobId")
+    def poll_schedule(
+        self,
+        poll_interval: Optional[float] = None,
+        max_poll_interval: Optional[float] = None,
+        poll_backoff: Optional[float] = None,
+    ) -> "PollSchedule":
+        """Build the polling schedule for one stream, falling back to the client defaults."""
+        return PollSchedule(
+            self.poll_interval if poll_interval is None else poll_interval,
+            self.max_poll_interval if max_poll_interval is None else max_poll_interval,
+            self.poll_backoff if poll_backoff is None else poll_backoff,
+        )
 
-    def get_partial_responses(self, job_id: str) -> Generator:
+    def get_partial_responses(
+        self,
+        job_id: str,
+        poll_interval: Optional[float] = None,
+        max_poll_interval: Optional[float] = None,
+        poll_backoff: Optional[float] = None,
+        timeout: Optional[float] = None,
+        stats: Optional["StreamStats"] = None,
+    ) -> Generator:
         """
-        Make continuous post requests to the partial endpoint until we see a change in the message state
+        Poll the partial endpoint until the job reaches a terminal state, yielding each new chunk.
+
+        Polls are spaced `poll_interval` apart while chunks keep arriving and back off exponentially up to
+        `max_poll_interval` while nothing new is produced, e.g. while the model is still processing the prompt.
+
         Args:
             job_id (`str`): The identifier of the job being run
+            poll_interval (`float`): Overrides the client's `poll_interval` for this stream
+            max_poll_interval (`float`): Overrides the client's `max_poll_interval` for this stream
+            poll_backoff (`float`): Overrides the client's `poll_backoff` for this stream
+            timeout (`float`): Overrides the client's `stream_timeout` for this stream
+            stats (`StreamStats`): Optional; filled in with the poll and chunk counts of this stream
+
         Returns:
             `Generator`: A generator that can be iterated through to get partials
+
+        Raises:
+            TimeoutError: If the stream is still running after `timeout` seconds
         """
 
         if not job_id:
             raise ValueError("Job ID must be provided to get partial responses.")
 
+        if self.stream_multiplexer is not None:
+            yield from self.stream_multiplexer.stream(
+                job_id,
+                schedule=self.poll_schedule(
+                    poll_interval, max_poll_interval, poll_backoff
+                ),
+                timeout=self.stream_timeout if timeout is None else timeout,
+                stats=stats,
+            )
+            return
+
+        schedule = self.poll_schedule(poll_interval, max_poll_interval, poll_backoff)
+        if timeout is None:
+            timeout = self.stream_timeout
+        if stats is None:
+            stats = StreamStats()
+        stats.start(job_id)
+
         started_streaming = False
-        terminal_statuses = {
-            "ProgressComplete",
-            "Complete",
-            "Error",
-            "UnknownJob",
-            "Canceled",
-        }
 
         while True:
-            response = requests.post(
-                url=self.main_url + "/engine/partial",
-                cookies=self.cookies,
-                data={"jobId": job_id},
-                headers=self.required_headers,
-            ).json()
+            response = self.poll_partial(job_id)
+            stats.polls += 1
 
             msg = response.get("message", {})
             status = response.get("status")
@@ -404,23 +834,34 @@ class ServerClient:
             if new_chunk:
                 if not started_streaming:
                     started_streaming = True
+                stats.add_chunk()
                 yield new_chunk
-            elif started_streaming and status in terminal_statuses:
+            elif started_streaming and status in STREAM_TERMINAL_STATUSES:
                 break
-            elif status in {"Error", "UnknownJob", "Canceled"}:
+            elif status in STREAM_FAILED_STATUSES:
                 raise RuntimeError(f"Stream failed or canceled. Status: {status}")
 
-    def get_pixel_output(self, response: Dict) -> Union[Any, List]:
+            if timeout is not None and stats.elapsed() > timeout:
+                raise TimeoutError(
+                    f"Stream {job_id} did not complete within {timeout} seconds"
+                )
+            time.sleep(schedule.next_delay(bool(new_chunk)))
+
+        stats.finish()
+        logger.debug(f"Stream {job_id} finished: {stats}")
+
+    def get_pixel_output(self, response: Dict, index: int = 0) -> Union[Any, List]:
         """
         Utility method to grab the output of runPixel call.
 
         Args:
             response (`Dict`): The runPixel response from the Tomcat Server
+            index (`int`): Which pixelReturn entry to read when the expression ran several pixels
 
         Returns:
             `Union[Any, List]`: The output object or a list of objects
         """
-        main_output = response["pixelReturn"][0]["output"]
+        main_output = response["pixelReturn"][index]["output"]
 
         if isinstance(main_output, list):
             output = main_output[0]
@@ -429,38 +870,189 @@ class ServerClient:
 
         return output
 
+    def iter_pixel_output(
+        self,
+        payload: str,
+        insight_id: Optional[str] = None,
+        index: int = 0,
+        item_path: Optional[str] = None,
+    ) -> Generator[Any, None, None]:
+        """
+        Run a pixel and yield the entries of its output list while the response is still being read.
+
+        `run_pixel` holds the raw body, the parsed response and whatever is built from it in memory at the same time.
+        Here the body is parsed incrementally with ijson (`pip install ai-server-sdk[streaming]`), so only the entry
+        being yielded is in memory and large outputs such as `DatabaseEngine.runQuery` results can be aggregated or
+        written out row by row.
+
+        Args:
+            payload (`str`): DSL (Pixel) instruction on what specific action should be performed
+            insight_id (`Optional[str]`): Unique identifier for the temporal workspace, see `run_pixel`
+            index (`int`): Which pixelReturn entry to read when the expression runs several pixels
+            item_path (`Optional[str]`): Dotted path from the output to the list to iterate, e.g. "data" for an
+                output shaped `{"columns": [...], "data": [...]}`. None iterates the output itself.
+
+        Returns:
+            `Generator[Any]`: The entries of the output list, in order
+
+        Raises:
+            PixelError: If the pixel returned an ERROR operationType
+            ValueError: If the response has no pixel at `index` or its output is not a list
+        """
+        if not self.ensure_session():
+            raise AuthenticationError("Please login")
+
+        if insight_id is None:
+            insight_id = self.cur_insight
+            if insight_id is None:
+                self.cur_insight = self.make_new_insight()
+                insight_id = self.cur_insight
+
+        pixel_payload = {"expression": payload, "insightId": insight_id}
+        for attempt in range(2):
+            generation = self.session_generation
+            headers = self.required_headers.copy()
+            headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+
+            with self.session.post(
+                self.main_url + "/engine/runPixel",
+                cookies=self.cookies,
+                data=pixel_payload,
+                headers=headers,
+                stream=True,
+            ) as response:
+                if self.is_auth_failure(response):
+                    auth_failed = True
+                else:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    reader = PixelOutputReader(response.raw, index, item_path)
+                    yield from reader
+                    # nothing has been yielded when the server rejected the session, so the request can be retried
+                    auth_failed = reader.items == 0 and is_login_required(
+                        {
+                            "errorMessage": reader.error_message,
+                            "pixelReturn": [
+                                {
+                                    "operationType": reader.operation_type,
+                                    "output": reader.scalar_output,
+                                }
+                            ],
+                        }
+                    )
+
+            if not auth_failed:
+                break
+            if attempt == 0:
+                self.reauthenticate(generation)
+            else:
+                raise AuthenticationError(
+                    "Session expired and could not be re-authenticated"
+                )
+
+        if reader.failed:
+            raise PixelError(reader.scalar_output, reader.expression, index)
+        if not reader.found:
+            raise ValueError(
+                f"The runPixel response has no pixel at index {index}: {reader.error_message}"
+            )
+        if not reader.is_list:
+            raise ValueError(
+                f"The output of pixel {index} is not a list"
+                + (f" at {item_path!r}" if item_path else "")
+            )
+
+        self.session_validated_at = time.monotonic()
+
     def logout(self) -> None:
         """Closes the connection to the server."""
-        requests.get(self.main_url + "/logout/all", cookies=self.cookies)
+        if self.stream_multiplexer is not None:
+            self.stream_multiplexer.close()
+        if self.call_dispatcher is not None:
+            self.call_dispatcher.close()
+        try:
+            self.session.get(self.main_url + "/logout/all", cookies=self.cookies)
+        finally:
+            # release the pooled connections even if the logout call fails
+            self.session.close()
         self.cookies = None  # reset the connection attributes for the class
 
-    def send_request(self, payload_struct: Dict) -> None:
+    def register_monitor(self, epoc: str) -> Future:
         """
-        Constructs the pixel payload from a PayloadStruct for various server resources such as ModelEngine, StorageEngine and DatabaseEngine
+        Register a future that `send_request` resolves with the response PayloadStruct for `epoc`.
+
+        Args:
+            epoc (`str`): The epoc of the PayloadStruct about to be sent
+
+        Returns:
+            `Future`: The future for this call, each epoc can only be registered once at a time
+        """
+        future = Future()
+        with self.monitors_lock:
+            if epoc in self.monitors:
+                raise ValueError(f"Epoc {epoc} already has a call waiting for it")
+            self.monitors[epoc] = future
+        return future
+
+    def release_monitor(self, epoc: str) -> Optional[Future]:
+        """Remove the future registered for `epoc` once its caller is done with it."""
+        with self.monitors_lock:
+            return self.monitors.pop(epoc, None)
+
+    def submit_request(self, payload_struct: Dict) -> Future:
+        """
+        Queue a PayloadStruct to be sent together with other engine calls made within `call_batch_window` seconds.
 
         Args:
             payload_struct (`dict`): the actual payload being sent to the AI Server
 
         Returns:
-            `None`
+            `Future`: Resolved with the response PayloadStruct for the struct's epoc
         """
+        with self.monitors_lock:
+            if self.call_dispatcher is None:
+                from ai_server.server_resources.call_dispatcher import CallDispatcher
+
+                self.call_dispatcher = CallDispatcher(
+                    self,
+                    window=self.call_batch_window,
+                    max_batch=self.call_batch_size,
+                )
+            call_dispatcher = self.call_dispatcher
+        return call_dispatcher.submit(payload_struct)
 
-        # this is a synchronous call
-        # but I dont want to bother the server proxy and leave it as is
+    def send_request(self, payload_struct: Dict) -> Dict:
+        """
+        Constructs the pixel payload from a PayloadStruct for various server resources such as ModelEngine, StorageEngine and DatabaseEngine
+
+        Args:
+            payload_struct (`dict`): the actual payload being sent to the AI Server
+
+        Returns:
+            `Dict`: The response PayloadStruct, which also resolves the future registered for its epoc
+        """
         epoc = payload_struct["epoc"]
+        with self.monitors_lock:
+            future = self.monitors.get(epoc)
 
-        input_payload_message = json.dumps(payload_struct, ensure_ascii=False)
+        input_payload_message = self.codec.dumps(payload_struct)
 
         logger.info("Sending a PayloadStruct " + input_payload_message)
 
         # RemoteEngineRun is responsible for handling ModelEngine, StorageEngine and DatabaseEngine via ServerClient
-        output_payload_message = self.run_pixel(
-            payload='RemoteEngineRun(payload="<e>' + input_payload_message + '</e>");',
-            insight_id=payload_struct["insightId"],
-        )
+        try:
+            output_payload_message = self.run_pixel(
+                payload=remote_engine_run_pixel(input_payload_message),
+                insight_id=payload_struct["insightId"],
+            )
+        except Exception as e:
+            if future is not None:
+                future.set_exception(e)
+            raise
 
-        if epoc in self.monitors:
-            self.monitors[epoc] = output_payload_message
+        if future is not None:
+            future.set_result(output_payload_message)
+        return output_payload_message
 
     def get_open_insights(self) -> List[str]:
         """
@@ -500,8 +1092,31 @@ class ServerClient:
             else:
                 self.cur_insight = None
 
+    def get_data_product(self, project_id: str, insight_id: str, sql: str) -> Dict:
+        """
+        Run a SQL statement against a saved insight (data product) and return the raw jdbc_json response.
+
+        Args:
+            project_id (`str`): Given project/app unique identifier
+            insight_id (`str`): Shared insight indentifier.
+            sql (`str`): SQL statement that is executable on the frames within the data product
+
+        Returns:
+            `Dict`: The response with the `columns` and the `dataArray` (or `data`) rows
+        """
+        response = self.session.get(
+            f"{self.main_url}/project-{project_id}/jdbc_json",
+            params={"insightId": insight_id, "open": "true", "sql": sql},
+            cookies=self.cookies,
+        )
+        return self.codec.loads(response.content)
+
     def import_data_product(
-        self, project_id: str, insight_id: str, sql: str
+        self,
+        project_id: str,
+        insight_id: str,
+        sql: str,
+        cache_ttl: Optional[float] = None,
     ) -> Union[pd.DataFrame, None]:
         """
         Accesses data within a saved insight (data product) via a REST API.
@@ -513,29 +1128,67 @@ class ServerClient:
             Shared insight indentifier.
         sql (`bool`):
             SQL statement that is executable on the frames within the data product
+        cache_ttl (`Optional[float]`):
+            If set, the result is cached for this many seconds and the same (project_id, insight_id, sql) is answered
+            from the cache instead of the server. Each call gets its own copy of the cached DataFrame
 
         Returns:
           `pd.DataFrame` Pandas Dataframe based on the SQL statement passed in
         """
-        base_url = (
-            self.main_url
-            + "/project-"
-            + project_id
-            + "/jdbc_json?insightId="
-            + insight_id
-            + "&open=true&sql="
-        )
+        cache_key = (project_id, insight_id, sql)
+        if cache_ttl:
+            cached = self.data_product_cache.get(cache_key)
+            if cached is not None:
+                return cached.copy()
 
-        dataProductUrl = base_url + sql
-        response = requests.get(dataProductUrl, cookies=self.cookies).json()
+        df = data_product_frame(self.get_data_product(project_id, insight_id, sql))
 
-        try:
-            return pd.DataFrame(response["dataArray"], columns=response["columns"])
-        except:
-            try:
-                return pd.DataFrame(response["data"], columns=response["columns"])
-            except:
-                return None
+        if cache_ttl and df is not None:
+            self.data_product_cache.set(cache_key, df.copy(), ttl=cache_ttl)
+        return df
+
+    def iter_data_product(
+        self,
+        project_id: str,
+        insight_id: str,
+        sql: str,
+        page_size: int = 50000,
+    ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Page through a data product, yielding one DataFrame of at most `page_size` rows per request.
+
+        Each page wraps `sql` in a `SELECT * FROM (...) LIMIT/OFFSET` query, so only one page is held in memory at a
+        time. Include an ORDER BY in `sql` if the pages must follow a stable order.
+
+        Args:
+            project_id (`str`): Given project/app unique identifier
+            insight_id (`str`): Shared insight indentifier.
+            sql (`str`): SQL statement that is executable on the frames within the data product
+            page_size (`int`): Number of rows requested per page
+
+        Returns:
+            `Generator[pd.DataFrame]`: The pages in order, the last one may be shorter than `page_size`
+        """
+        offset = 0
+        while True:
+            df = data_product_frame(
+                self.get_data_product(
+                    project_id, insight_id, paginate_sql(sql, page_size, offset)
+                )
+            )
+            if df is None:
+                raise RuntimeError(
+                    f"Could not read rows {offset}-{offset + page_size} of the data product"
+                )
+            if len(df) > 0:
+                yield df
+            if len(df) < page_size:
+                return
+            offset += page_size
+
+    def clear_data_product_cache(self) -> None:
+        """Drop every cached `import_data_product` result."""
+        self.data_product_cache.clear()
 
     def upload_files(
         self,
@@ -543,6 +1196,7 @@ class ServerClient:
         project_id: Optional[str] = None,
         insight_id: Optional[str] = None,
         path: Optional[str] = None,
+        max_workers: int = 1,
     ) -> List[str]:
         """
         Uploads files from the local device to the server.
@@ -556,6 +1210,9 @@ class ServerClient:
                 Given project/app unique identifier
             path (Optional[`str`]):
                 Specific upload path
+            max_workers (`int`):
+                Number of files uploaded at once. Above 1 the upload goes through `upload_files_parallel` and a
+                `TransferError` is raised after all files were attempted if any of them failed
 
         Returns (`List[str]`):
             List of file names that have been successfully uploaded
@@ -563,49 +1220,155 @@ class ServerClient:
         if not files:
             raise Exception("Must provide atleast one file to upload")
 
-        # .../Monolith/api/uploadFile/baseUpload?insightId=de43ce0d-db2e-4ab9-a807-336bb86c4ea0&projectId=4c14bc58-973f-4293-87ed-a5d32c24f418&path=version/assets/
         if isinstance(files, str):
             files = [files]
 
-        param = ""
-        path = path or ""
-
-        if insight_id or project_id or path:
-            if insight_id == None:
-                insight_id = self.cur_insight
+        if max_workers > 1:
+            results = self.upload_files_parallel(
+                files,
+                project_id=project_id,
+                insight_id=insight_id,
+                path=path,
+                max_workers=max_workers,
+            )
+            failed = [result for result in results if not result.ok]
+            if failed:
+                raise TransferError(
+                    f"{len(failed)} of {len(results)} files failed to upload, first error: {failed[0].error}",
+                    results,
+                )
+            return [result.file_name for result in results]
 
-            param += f"insightId={insight_id}"
+        upload_post_request = get_upload_url(
+            self.main_url, self.cur_insight, project_id, insight_id, path
+        )
 
-            if project_id:
-                if param:
-                    param += "&"
-                param += f"projectId={project_id}"
+        logger.info("The upload url is " + upload_post_request)
 
-            if path:
-                if param:
-                    param += "&"
-                param += f"path={path}"
-        else:
-            param += f"insightId={self.cur_insight}"
+        insight_file_paths = []
+        for filepath in files:
+            insight_file_paths.append(self.upload_file(filepath, upload_post_request))
 
-        param = f"?{param}"
+        return insight_file_paths
 
-        upload_post_request = f"{self.main_url}/uploadFile/baseUpload{param}"
+    def upload_file(self, filepath: str, upload_url: str) -> str:
+        """
+        Uploads a single file to an upload url built by `get_upload_url`.
 
-        logger.info("The upload url is " + upload_post_request)
+        Args:
+            filepath (`str`): Path of the local file
+            upload_url (`str`): The /uploadFile/baseUpload url including its query parameters
 
-        insight_file_paths = []
-        for filepath in files:
+        Returns (`str`):
+            The file name the server stored the file under
+        """
+        if (
+            self.upload_stream_threshold is not None
+            and os.path.getsize(filepath) >= self.upload_stream_threshold
+        ):
+            # large files are streamed from disk so memory use does not grow with the file size
+            with MultipartFileEncoder(filepath) as encoder:
+                response = self.session.post(
+                    upload_url,
+                    cookies=self.cookies,
+                    data=encoder,
+                    headers={
+                        **self.required_headers,
+                        "Content-Type": encoder.content_type,
+                    },
+                )
+        else:
             with open(filepath, "rb") as fobj:
-                response = requests.post(
-                    upload_post_request,
+                response = self.session.post(
+                    upload_url,
                     cookies=self.cookies,
                     files={"file": fobj},
                     headers=self.required_headers,
                 )
-                insight_file_paths.append(response.json()[0]["fileName"])
+        response.raise_for_status()
+        return self.codec.loads(response.content)[0]["fileName"]
 
-        return insight_file_paths
+    def upload_files_parallel(
+        self,
+        files: List[str],
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+        path: Optional[str] = None,
+        max_workers: int = 4,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        progress_callback: Optional[Callable[[TransferProgress], None]] = None,
+    ) -> List[UploadResult]:
+        """
+        Uploads files from the local device to the server on a bounded pool of worker threads.
+
+        Each file is retried on its own, a file that still fails is reported in its result instead of aborting the
+        remaining uploads. Keep `max_workers` at or below the client's `pool_maxsize` so every worker reuses a pooled
+        connection.
+
+        Args:
+            files (`List[str]`):
+                List of file paths to upload from local device
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+            path (Optional[`str`]):
+                Specific upload path
+            max_workers (`int`):
+                Maximum number of files uploaded at once
+            retries (`int`):
+                How many times a failed file is retried
+            retry_backoff (`float`):
+                Seconds before the first retry of a file, doubled for each following retry
+            progress_callback (Optional[`Callable`]):
+                Called with a `TransferProgress` (files done, files/s, MB/s) each time a file finishes
+
+        Returns (`List[UploadResult]`):
+            One result per file in the order of `files`, with the server file name or the error
+        """
+        if not files:
+            raise Exception("Must provide atleast one file to upload")
+
+        if isinstance(files, str):
+            files = [files]
+
+        upload_post_request = get_upload_url(
+            self.main_url, self.cur_insight, project_id, insight_id, path
+        )
+
+        logger.info("The upload url is " + upload_post_request)
+
+        sizes = [os.path.getsize(f) if os.path.exists(f) else 0 for f in files]
+        progress = TransferProgress(len(files), sum(sizes))
+
+        def on_done(task):
+            progress.record(task.ok, sizes[task.index])
+            if progress_callback is not None:
+                progress_callback(progress)
+
+        tasks = map_ordered(
+            lambda filepath: self.upload_file(filepath, upload_post_request),
+            files,
+            max_workers=max_workers,
+            retries=retries,
+            retry_backoff=retry_backoff,
+            on_done=on_done,
+        )
+
+        logger.info(f"Uploaded files: {progress}")
+
+        return [
+            UploadResult(
+                filepath=task.item,
+                file_name=task.value,
+                error=task.error,
+                size=sizes[task.index],
+                attempts=task.attempts,
+                elapsed=task.elapsed,
+            )
+            for task in tasks
+        ]
 
     def download_file(
         self,
@@ -613,10 +1376,17 @@ class ServerClient:
         project_id: Optional[str] = None,
         insight_id: Optional[str] = None,
         custom_filename: str = None,
+        chunk_size: int = 8 * 1024 * 1024,
+        max_workers: int = 4,
+        retries: int = 2,
     ) -> str:
         """
         Download files from the server to the local device.
 
+        If the server supports Range requests, files larger than `chunk_size` are fetched as parallel byte ranges into
+        a preallocated `<filename>.part` file. If a download fails part way, calling `download_file` again with the same
+        target filename only fetches the missing ranges. Otherwise the file is streamed on a single connection.
+
         Args:
             file (`str`):
                 The file path on the server to download
@@ -626,6 +1396,12 @@ class ServerClient:
                 Given project/app unique identifier
             custom_filename (Optional[`str`]):
                 A custom filename for the download
+            chunk_size (`int`):
+                Size in bytes of each byte range requested
+            max_workers (`int`):
+                Maximum number of ranges downloaded at once
+            retries (`int`):
+                How many times a failed range is retried before the download fails
 
         Returns (`str`):
             The file name that was downloaded
@@ -633,26 +1409,13 @@ class ServerClient:
         if not file:
             raise Exception("Must provide a file to download")
 
-        # Construct the pixel statement
-        project_param = ""
-        if project_id is not None and project_id != "":
-            project_param = ",space=[{project_id}]"
+        download_get_url = self.get_download_url(file, project_id, insight_id)
 
-        download_asset_pixel = f"DownloadAsset(filePath=['{file}']{project_param})"
-        download_file_key = self.run_pixel(
-            payload=download_asset_pixel, insight_id=insight_id
+        # the first request asks for the first range, it tells us whether the server supports ranges at all
+        probe_headers = {"Range": f"bytes=0-{chunk_size - 1}"}
+        response = self.session.get(
+            download_get_url, cookies=self.cookies, headers=probe_headers, stream=True
         )
-
-        insight_param = ""
-        if insight_id:
-            insight_param = insight_id
-        else:
-            insight_param = self.cur_insight
-
-        download_get_url = f"{self.main_url}/engine/downloadFile?insightId={insight_param}&fileKey={download_file_key}"
-
-        # Make the GET request
-        response = requests.get(download_get_url, cookies=self.cookies, stream=True)
         response.raise_for_status()
 
         # Determine filename
@@ -667,14 +1430,387 @@ class ServerClient:
         unique_filename = get_unique_filename(filename)
 
         # Download and save the file
-        with open(unique_filename, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:  # Filter out keep-alive chunks
-                    file.write(chunk)
+        RangedDownload(
+            self.session,
+            download_get_url,
+            unique_filename,
+            cookies=self.cookies,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+            retries=retries,
+        ).run(response)
 
         logger.info(f"File downloaded successfully: {unique_filename}")
         return unique_filename
 
+    def get_download_url(
+        self,
+        file: str,
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ) -> str:
+        """
+        Run DownloadAsset for a server file and build the /engine/downloadFile url that serves it.
+
+        Args:
+            file (`str`):
+                The file path on the server to download
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+
+        Returns (`str`):
+            The download url
+        """
+        download_asset_pixel = get_download_asset_pixel(file, project_id)
+        download_file_key = self.run_pixel(
+            payload=download_asset_pixel, insight_id=insight_id
+        )
+
+        insight_param = ""
+        if insight_id:
+            insight_param = insight_id
+        else:
+            insight_param = self.cur_insight
+
+        return f"{self.main_url}/engine/downloadFile?insightId={insight_param}&fileKey={download_file_key}"
+
+    def open_download(
+        self,
+        file: str,
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ) -> DownloadStream:
+        """
+        Open a server file as a read-only stream, nothing is written to disk.
+
+        Example:
+
+        ```python
+        >>> with server_client.open_download("version/assets/results.csv") as f:
+        ...     df = pd.read_csv(f)
+        ```
+
+        Args:
+            file (`str`):
+                The file path on the server to download
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+
+        Returns (`DownloadStream`):
+            A readable file-like object over the response body, close it to release the connection
+        """
+        if not file:
+            raise Exception("Must provide a file to download")
+
+        download_get_url = self.get_download_url(file, project_id, insight_id)
+        response = self.session.get(download_get_url, cookies=self.cookies, stream=True)
+        response.raise_for_status()
+
+        filename = get_filename_from_url(
+            download_get_url, response.headers, Path(file).name
+        )
+        return DownloadStream(response, filename)
+
+    def download_bytes(
+        self,
+        file: str,
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ) -> bytes:
+        """
+        Download a server file into memory.
+
+        Args:
+            file (`str`):
+                The file path on the server to download
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+
+        Returns (`bytes`):
+            The content of the file
+        """
+        with self.open_download(file, project_id, insight_id) as stream:
+            return stream.readall()
+
+    def download_into(
+        self,
+        file: str,
+        buffer: Union[bytearray, memoryview],
+        project_id: Optional[str] = None,
+        insight_id: Optional[str] = None,
+    ) -> int:
+        """
+        Download a server file into a caller supplied writable buffer.
+
+        Args:
+            file (`str`):
+                The file path on the server to download
+            buffer (`Union[bytearray, memoryview]`):
+                Writable buffer, e.g. a preallocated `bytearray` or a `memoryview` over shared memory, large enough for the file
+            project_id (Optional[`str`]):
+                Given project/app unique identifier
+            insight_id (Optional[`str`]):
+                Unique identifier for the temporal worksapce where actions are being isolated
+
+        Returns (`int`):
+            The number of bytes written to the start of `buffer`
+        """
+        view = memoryview(buffer).cast("B")
+        with self.open_download(file, project_id, insight_id) as stream:
+            if stream.content_length is not None and stream.content_length > len(view):
+                raise ValueError(
+                    f"{file} is {stream.content_length} bytes but the buffer only holds {len(view)}"
+                )
+
+            written = 0
+            while written < len(view):
+                read = stream.readinto(view[written:])
+                if not read:
+                    return written
+                written += read
+
+            if stream.read(1):
+                raise ValueError(
+                    f"{file} is larger than the buffer of {len(view)} bytes"
+                )
+            return written
+
+
+def get_upload_url(
+    main_url: str,
+    cur_insight: str,
+    project_id: Optional[str] = None,
+    insight_id: Optional[str] = None,
+    path: Optional[str] = None,
+) -> str:
+    """Build the /uploadFile/baseUpload url, defaulting to the current insight"""
+    # .../Monolith/api/uploadFile/baseUpload?insightId=de43ce0d-db2e-4ab9-a807-336bb86c4ea0&projectId=4c14bc58-973f-4293-87ed-a5d32c24f418&path=version/assets/
+    param = ""
+    path = path or ""
+
+    if insight_id or project_id or path:
+        if insight_id == None:
+            insight_id = cur_insight
+
+        param += f"insightId={insight_id}"
+
+        if project_id:
+            if param:
+                param += "&"
+            param += f"projectId={project_id}"
+
+        if path:
+            if param:
+                param += "&"
+            param += f"path={path}"
+    else:
+        param += f"insightId={cur_insight}"
+
+    return f"{main_url}/uploadFile/baseUpload?{param}"
+
+
+def get_download_asset_pixel(file: str, project_id: Optional[str] = None) -> str:
+    """Build the DownloadAsset pixel that returns the file key for a server file"""
+    project_param = ""
+    if project_id is not None and project_id != "":
+        project_param = f",space=[{project_id}]"
+
+    return f"DownloadAsset(filePath=['{file}']{project_param})"
+
+
+def data_product_frame(response: Dict) -> Optional[pd.DataFrame]:
+    """Build the DataFrame for a jdbc_json response, None if it carries no rows."""
+    if not isinstance(response, dict) or "columns" not in response:
+        return None
+
+    rows = response.get("dataArray")
+    if rows is None:
+        rows = response.get("data")
+    if rows is None:
+        return None
+
+    # handing the decoded rows straight to pandas measured faster than transposing them into columns first
+    try:
+        return pd.DataFrame(rows, columns=response["columns"])
+    except ValueError:
+        return None
+
+
+def paginate_sql(sql: str, limit: int, offset: int) -> str:
+    """Wrap a SQL statement so it only returns `limit` rows starting at `offset`."""
+    sql = sql.strip().rstrip(";")
+    return f"SELECT * FROM ({sql}) AS data_product_page LIMIT {limit} OFFSET {offset}"
+
+
+def remote_engine_run_pixel(input_payload_message: str) -> str:
+    """Wrap an encoded PayloadStruct in the RemoteEngineRun pixel that hands it to the engine."""
+    return 'RemoteEngineRun(payload="<e>' + input_payload_message + '</e>");'
+
+
+def chunk_payloads(
+    payloads: List[str], batch_size: Optional[int] = None
+) -> Generator[List[str], None, None]:
+    """Split `payloads` into lists of at most `batch_size` entries."""
+    payloads = list(payloads)
+    if not batch_size:
+        batch_size = max(len(payloads), 1)
+    for start in range(0, len(payloads), batch_size):
+        yield payloads[start : start + batch_size]
+
+
+def join_pixel_batch(payloads: List[str]) -> str:
+    """Join pixel payloads into a single `;` separated expression."""
+    return "".join(payload.strip().rstrip(";") + ";" for payload in payloads)
+
+
+def split_pixel_batch(
+    response_dict: Dict, payloads: List[str], full_response: bool = False
+) -> List[Any]:
+    """
+    Map the pixelReturn entries of a batched runPixel response back to the payloads that produced them.
+
+    Args:
+        response_dict (`Dict`): The runPixel response for `join_pixel_batch(payloads)`
+        payloads (`List[str]`): The payloads in the order they were sent
+        full_response (`bool`): Return the raw pixelReturn entries instead of their outputs
+
+    Returns:
+        `List[Any]`: One output (or entry) per payload, failed payloads are returned as `PixelError`
+    """
+    pixel_return = response_dict["pixelReturn"]
+    if len(pixel_return) != len(payloads):
+        raise ValueError(
+            f"Sent {len(payloads)} pixels but received {len(pixel_return)} results, "
+            "each batched payload must contain exactly one pixel"
+        )
+
+    results = []
+    for index, (payload, entry) in enumerate(zip(payloads, pixel_return)):
+        if "ERROR" in entry["operationType"]:
+            results.append(PixelError(entry["output"], payload, index))
+        elif full_response:
+            results.append(entry)
+        else:
+            output = entry["output"]
+            results.append(output[0] if isinstance(output, list) else output)
+    return results
+
+
+class PixelBatch:
+    """Payloads queued by `ServerClient.pixel_batch`, sent when the `with` block exits."""
+
+    def __init__(self):
+        self.pending: List[Tuple[str, Future]] = []
+
+    def add(self, payload: str) -> Future:
+        """Queue a pixel payload and return a `Future` for its output."""
+        future = Future()
+        self.pending.append((payload, future))
+        return future
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+
+class PollSchedule:
+    """Delay between polls of /engine/partial: tight while chunks arrive, exponential backoff while idle."""
+
+    def __init__(
+        self, poll_interval: float, max_poll_interval: float, poll_backoff: float
+    ):
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.poll_backoff = poll_backoff
+        self.delay = poll_interval
+
+    def next_delay(self, got_chunk: bool) -> float:
+        """Seconds to wait before the next poll, given whether the last poll returned a chunk."""
+        if got_chunk:
+            self.delay = self.poll_interval
+            return self.delay
+
+        delay = self.delay
+        self.delay = min(self.delay * self.poll_backoff, self.max_poll_interval)
+        return delay
+
+
+class StreamStats:
+    """Poll and chunk counters for a single stream, used to tune the polling settings."""
+
+    def __init__(self):
+        self.job_id: Optional[str] = None
+        self.polls: int = 0
+        self.chunks: int = 0
+        self.started_at: Optional[float] = None
+        self.first_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def start(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.started_at = time.monotonic()
+
+    def add_chunk(self) -> None:
+        self.chunks += 1
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def empty_polls(self) -> int:
+        return self.polls - self.chunks
+
+    @property
+    def time_to_first_chunk(self) -> Optional[float]:
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    def __repr__(self) -> str:
+        ttfc = self.time_to_first_chunk
+        return (
+            f"StreamStats(polls={self.polls}, chunks={self.chunks}, "
+            f"time_to_first_chunk={'None' if ttfc is None else f'{ttfc:.3f}'}, "
+            f"elapsed={self.elapsed():.3f})"
+        )
+
+
+def is_login_required(response_dict: Any) -> bool:
+    """Check whether a parsed JSON response carries a login-required error message or pixelReturn"""
+    if not isinstance(response_dict, dict):
+        return False
+
+    messages = [response_dict.get("errorMessage")]
+    for pixel_return in response_dict.get("pixelReturn") or []:
+        if "ERROR" in (pixel_return.get("operationType") or []):
+            messages.append(pixel_return.get("output"))
+
+    return any(
+        isinstance(message, str)
+        and any(marker in message.lower() for marker in LOGIN_REQUIRED_MESSAGES)
+        for message in messages
+    )
+
+
+def is_login_page(response) -> bool:
+    """Check whether a non JSON response is the login page, rather than e.g. an error page from a proxy"""
+    if "text/html" not in response.headers.get("Content-Type", ""):
+        return False
+    if response.status_code in (401, 403):
+        return True
+    # only an HTML body is read, a streamed JSON body is left to the caller
+    return response.status_code < 400 and "login" in response.text.lower()
+
 
 def get_filename_from_url(url, headers=None, default_name=None):
     """Extract filename from URL or Content-Disposition header"""
@@ -716,3 +1852,13 @@ def get_unique_filename(filename):
 
 class AuthenticationError(Exception):
     pass
+
+
+class PixelError(Exception):
+    """A single pixel in a batch that returned an ERROR operationType."""
+
+    def __init__(self, output: Any, expression: str, index: int):
+        super().__init__(output)
+        self.output = output
+        self.expression = expression
+        self.index = index
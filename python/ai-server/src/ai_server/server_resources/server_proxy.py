@@ -1,10 +1,29 @@
 from typing import List, Dict, Any, Optional, Generator
 
+from collections.abc import Sequence
+from concurrent.futures import Future
+import functools
+import itertools
 import logging
 import threading
 
+from ai_server.server_resources.concurrency import chain_future
+
 logger: logging.Logger = logging.getLogger(__name__)
 
+# epocs key the client's monitors, so they are unique across every proxy in the process rather than per instance
+EPOC_COUNTER = itertools.count(1)
+EPOC_LOCK = threading.Lock()
+
+# every jsonpickle envelope is a JSON object or array with at least one tag such as "py/object" or "py/tuple"
+JSONPICKLE_TAG = '"py/'
+
+
+def next_epoc() -> int:
+    """Allocate the next process wide epoc number."""
+    with EPOC_LOCK:
+        return next(EPOC_COUNTER)
+
 
 class ServerProxy:
     """This class is used to transform model, database, storage and vector payloads into PayloadStructs before sending it to the RemoteEngineRunReactor via the runPixel endpoint"""
@@ -15,8 +34,8 @@ class ServerProxy:
         """
         Initialize the ServerProxy instance.
         """
+        # the last epoc this proxy allocated
         self.epoc = 0
-        self.condition = threading.Condition()
         from ai_server.server_resources.server_client import ServerClient
 
         self.server = ServerClient.da_server
@@ -24,8 +43,8 @@ class ServerProxy:
             raise Exception("Please authenticate using your access and secret keys.")
 
     def get_next_epoc(self) -> str:
-        """This method atomically increments the epoc count by one plus the current value."""
-        self.epoc = self.epoc + 1
+        """Atomically allocate an epoc that no other call in this process uses, even from other threads or proxies."""
+        self.epoc = next_epoc()
         return f"py_{self.epoc}"
 
     def comm(
@@ -37,11 +56,11 @@ class ServerProxy:
         method_args: Optional[List[Any]] = [],
         method_arg_types: Optional[List[str]] = [],
         insight_id: Optional[str] = None,
-    ) -> None:
+    ) -> Future:
         """
         This method in responsible for:
             - converting the args into a PayloadStruct
-            - adds itself to the clients monitor block
+            - registers a future for the epoc in the clients monitor block
             - forwards the PayloadStruct to the client to be sent to the Tomcat Server
 
         Args:
@@ -54,29 +73,27 @@ class ServerProxy:
             insight_id (`Optional[str]`): The unique identifier for the insight
 
         Returns:
-            `None`
+            `Future`: Resolved with the response PayloadStruct for `epoc`
         """
 
         # converts this into a PayloadStruct
-        payload = {
-            "epoc": epoc,
-            "response": False,
-            "engineType": engine_type,
-            "interim": False,
-            "objId": engine_id,  # all the method stuff will come here and below
-            "methodName": method_name,
-            "payload": method_args,
-            "payloadClassNames": method_arg_types,
-            "insightId": (
+        payload = build_payload_struct(
+            epoc=epoc,
+            engine_type=engine_type,
+            engine_id=engine_id,
+            method_name=method_name,
+            method_args=method_args,
+            method_arg_types=method_arg_types,
+            insight_id=(
                 insight_id if insight_id is not None else self.server.cur_insight
             ),
-            "operation": "ENGINE",
-        }
+        )
 
-        # adds itself to the monitor block
-        self.server.monitors.update({epoc: self.condition})
+        # adds itself to the monitor block, the future is resolved with the response to this epoc only
+        future = self.server.register_monitor(epoc)
         logger.info("The server is ServerClient object")
         self.server.send_request(payload)
+        return future
 
     def call(
         self,
@@ -103,41 +120,256 @@ class ServerProxy:
             `List[Dict]`: A list that contains the response from the Tomcat server engine.
         """
         epoc = self.get_next_epoc()
-        self.comm(
-            epoc=epoc,
+        try:
+            future = self.comm(
+                epoc=epoc,
+                engine_type=engine_type,
+                engine_id=engine_id,
+                method_name=method_name,
+                method_args=method_args,
+                method_arg_types=method_arg_types,
+                insight_id=insight_id,
+            )
+            new_payload_struct = future.result()
+        finally:
+            self.server.release_monitor(epoc)
+
+        return payload_output(new_payload_struct)
+
+    def call_async(
+        self,
+        engine_type: str,
+        engine_id: str,
+        method_name: str = None,
+        method_args: Optional[List[Any]] = [],
+        method_arg_types: Optional[List[str]] = [],
+        insight_id: Optional[str] = None,
+    ) -> Future:
+        """
+        Like `call`, but returns immediately with a future for the engine's response.
+
+        Calls made within the client's `call_batch_window` (from any thread) are sent together as one runPixel with a
+        RemoteEngineRun pixel per call, so N calls cost about one round trip instead of N.
+
+        Example:
+
+        ```python
+        >>> futures = [proxy.call_async(engine_type="database", engine_id=engine_id, method_name="execQuery", method_args=[query, "json"], method_arg_types=["java.lang.String", "java.lang.String"]) for query in queries]
+        >>> outputs = [future.result() for future in futures]
+        ```
+
+        Args:
+            engine_type (`str`): The engine type that will be called from the Tomcat server
+            engine_id (`str`): The unique identifier of the engine being called
+            method_name (`str`): The IEngine method name that is available in the `engine_type`
+            method_args (`Optional[List[Any]]`): A list of objects to be sent to the IEngine method as inputs
+            method_arg_types (`Optional[List[str]]`): A list of Java class names that represent the method argument types
+            insight_id (`Optional[str]`): The unique identifier for the insight
+
+        Returns:
+            `Future`: Resolved with the same list `call` returns, or with the exception `call` would raise
+        """
+        payload = build_payload_struct(
+            epoc=self.get_next_epoc(),
             engine_type=engine_type,
             engine_id=engine_id,
             method_name=method_name,
             method_args=method_args,
             method_arg_types=method_arg_types,
-            insight_id=insight_id,
+            insight_id=(
+                insight_id if insight_id is not None else self.server.cur_insight
+            ),
         )
+        return chain_future(self.server.submit_request(payload), payload_output)
+
+    def process_payload(self, payload_struct: Dict, lazy: bool = False) -> Dict:
+        """
+        Decode the jsonpickle encoded values in the payload of a response PayloadStruct.
+
+        Args:
+            payload_struct (`Dict`): The response PayloadStruct, its payload list is decoded in place
+            lazy (`bool`): If True, the payload is replaced by a `LazyPayload` that decodes each value when it is first accessed
+
+        Returns:
+            `Dict`: The same PayloadStruct
+        """
+        return decode_payload(payload_struct, lazy=lazy)
 
-        new_payload_struct = self.server.monitors.pop(epoc)
-
-        if "ex" in new_payload_struct:
-            # if exception, convert it to an Exception and raise it
-            raise Exception(new_payload_struct["ex"])
-        else:
-            logger.info(f"answer is .. {new_payload_struct['payload']}")
-            return new_payload_struct["payload"]
-
-    def process_payload(self, payload_struct):
-        # try to see if the types are pickle
-        # if so unpickle it
-        import jsonpickle as jp
-
-        payload_data = None
-        if "payload" in payload_struct:
-            payload_data = payload_struct["payload"]
-        if payload_data is not None and isinstance(payload_data, List):
-            for data in payload_data:
-                index = payload_data.index(data)
-                try:
-                    orig_obj = data
-                    obj = jp.loads(orig_obj)
-                    payload_struct["payload"][index] = obj
-                except Exception as e:
-                    pass
 
+class AsyncServerProxy:
+    """asyncio counterpart of `ServerProxy` used by the async engines to send pixels and PayloadStructs through an `AsyncServerClient`"""
+
+    def __init__(self, server=None):
+        """
+        Initialize the AsyncServerProxy instance.
+
+        Args:
+            server (`Optional[AsyncServerClient]`): The client to send requests through. Defaults to the last `AsyncServerClient` created.
+        """
+        self.epoc = 0
+        from ai_server.server_resources.async_server_client import AsyncServerClient
+
+        self.server = server if server is not None else AsyncServerClient.da_server
+        if not self.server:
+            raise Exception("Please authenticate using your access and secret keys.")
+
+    def get_next_epoc(self) -> str:
+        """Allocate an epoc from the same process wide counter as `ServerProxy`."""
+        self.epoc = next_epoc()
+        return f"py_{self.epoc}"
+
+    async def call(
+        self,
+        engine_type: str,
+        engine_id: str,
+        method_name: str = None,
+        method_args: Optional[List[Any]] = [],
+        method_arg_types: Optional[List[str]] = [],
+        insight_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Send a PayloadStruct for an engine method to the server and return the method's output.
+
+        Args:
+            engine_type (`str`): The engine type that will be called from the Tomcat server
+            engine_id (`str`): The unique identifier of the engine being called
+            method_name (`str`): The IEngine method name that is available in the `engine_type`
+            method_args (`Optional[List[Any]]`): A list of objects to be sent to the IEngine method as inputs
+            method_arg_types (`Optional[List[str]]`): A list of Java class names that represent the method argument types
+            insight_id (`Optional[str]`): The unique identifier for the insight
+
+        Returns:
+            `List[Dict]`: A list that contains the response from the Tomcat server engine.
+        """
+        payload = build_payload_struct(
+            epoc=self.get_next_epoc(),
+            engine_type=engine_type,
+            engine_id=engine_id,
+            method_name=method_name,
+            method_args=method_args,
+            method_arg_types=method_arg_types,
+            insight_id=await self.server.resolve_insight(insight_id),
+        )
+
+        new_payload_struct = await self.server.send_request(payload)
+
+        return payload_output(new_payload_struct)
+
+    async def run_pixel_output(self, pixel: str, insight_id: Optional[str] = None):
+        """
+        Run a pixel and return the output of its first pixelReturn.
+
+        Raises:
+            RuntimeError: If the server returns an error.
+        """
+        output_payload_message = await self.server.run_pixel(
+            payload=pixel, insight_id=insight_id, full_response=True
+        )
+
+        if output_payload_message["pixelReturn"][0]["operationType"] == ["ERROR"]:
+            raise RuntimeError(output_payload_message["pixelReturn"][0]["output"])
+
+        return output_payload_message["pixelReturn"][0]["output"]
+
+
+@functools.lru_cache(maxsize=None)
+def import_jsonpickle():
+    import jsonpickle
+
+    return jsonpickle
+
+
+def is_jsonpickle(value: Any) -> bool:
+    """Whether `value` looks like a jsonpickle envelope, a JSON object or array string carrying a "py/..." tag"""
+    return (
+        isinstance(value, str) and value[:1] in ("{", "[") and JSONPICKLE_TAG in value
+    )
+
+
+def decode_value(value: Any) -> Any:
+    """Unpickle `value` if it is a jsonpickle envelope, anything else (or an envelope that fails) is returned as is"""
+    if not is_jsonpickle(value):
+        return value
+    try:
+        return import_jsonpickle().decode(value)
+    except Exception:
+        return value
+
+
+def decode_payload(payload_struct: Dict, lazy: bool = False) -> Dict:
+    """Decode the payload list of `payload_struct` in one pass, or wrap it in a `LazyPayload`. See `ServerProxy.process_payload`"""
+    payload_data = payload_struct.get("payload")
+    if not isinstance(payload_data, list):
         return payload_struct
+
+    if lazy:
+        payload_struct["payload"] = LazyPayload(payload_data)
+    else:
+        for index, value in enumerate(payload_data):
+            payload_data[index] = decode_value(value)
+    return payload_struct
+
+
+class LazyPayload(Sequence):
+    """Read-only list view of an engine payload that unpickles each value the first time it is accessed.
+
+    Example:
+
+    ```python
+    >>> payload = LazyPayload(['{"py/tuple": [1, 2]}', 3])
+    >>> payload[0]
+    (1, 2)
+    ```
+    """
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+        self.decoded = bytearray(len(values))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.values)))]
+        if not self.decoded[index]:
+            self.values[index] = decode_value(self.values[index])
+            self.decoded[index] = 1
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"LazyPayload({len(self.values)} values, {sum(self.decoded)} decoded)"
+
+
+def payload_output(new_payload_struct: Dict) -> List[Dict]:
+    """Return the payload of a response PayloadStruct, raising the engine's exception if it carries one"""
+    if "ex" in new_payload_struct:
+        # if exception, convert it to an Exception and raise it
+        raise Exception(new_payload_struct["ex"])
+    else:
+        logger.info(f"answer is .. {new_payload_struct['payload']}")
+        return new_payload_struct["payload"]
+
+
+def build_payload_struct(
+    epoc: str,
+    engine_type: str,
+    engine_id: str,
+    method_name: str,
+    method_args: Optional[List[Any]],
+    method_arg_types: Optional[List[str]],
+    insight_id: Optional[str],
+) -> Dict:
+    """Build the PayloadStruct the RemoteEngineRun reactor expects for an engine method call"""
+    return {
+        "epoc": epoc,
+        "response": False,
+        "engineType": engine_type,
+        "interim": False,
+        "objId": engine_id,  # all the method stuff will come here and below
+        "methodName": method_name,
+        "payload": method_args,
+        "payloadClassNames": method_arg_types,
+        "insightId": insight_id,
+        "operation": "ENGINE",
+    }
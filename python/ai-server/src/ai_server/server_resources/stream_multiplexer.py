@@ -0,0 +1,256 @@
+from typing import Any, Dict, Generator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+import threading
+import time
+
+from ai_server.server_resources.server_client import (
+    STREAM_FAILED_STATUSES,
+    STREAM_TERMINAL_STATUSES,
+    PollSchedule,
+    StreamStats,
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# put on a job's queue once the stream is complete
+_END_OF_STREAM = object()
+
+# seconds a consumer waits for a chunk before checking its deadline and the scheduler thread
+CONSUMER_CHECK_INTERVAL = 0.5
+
+
+class _MultiplexedJob:
+    """State of one stream registered with the multiplexer."""
+
+    def __init__(
+        self,
+        job_id: str,
+        schedule: PollSchedule,
+        timeout: Optional[float],
+        stats: StreamStats,
+    ):
+        self.job_id = job_id
+        self.schedule = schedule
+        self.timeout = timeout
+        self.stats = stats
+        self.chunks: queue.Queue = queue.Queue()
+        self.next_poll_at: float = time.monotonic()
+        self.in_flight: bool = False
+        self.started_streaming: bool = False
+        self.done: bool = False
+
+
+class StreamMultiplexer:
+    """Polls /engine/partial for every active stream of a `ServerClient` from one scheduler thread.
+
+    Each stream keeps its own `PollSchedule`, so a stream that is producing tokens is polled tightly while idle ones back off.
+    Due polls run on a small shared pool and their chunks are handed to the consuming generator through a queue, so the
+    number of concurrent streams is not tied to the number of threads polling the server.
+
+    Example:
+
+    ```python
+    >>> server_client = ServerClient(base=..., access_key=..., secret_key=..., multiplex_streams=True)
+    >>> # every stream_ask now goes through server_client.stream_multiplexer
+    >>> model.stream_ask("What is the capital of France?")
+    ```
+    """
+
+    def __init__(self, server, max_workers: int = 8):
+        self.server = server
+        self.max_workers = max_workers
+
+        self.jobs: Dict[str, _MultiplexedJob] = {}
+        self.condition = threading.Condition()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.scheduler: Optional[threading.Thread] = None
+        self.closed = False
+
+    @property
+    def active_jobs(self) -> int:
+        with self.condition:
+            return len(self.jobs)
+
+    def start(self) -> None:
+        """Start the scheduler thread and poll pool, called on the first stream."""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("StreamMultiplexer has been closed")
+            if self.scheduler is not None:
+                return
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="stream-poll"
+            )
+            self.scheduler = threading.Thread(
+                target=self._run, name="stream-multiplexer", daemon=True
+            )
+            self.scheduler.start()
+
+    def close(self) -> None:
+        """Stop polling and fail every stream that is still open."""
+        with self.condition:
+            self.closed = True
+            jobs = list(self.jobs.values())
+            self.jobs.clear()
+            self.condition.notify_all()
+
+        for job in jobs:
+            job.chunks.put(RuntimeError("StreamMultiplexer was closed"))
+
+        if self.scheduler is not None:
+            self.scheduler.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def stream(
+        self,
+        job_id: str,
+        schedule: PollSchedule,
+        timeout: Optional[float] = None,
+        stats: Optional[StreamStats] = None,
+    ) -> Generator[str, None, None]:
+        """
+        Register a job and yield its chunks as the scheduler polls them.
+
+        Closing the generator before the stream completes, or letting it be garbage collected, removes the job so it
+        is no longer polled.
+
+        Args:
+            job_id (`str`): The identifier of the job being run
+            schedule (`PollSchedule`): Polling schedule for this job
+            timeout (`float`): Seconds the stream may run before TimeoutError is raised
+            stats (`StreamStats`): Optional; filled in with the poll and chunk counts of this stream
+
+        Returns:
+            `Generator`: A generator that can be iterated through to get partials
+        """
+        if stats is None:
+            stats = StreamStats()
+        stats.start(job_id)
+
+        job = _MultiplexedJob(job_id, schedule, timeout, stats)
+        self.start()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("StreamMultiplexer has been closed")
+            self.jobs[job_id] = job
+            self.condition.notify_all()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                item = self._next_item(job, deadline)
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # abandoned or failed streams stop being polled
+            self._remove(job)
+
+        stats.finish()
+        logger.debug(f"Stream {job_id} finished: {stats}")
+
+    def _next_item(self, job: _MultiplexedJob, deadline: Optional[float]):
+        """Wait for the next chunk of `job`, without relying on the scheduler to enforce the timeout.
+
+        Raises:
+            TimeoutError: If the stream is past its deadline, or the scheduler thread stopped without finishing it
+        """
+        while True:
+            wait = CONSUMER_CHECK_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            try:
+                return job.chunks.get(timeout=wait)
+            except queue.Empty:
+                pass
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Stream {job.job_id} did not complete within {job.timeout} seconds"
+                )
+            scheduler = self.scheduler
+            if scheduler is None or not scheduler.is_alive():
+                raise TimeoutError(
+                    f"Stream {job.job_id} is no longer polled, the scheduler thread stopped"
+                )
+
+    def _remove(self, job: _MultiplexedJob) -> None:
+        with self.condition:
+            job.done = True
+            if self.jobs.get(job.job_id) is job:
+                del self.jobs[job.job_id]
+
+    def _due_jobs(self) -> List[_MultiplexedJob]:
+        """Jobs whose next poll is due, waiting on the condition until one is. Caller holds the condition."""
+        while not self.closed:
+            now = time.monotonic()
+            idle = [job for job in self.jobs.values() if not job.in_flight]
+            due = [job for job in idle if job.next_poll_at <= now]
+            if due:
+                return due
+
+            wait = min((job.next_poll_at for job in idle), default=now + 1) - now
+            self.condition.wait(timeout=wait)
+        return []
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                due = self._due_jobs()
+                if self.closed:
+                    return
+                for job in due:
+                    job.in_flight = True
+
+            for job in due:
+                self.executor.submit(self._poll, job)
+
+    def _poll(self, job: _MultiplexedJob) -> None:
+        try:
+            finished = self._poll_once(job)
+        except Exception as e:
+            job.chunks.put(e)
+            finished = True
+
+        with self.condition:
+            job.in_flight = False
+            if finished:
+                job.done = True
+                if self.jobs.get(job.job_id) is job:
+                    del self.jobs[job.job_id]
+            self.condition.notify_all()
+
+    def _poll_once(self, job: _MultiplexedJob) -> bool:
+        """Poll one job, hand any new chunk to its consumer and return whether the stream is over."""
+        if job.done:
+            return True
+
+        response: Dict[str, Any] = self.server.poll_partial(job.job_id)
+        job.stats.polls += 1
+
+        msg = response.get("message", {})
+        status = response.get("status")
+        new_chunk = msg.get("new", "")
+
+        if new_chunk:
+            job.started_streaming = True
+            job.stats.add_chunk()
+            job.chunks.put(new_chunk)
+        elif job.started_streaming and status in STREAM_TERMINAL_STATUSES:
+            job.chunks.put(_END_OF_STREAM)
+            return True
+        elif status in STREAM_FAILED_STATUSES:
+            raise RuntimeError(f"Stream failed or canceled. Status: {status}")
+
+        if job.timeout is not None and job.stats.elapsed() > job.timeout:
+            raise TimeoutError(
+                f"Stream {job.job_id} did not complete within {job.timeout} seconds"
+            )
+
+        job.next_poll_at = time.monotonic() + job.schedule.next_delay(bool(new_chunk))
+        return False
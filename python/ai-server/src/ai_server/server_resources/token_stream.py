@@ -0,0 +1,292 @@
+from typing import Callable, Iterable, Iterator, List, Optional
+import logging
+import math
+import queue
+import threading
+import time
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# put on the queue once the upstream chunks are exhausted
+_END_OF_STREAM = object()
+
+
+class TokenStreamStats:
+    """Timing of the chunks a `TokenStream` delivered, as seen by the consumer.
+
+    `pieces` counts the partials received from the server, each one or a few model tokens, and `chunks` the coalesced
+    chunks that were emitted. `blocked` is the time the reader spent waiting for a slow consumer.
+    """
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.first_chunk_at: Optional[float] = None
+        self.last_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.pieces: int = 0
+        self.chunks: int = 0
+        self.characters: int = 0
+        self.blocked: float = 0.0
+        self.gaps: List[float] = []
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+
+    def add_chunk(self, chunk: str, pieces: int) -> None:
+        now = time.monotonic()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        else:
+            self.gaps.append(now - self.last_chunk_at)
+        self.last_chunk_at = now
+        self.chunks += 1
+        self.pieces += pieces
+        self.characters += len(chunk)
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.pieces / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_gap(self) -> Optional[float]:
+        return sum(self.gaps) / len(self.gaps) if self.gaps else None
+
+    @property
+    def max_gap(self) -> Optional[float]:
+        return max(self.gaps) if self.gaps else None
+
+    def gap_percentile(self, p: float) -> Optional[float]:
+        """Nearest rank percentile of the gaps between emitted chunks, `p` in [0, 100]"""
+        if not self.gaps:
+            return None
+        ordered = sorted(self.gaps)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def __repr__(self) -> str:
+        def seconds(value: Optional[float]) -> str:
+            return "None" if value is None else f"{value:.3f}"
+
+        return (
+            f"TokenStreamStats(pieces={self.pieces}, chunks={self.chunks}, "
+            f"ttft={seconds(self.time_to_first_token)}, "
+            f"mean_gap={seconds(self.mean_gap)}, max_gap={seconds(self.max_gap)}, "
+            f"{self.tokens_per_second:.1f} tokens/s, blocked={self.blocked:.3f})"
+        )
+
+
+class TokenStream:
+    """Pushes the chunks of a stream to a consumer, coalescing small partials and applying backpressure.
+
+    A reader thread pulls the partials from `chunks` into a queue of at most `max_pending` entries. When the consumer
+    falls behind the queue fills up and the reader stops polling, so the server keeps accumulating the answer and the
+    next poll returns it as a single larger partial.
+
+    Partials are joined until the chunk holds at least `min_bytes` UTF-8 bytes or its first partial is `max_delay`
+    seconds old, whichever comes first. The defaults emit every partial as it arrives.
+
+    The chunks are consumed by iterating the stream, or pushed to `on_chunk` from a delivery thread (see `wait`).
+
+    Example:
+
+    ```python
+    >>> stream = model.open_stream("Tell me a story", min_bytes=64, max_delay=0.05)
+    >>> for chunk in stream:
+    ...     websocket.send(chunk)
+    >>> stream.stats
+    TokenStreamStats(pieces=412, chunks=38, ttft=0.412, mean_gap=0.061, max_gap=0.094, 57.3 tokens/s, blocked=0.000)
+    ```
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[str],
+        min_bytes: int = 0,
+        max_delay: Optional[float] = None,
+        max_pending: int = 64,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        stats: Optional[TokenStreamStats] = None,
+    ):
+        """
+        Args:
+            chunks (`Iterable[str]`): The partials, e.g. from `ServerClient.get_partial_responses`
+            min_bytes (`int`): Emit a chunk once it holds at least this many UTF-8 bytes
+            max_delay (`Optional[float]`): Emit a chunk at the latest this many seconds after its first partial
+                arrived, even if it is smaller than `min_bytes`. None waits for `min_bytes` or the end of the stream.
+            max_pending (`int`): Number of partials buffered before the reader waits for the consumer
+            on_chunk (`Optional[Callable[[str], None]]`): Called with every chunk from a delivery thread
+            stats (`Optional[TokenStreamStats]`): Filled in with the timing of the stream
+        """
+        if min_bytes < 0:
+            raise ValueError("min_bytes must not be negative")
+        if max_delay is not None and max_delay < 0:
+            raise ValueError("max_delay must not be negative")
+
+        self.min_bytes = min_bytes
+        self.max_delay = max_delay
+        self.on_chunk = on_chunk
+        self.stats = stats if stats is not None else TokenStreamStats()
+        if self.stats.started_at is None:
+            self.stats.start()
+
+        self._upstream = chunks
+        self._pending: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._closed = threading.Event()
+        self._consumed = False
+        self._error: Optional[BaseException] = None
+        self._reader = threading.Thread(
+            target=self._read, name="token-stream-reader", daemon=True
+        )
+        self._reader.start()
+
+        self._delivery: Optional[threading.Thread] = None
+        if on_chunk is not None:
+            self._delivery = threading.Thread(
+                target=self._deliver, name="token-stream-delivery", daemon=True
+            )
+            self._delivery.start()
+
+    def _read(self) -> None:
+        iterator = iter(self._upstream)
+        try:
+            for piece in iterator:
+                if piece and not self._put(piece):
+                    return
+                # the consumer is gone, do not poll for the next piece
+                if self._closed.is_set():
+                    return
+        except BaseException as e:
+            self._put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._put(_END_OF_STREAM)
+
+    def _put(self, item) -> bool:
+        """Queue `item`, waiting while the queue is full. False if the stream was closed meanwhile."""
+        if self._closed.is_set():
+            return False
+        try:
+            self._pending.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        blocked_at = time.monotonic()
+        while not self._closed.is_set():
+            try:
+                self._pending.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            self.stats.blocked += time.monotonic() - blocked_at
+            return True
+        return False
+
+    def _coalesced(self) -> Iterator[str]:
+        buffer: List[str] = []
+        size = 0
+        deadline = None
+        while True:
+            timeout = None
+            if buffer and deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._pending.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _END_OF_STREAM or isinstance(item, BaseException):
+                if buffer:
+                    yield self._emit(buffer)
+                if isinstance(item, BaseException):
+                    self._error = item
+                    raise item
+                return
+
+            if item is not None:
+                if not buffer and self.max_delay is not None:
+                    deadline = time.monotonic() + self.max_delay
+                buffer.append(item)
+                size += len(item.encode("utf-8"))
+            if size >= self.min_bytes or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                yield self._emit(buffer)
+                buffer = []
+                size = 0
+                deadline = None
+
+    def _emit(self, buffer: List[str]) -> str:
+        chunk = "".join(buffer)
+        self.stats.add_chunk(chunk, len(buffer))
+        return chunk
+
+    def __iter__(self) -> Iterator[str]:
+        if self._delivery is not None:
+            raise RuntimeError("The chunks of this stream are delivered to on_chunk")
+        if self._consumed:
+            raise RuntimeError("A TokenStream can only be iterated once")
+        self._consumed = True
+        try:
+            yield from self._coalesced()
+        finally:
+            self.close()
+
+    def _deliver(self) -> None:
+        try:
+            for chunk in self._coalesced():
+                self.on_chunk(chunk)
+        except BaseException as e:
+            # raised again by wait()
+            self._error = e
+            logger.warning(f"Token stream delivery failed: {e}")
+        finally:
+            self.close()
+
+    def wait(self, timeout: Optional[float] = None) -> "TokenStreamStats":
+        """Block until every chunk was passed to `on_chunk`.
+
+        Raises:
+            RuntimeError: If the stream was not created with `on_chunk`
+            TimeoutError: If the stream is still running after `timeout` seconds
+            Exception: The error raised by the stream or by `on_chunk`
+        """
+        if self._delivery is None:
+            raise RuntimeError("wait() needs a stream created with on_chunk")
+        self._delivery.join(timeout)
+        if self._delivery.is_alive():
+            raise TimeoutError(f"Stream still running after {timeout} seconds")
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def close(self) -> None:
+        """Stop reading the stream. Partials that were not consumed yet are dropped."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.stats.finish()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def __enter__(self) -> "TokenStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
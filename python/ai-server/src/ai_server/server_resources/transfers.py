@@ -0,0 +1,422 @@
+from typing import Dict, Optional, Tuple
+import io
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+
+from ai_server.server_resources.concurrency import map_ordered
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Content-Range: bytes 0-8388607/104857600
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class TransferProgress:
+    """Running totals for a multi-file transfer, passed to progress callbacks after every file."""
+
+    def __init__(self, total_files: int, total_bytes: int = 0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.completed_files: int = 0
+        self.failed_files: int = 0
+        self.transferred_bytes: int = 0
+        self.started_at: float = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, ok: bool, size: int = 0) -> None:
+        with self.lock:
+            if ok:
+                self.completed_files += 1
+                self.transferred_bytes += size
+            else:
+                self.failed_files += 1
+
+    @property
+    def done_files(self) -> int:
+        return self.completed_files + self.failed_files
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def files_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.completed_files / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.transferred_bytes / 1024 / 1024 / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"TransferProgress({self.done_files}/{self.total_files} files, "
+            f"failed={self.failed_files}, {self.files_per_second:.1f} files/s, "
+            f"{self.mb_per_second:.2f} MB/s)"
+        )
+
+
+class UploadResult:
+    """Outcome of uploading a single file."""
+
+    def __init__(
+        self,
+        filepath: str,
+        file_name: Optional[str] = None,
+        error: Optional[BaseException] = None,
+        size: int = 0,
+        attempts: int = 0,
+        elapsed: float = 0.0,
+    ):
+        self.filepath = filepath
+        # the name the server stored the file under, used when referencing it in pixels
+        self.file_name = file_name
+        self.error = error
+        self.size = size
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = f"file_name={self.file_name!r}" if self.ok else f"error={self.error!r}"
+        return f"UploadResult({self.filepath!r}, {state}, attempts={self.attempts})"
+
+
+class TransferError(Exception):
+    """Raised when one or more files of a transfer failed after all retries."""
+
+    def __init__(self, message: str, results: list):
+        super().__init__(message)
+        self.results = results
+
+
+class MultipartFileEncoder:
+    """Streams a single file as a multipart/form-data body without loading it into memory.
+
+    Passed as the `data` of a `requests` call, the body is read in small blocks straight from disk to the socket, so
+    memory use stays flat regardless of the file size. `__len__` lets requests send a Content-Length header instead of
+    falling back to chunked transfer encoding.
+
+    Example:
+
+    ```python
+    >>> with MultipartFileEncoder("large.pdf") as encoder:
+    ...     session.post(url, data=encoder, headers={"Content-Type": encoder.content_type})
+    ```
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        field_name: str = "file",
+        file_name: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ):
+        self.filepath = filepath
+        self.boundary = uuid.uuid4().hex
+        file_name = file_name or os.path.basename(filepath)
+        content_type = (
+            content_type
+            or mimetypes.guess_type(file_name)[0]
+            or "application/octet-stream"
+        )
+        file_name = file_name.replace("\\", "\\\\").replace('"', '\\"')
+
+        self.preamble = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self.epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.file_size = os.path.getsize(filepath)
+
+        self.fobj = open(filepath, "rb")
+        # the preamble and epilogue are small, the file itself is read on demand
+        self.head = self.preamble
+        self.tail = self.epilogue
+        self.bytes_read = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self.preamble) + self.file_size + len(self.epilogue)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self) - self.bytes_read
+
+        out = b""
+        if self.head:
+            out, self.head = self.head[:size], self.head[size:]
+        if len(out) < size:
+            out += self.fobj.read(size - len(out))
+        if len(out) < size and self.tail:
+            needed = size - len(out)
+            out, self.tail = out + self.tail[:needed], self.tail[needed:]
+
+        self.bytes_read += len(out)
+        return out
+
+    def close(self) -> None:
+        self.fobj.close()
+
+    def __enter__(self) -> "MultipartFileEncoder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RangedDownload:
+    """Downloads one file with parallel byte range requests, resuming from an earlier partial download.
+
+    The file is preallocated as `<destination>.part` and every range is written at its offset. Finished ranges are
+    recorded in a `<destination>.part.json` manifest, so a download that failed part way only fetches the missing
+    ranges when it is run again. When the server ignores the Range header the body is streamed on a single connection
+    with a large buffer instead.
+    """
+
+    def __init__(
+        self,
+        session,
+        url: str,
+        destination: str,
+        cookies=None,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_size: int = 8 * 1024 * 1024,
+        max_workers: int = 4,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        buffer_size: int = 1024 * 1024,
+    ):
+        self.session = session
+        self.url = url
+        self.destination = destination
+        self.cookies = cookies
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.buffer_size = buffer_size
+
+        self.part_path = destination + ".part"
+        self.manifest_path = self.part_path + ".json"
+        self.manifest_lock = threading.Lock()
+        self.manifest: Dict = {}
+
+    def run(self, probe_response) -> str:
+        """
+        Finish the download started by `probe_response`, a streamed GET for the range `bytes=0-<chunk_size - 1>`.
+
+        Returns (`str`):
+            The path of the downloaded file
+        """
+        content_range = parse_content_range(probe_response)
+        if probe_response.status_code != 206 or content_range is None:
+            return self.download_single_stream(probe_response)
+
+        _, probe_end, total = content_range
+        self.prepare(total, probe_response.headers)
+
+        ranges = [
+            (start, min(start + self.manifest["chunk_size"], total) - 1)
+            for start in range(0, total, self.manifest["chunk_size"])
+        ]
+        pending = [r for r in ranges if r[0] not in self.completed]
+
+        # the probe already carries the first range, use it unless an earlier run finished that range
+        if pending and pending[0][0] == 0 and probe_end == pending[0][1]:
+            self.write_range(pending.pop(0), probe_response)
+        else:
+            probe_response.close()
+
+        start_time = time.monotonic()
+        results = map_ordered(
+            self.fetch_range,
+            pending,
+            max_workers=self.max_workers,
+            retries=self.retries,
+            retry_backoff=self.retry_backoff,
+        )
+        failed = [result for result in results if not result.ok]
+        if failed:
+            raise TransferError(
+                f"{len(failed)} of {len(ranges)} ranges of {self.destination} failed, "
+                f"run the download again to resume. First error: {failed[0].error}",
+                results,
+            )
+
+        os.replace(self.part_path, self.destination)
+        os.remove(self.manifest_path)
+
+        elapsed = time.monotonic() - start_time
+        logger.info(
+            f"Downloaded {total} bytes in {len(ranges)} ranges ({len(pending)} fetched) "
+            f"at {total / 1024 / 1024 / max(elapsed, 1e-9):.2f} MB/s"
+        )
+        return self.destination
+
+    @property
+    def completed(self) -> set:
+        return set(self.manifest.get("completed", []))
+
+    def prepare(self, total: int, headers) -> None:
+        """Load the manifest of an earlier attempt at the same file, or preallocate a new part file.
+
+        An earlier attempt is only resumed when the server identifies the file with an ETag or Last-Modified header
+        that matches the one recorded in the manifest.
+        """
+        validator = headers.get("ETag") or headers.get("Last-Modified")
+        manifest = None
+        if os.path.exists(self.manifest_path) and os.path.exists(self.part_path):
+            try:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+
+        # without an ETag or Last-Modified a different file of the same size cannot be told apart, start over
+        if (
+            manifest is not None
+            and validator is not None
+            and manifest.get("total") == total
+            and manifest.get("validator") == validator
+            and os.path.getsize(self.part_path) == total
+        ):
+            logger.info(
+                f"Resuming {self.destination}, {len(manifest['completed'])} ranges already downloaded"
+            )
+            self.manifest = manifest
+            return
+
+        with open(self.part_path, "wb") as f:
+            f.truncate(total)
+        self.manifest = {
+            "total": total,
+            "chunk_size": self.chunk_size,
+            "validator": validator,
+            "completed": [],
+        }
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def fetch_range(self, byte_range: Tuple[int, int]) -> None:
+        start, end = byte_range
+        response = self.session.get(
+            self.url,
+            cookies=self.cookies,
+            headers={**self.headers, "Range": f"bytes={start}-{end}"},
+            stream=True,
+        )
+        with response:
+            response.raise_for_status()
+            content_range = parse_content_range(response)
+            if (
+                response.status_code != 206
+                or content_range is None
+                or content_range[:2] != (start, end)
+            ):
+                raise IOError(
+                    f"Expected bytes {start}-{end} but the server answered {response.status_code} "
+                    f"{response.headers.get('Content-Range')}"
+                )
+            self.write_range(byte_range, response)
+
+    def write_range(self, byte_range: Tuple[int, int], response) -> None:
+        start, end = byte_range
+        written = 0
+        with response, open(self.part_path, "r+b") as f:
+            f.seek(start)
+            for block in response.iter_content(chunk_size=self.buffer_size):
+                f.write(block)
+                written += len(block)
+
+        if written != end - start + 1:
+            raise IOError(
+                f"Range {start}-{end} ended after {written} of {end - start + 1} bytes"
+            )
+
+        with self.manifest_lock:
+            self.manifest["completed"].append(start)
+            self.save_manifest()
+
+    def download_single_stream(self, response) -> str:
+        """Fallback for servers without Range support, streams the whole body with a large buffer."""
+        with response, open(self.part_path, "wb") as f:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=self.buffer_size):
+                f.write(block)
+
+        os.replace(self.part_path, self.destination)
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        return self.destination
+
+
+def parse_content_range(response) -> Optional[Tuple[int, int, int]]:
+    """Read `(start, end, total)` from a response's Content-Range header, None if it is missing or the total is unknown."""
+    match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+    if match is None or match.group(3) == "*":
+        return None
+    return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+class DownloadStream(io.RawIOBase):
+    """Read-only file-like view of a streamed download response.
+
+    `read(n)` and `readinto` pull from the socket as they are called, `readall()` reads the remaining body in one
+    call. Closing the stream closes the response.
+    """
+
+    def __init__(self, response, filename: Optional[str] = None):
+        super().__init__()
+        self.response = response
+        self.name = filename
+        # undo any gzip/deflate transfer encoding while reading
+        self.response.raw.decode_content = True
+
+    @property
+    def content_length(self) -> Optional[int]:
+        """Size of the file in bytes if the server sent it, None otherwise."""
+        if self.response.headers.get("Content-Encoding", "identity") != "identity":
+            return None
+        length = self.response.headers.get("Content-Length")
+        return int(length) if length is not None else None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        raw_readinto = getattr(self.response.raw, "readinto", None)
+        if raw_readinto is not None:
+            # urllib3 fills the caller's buffer itself, decoding as configured above
+            return raw_readinto(memoryview(buffer).cast("B"))
+        data = self.response.raw.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        return self.response.raw.read()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.response.close()
+        super().close()
@@ -10,6 +10,33 @@ from test_database import DatabaseTests
 from test_openai_endpoints import OpenAiEndpointsTests
 from test_langchain import LangChainTests
 from test_storage import StorageTests
+from test_connection_pool import ConnectionPoolTests, SessionValidityTests
+from test_server_client import (
+    PixelBatchTests,
+    PartialPollingTests,
+    StreamMultiplexerTests,
+    UploadTests,
+    DownloadTests,
+    InMemoryDownloadTests,
+    DataProductTests,
+    StreamingOutputTests,
+    ServerProxyTests,
+    PipelinedCallTests,
+    ProcessPayloadTests,
+    EmbeddingBatchTests,
+    EmbeddingCacheTests,
+    EmbeddingArrayTests,
+    AskManyTests,
+    ResponseCacheTests,
+    LangchainHistoryTests,
+    TokenStreamTests,
+    JSONCodecTests
+)
+from test_async_server_client import (
+    AsyncServerClientTests,
+    LangchainAsyncTests,
+    LangchainEmbeddingsTests,
+)
 from variables import ACCESS_KEY, SECRET_KEY, ENDPOINT
 
 
@@ -42,6 +69,95 @@ if __name__ == '__main__':
     langchain_tests = test_loader.loadTestsFromTestCase(LangChainTests)
     test_suite.addTest(langchain_tests)
 
+    # runs against the in-process fake server, no credentials needed
+    connection_pool_tests = test_loader.loadTestsFromTestCase(
+        ConnectionPoolTests)
+    test_suite.addTest(connection_pool_tests)
+
+    session_validity_tests = test_loader.loadTestsFromTestCase(
+        SessionValidityTests)
+    test_suite.addTest(session_validity_tests)
+
+    pixel_batch_tests = test_loader.loadTestsFromTestCase(PixelBatchTests)
+    test_suite.addTest(pixel_batch_tests)
+
+    partial_polling_tests = test_loader.loadTestsFromTestCase(
+        PartialPollingTests)
+    test_suite.addTest(partial_polling_tests)
+
+    stream_multiplexer_tests = test_loader.loadTestsFromTestCase(
+        StreamMultiplexerTests)
+    test_suite.addTest(stream_multiplexer_tests)
+
+    upload_tests = test_loader.loadTestsFromTestCase(UploadTests)
+    test_suite.addTest(upload_tests)
+
+    download_tests = test_loader.loadTestsFromTestCase(DownloadTests)
+    test_suite.addTest(download_tests)
+
+    in_memory_download_tests = test_loader.loadTestsFromTestCase(
+        InMemoryDownloadTests)
+    test_suite.addTest(in_memory_download_tests)
+
+    data_product_tests = test_loader.loadTestsFromTestCase(DataProductTests)
+    test_suite.addTest(data_product_tests)
+
+    streaming_output_tests = test_loader.loadTestsFromTestCase(
+        StreamingOutputTests)
+    test_suite.addTest(streaming_output_tests)
+
+    server_proxy_tests = test_loader.loadTestsFromTestCase(ServerProxyTests)
+    test_suite.addTest(server_proxy_tests)
+
+    pipelined_call_tests = test_loader.loadTestsFromTestCase(
+        PipelinedCallTests)
+    test_suite.addTest(pipelined_call_tests)
+
+    process_payload_tests = test_loader.loadTestsFromTestCase(
+        ProcessPayloadTests)
+    test_suite.addTest(process_payload_tests)
+
+    embedding_batch_tests = test_loader.loadTestsFromTestCase(
+        EmbeddingBatchTests)
+    test_suite.addTest(embedding_batch_tests)
+
+    embedding_cache_tests = test_loader.loadTestsFromTestCase(
+        EmbeddingCacheTests)
+    test_suite.addTest(embedding_cache_tests)
+
+    embedding_array_tests = test_loader.loadTestsFromTestCase(
+        EmbeddingArrayTests)
+    test_suite.addTest(embedding_array_tests)
+
+    ask_many_tests = test_loader.loadTestsFromTestCase(AskManyTests)
+    test_suite.addTest(ask_many_tests)
+
+    response_cache_tests = test_loader.loadTestsFromTestCase(
+        ResponseCacheTests)
+    test_suite.addTest(response_cache_tests)
+
+    langchain_history_tests = test_loader.loadTestsFromTestCase(
+        LangchainHistoryTests)
+    test_suite.addTest(langchain_history_tests)
+
+    token_stream_tests = test_loader.loadTestsFromTestCase(TokenStreamTests)
+    test_suite.addTest(token_stream_tests)
+
+    json_codec_tests = test_loader.loadTestsFromTestCase(JSONCodecTests)
+    test_suite.addTest(json_codec_tests)
+
+    async_server_client_tests = test_loader.loadTestsFromTestCase(
+        AsyncServerClientTests)
+    test_suite.addTest(async_server_client_tests)
+
+    langchain_async_tests = test_loader.loadTestsFromTestCase(
+        LangchainAsyncTests)
+    test_suite.addTest(langchain_async_tests)
+
+    langchain_embeddings_tests = test_loader.loadTestsFromTestCase(
+        LangchainEmbeddingsTests)
+    test_suite.addTest(langchain_embeddings_tests)
+
     # No great way to run storage tests locally yet
     if ENDPOINT != "http://localhost:9090/Monolith_Dev/api":
         storage_tests = test_loader.loadTestsFromTestCase(StorageTests)
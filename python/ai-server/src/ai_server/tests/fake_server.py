@@ -0,0 +1,483 @@
+"""
+A small in-process stand-in for an AI Server instance.
+
+It implements just enough of the Monolith REST surface (/config, /engine/runPixel, /engine/runPixelAsync,
+/engine/partial, /uploadFile/baseUpload, /engine/downloadFile, /project-<id>/jdbc_json, /logout/all)
+for the SDK's client code to be exercised locally without credentials, and is shared by the
+local unit tests and the scripts in the benchmarks directory.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+from email.parser import BytesParser
+from email.policy import HTTP
+import threading
+import time
+import unittest
+import uuid
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeAIServer:
+    """Runs a fake AI Server on a background thread.
+
+    Example:
+
+    ```python
+    >>> with FakeAIServer() as fake:
+    ...     client = ServerClient(base=fake.base_url, access_key="a", secret_key="s")
+    ...     client.run_pixel("1+1")
+    ```
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.lock = threading.Lock()
+        self.request_counts = {}
+        self.connections = 0
+        self.insights = set()
+        # (insight id, pixel) of every pixel run, in arrival order
+        self.pixel_log = []
+        self.sessions = set()
+        # reactor name -> callable(expression) returning the pixel output, see register_pixel
+        self.pixel_handlers = {}
+        # jobs started through /engine/runPixelAsync, their output is released one word at a time
+        self.jobs = {}
+        self.stream_delay = 0.0
+        self.stream_chunk_interval = 0.0
+        # uploaded file name -> content, and file name -> number of uploads to fail with a 500 first
+        self.uploads = {}
+        self.upload_failures = {}
+        self.upload_delay = 0.0
+        # when set, upload bodies are read in blocks and only their size is kept, see benchmarks/bench_streaming_upload.py
+        self.discard_uploads = False
+        self.upload_sizes = {}
+        # server file path -> content, served through DownloadAsset and /engine/downloadFile
+        self.files = {}
+        self.download_keys = {}
+        self.support_ranges = True
+        # send an ETag with downloads, so that an interrupted download can be resumed
+        self.send_etags = True
+        # number of ranged downloads (other than the first range) to answer with a 500
+        self.range_failures = 0
+        self.pixel_handlers["DownloadAsset"] = self.download_asset
+        # (project_id, insight_id) -> sqlite database queried by jdbc_json
+        self.data_products = {}
+        # methodName -> callable(*payload) returning the response payload list of a RemoteEngineRun, echoes by default
+        self.engine_methods = {}
+        # seconds every /engine/runPixel request takes, to simulate the round trip to a remote server
+        self.pixel_delay = 0.0
+        # number of /engine/runPixel requests to answer with a proxy's HTML 502 page
+        self.gateway_errors = 0
+        self.pixel_handlers["RemoteEngineRun"] = self.remote_engine_run
+
+        handler = type("FakeAIServerHandler", (_FakeAIServerHandler,), {"fake": self})
+        ThreadingHTTPServer.request_queue_size = 128
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/Monolith/api"
+
+    def start(self) -> "FakeAIServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def new_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.sessions.add(session_id)
+        return session_id
+
+    def take_gateway_error(self) -> bool:
+        with self.lock:
+            if self.gateway_errors <= 0:
+                return False
+            self.gateway_errors -= 1
+            return True
+
+    def expire_sessions(self) -> None:
+        """Invalidate every session cookie, as if the Tomcat session timed out."""
+        with self.lock:
+            self.sessions.clear()
+
+    def count(self, path: str) -> None:
+        with self.lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def register_pixel(self, reactor: str, handler) -> None:
+        """
+        Answer pixels starting with `reactor` (e.g. "LLM") with `handler(expression)`.
+
+        An exception raised by the handler is returned as an ERROR pixelReturn.
+        """
+        self.pixel_handlers[reactor] = handler
+
+    def run_expression(self, expression: str):
+        """Evaluate a single pixel expression and return `(output, operationType)`."""
+        expression = expression.strip()
+        if expression.startswith("META"):
+            return True, ["OPERATION"]
+        for reactor, handler in self.pixel_handlers.items():
+            if expression.startswith(reactor):
+                try:
+                    return handler(expression), ["OPERATION"]
+                except Exception as e:
+                    return str(e), ["ERROR"]
+        try:
+            # simple arithmetic such as 1+1 is all the default implementation supports
+            return eval(expression, {"__builtins__": {}}), ["OPERATION"]
+        except Exception:
+            return f"Could not evaluate {expression}", ["ERROR"]
+
+    def run_pixel(self, expression: str, insight_id: str) -> dict:
+        if insight_id == "new":
+            insight_id = str(uuid.uuid4())
+            with self.lock:
+                self.insights.add(insight_id)
+
+        pixel_return = []
+        # a ; inside an <e>...</e> block (e.g. in a PayloadStruct) does not end the pixel
+        parts = re.split(r";(?![^<]*</e>)", expression)
+        for pixel_id, part in enumerate(e for e in parts if e.strip()):
+            with self.lock:
+                self.pixel_log.append((insight_id, part.strip()))
+            if part.strip().startswith("DropInsight"):
+                with self.lock:
+                    self.insights.discard(insight_id)
+                output, operation_type = True, ["OPERATION"]
+            else:
+                output, operation_type = self.run_expression(part)
+            pixel_return.append(
+                {
+                    "pixelId": str(pixel_id),
+                    "pixelExpression": part.strip() + ";",
+                    "isMeta": False,
+                    "output": output,
+                    "operationType": operation_type,
+                }
+            )
+        return {"insightID": insight_id, "pixelReturn": pixel_return}
+
+    def start_job(self, expression: str) -> str:
+        """
+        Run `expression` as a streaming job.
+
+        Nothing is available for `stream_delay` seconds, then one word of the output is released every
+        `stream_chunk_interval` seconds.
+        """
+        output, operation_type = self.run_expression(expression.rstrip().rstrip(";"))
+        text = output if isinstance(output, str) else json.dumps(output)
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "chunks": re.findall(r"\S+\s*", text) or [text],
+                "failed": "ERROR" in operation_type,
+                "ready_at": time.monotonic() + self.stream_delay,
+                "interval": self.stream_chunk_interval,
+                "sent": 0,
+            }
+        return job_id
+
+    def poll_job(self, job_id: str) -> dict:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return {"status": "UnknownJob", "message": {"new": ""}}
+            if job["failed"]:
+                return {"status": "Error", "message": {"new": ""}}
+
+            elapsed = time.monotonic() - job["ready_at"]
+            if elapsed < 0:
+                available = 0
+            elif job["interval"]:
+                available = min(int(elapsed / job["interval"]) + 1, len(job["chunks"]))
+            else:
+                available = len(job["chunks"])
+
+            new = "".join(job["chunks"][job["sent"] : available])
+            job["sent"] = available
+            status = (
+                "ProgressComplete" if available == len(job["chunks"]) else "Streaming"
+            )
+        return {"status": status, "message": {"new": new}}
+
+    def remote_engine_run(self, expression: str) -> dict:
+        """RemoteEngineRun(payload="<e>{PayloadStruct}</e>") answers with the struct, its payload replaced by the method's return value."""
+        payload_struct = json.loads(
+            re.search(r"<e>(.*)</e>", expression, re.S).group(1)
+        )
+        method = self.engine_methods.get(
+            payload_struct["methodName"], lambda *args: list(args)
+        )
+        response = dict(payload_struct, response=True)
+        try:
+            response["payload"] = method(*payload_struct["payload"])
+        except Exception as e:
+            response["ex"] = str(e)
+        return response
+
+    def download_asset(self, expression: str) -> str:
+        """DownloadAsset(filePath=['<path>']) returns a key for /engine/downloadFile."""
+        path = re.search(r"filePath=\['([^']*)'\]", expression).group(1)
+        if path not in self.files:
+            raise FileNotFoundError(f"File {path} does not exist")
+        file_key = uuid.uuid4().hex
+        with self.lock:
+            self.download_keys[file_key] = path
+        return file_key
+
+    def add_data_product(
+        self, project_id: str, insight_id: str, table: str, columns: list, rows: list
+    ) -> None:
+        """Make `rows` queryable as `table` through /project-<project_id>/jdbc_json."""
+        db = sqlite3.connect(":memory:", check_same_thread=False)
+        db.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+        db.executemany(
+            f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})", rows
+        )
+        self.data_products[(project_id, insight_id)] = db
+
+    def query_data_product(self, project_id: str, insight_id: str, sql: str) -> dict:
+        db = self.data_products.get((project_id, insight_id))
+        if db is None:
+            return {"errorMessage": "Unknown data product"}
+        with self.lock:
+            cursor = db.execute(sql)
+            columns = [description[0] for description in cursor.description]
+            rows = [list(row) for row in cursor.fetchall()]
+        return {"columns": columns, "dataArray": rows}
+
+    def store_upload(self, content_type: str, body: bytes):
+        """Store the file of a multipart upload, returning its name or None if it should fail."""
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+        )
+        part = next(message.iter_parts())
+        file_name = part.get_filename()
+        time.sleep(self.upload_delay)
+        with self.lock:
+            if self.upload_failures.get(file_name, 0) > 0:
+                self.upload_failures[file_name] -= 1
+                return None
+            self.uploads[file_name] = part.get_payload(decode=True)
+        return file_name
+
+
+class FakeServerTestCase(unittest.TestCase):
+    """Base class for tests that run against a `FakeAIServer` instead of a real instance."""
+
+    fake_server = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake_server = FakeAIServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_server.stop()
+
+    def login(self, **kwargs):
+        from ai_server.server_resources.server_client import ServerClient
+
+        return ServerClient(
+            base=self.fake_server.base_url,
+            access_key="access",
+            secret_key="secret",
+            **kwargs,
+        )
+
+
+class _FakeAIServerHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, avoid delayed-ACK stalls on reused connections
+    disable_nagle_algorithm = True
+    fake: FakeAIServer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            # clients close streamed responses they do not read to the end, e.g. a range probe on resume
+            pass
+
+    def setup(self):
+        super().setup()
+        with self.fake.lock:
+            self.fake.connections += 1
+
+    def _session_id(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        session_id = cookie["JSESSIONID"].value if "JSESSIONID" in cookie else None
+        return session_id if session_id in self.fake.sessions else None
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _discard_upload(self) -> None:
+        remaining = int(self.headers.get("Content-Length") or 0)
+        head = self.rfile.read(min(remaining, 64 * 1024))
+        size = len(head)
+        remaining -= len(head)
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            size += len(block)
+            remaining -= len(block)
+
+        match = re.search(rb'filename="([^"]*)"', head)
+        file_name = match.group(1).decode("utf-8") if match else "upload"
+        with self.fake.lock:
+            self.fake.upload_sizes[file_name] = size
+        self._send_json([{"fileName": file_name, "fileLocation": file_name}])
+
+    def _send_download(self, query: dict) -> None:
+        file_path = self.fake.download_keys.get(query.get("fileKey", [None])[0])
+        if file_path is None:
+            self._send_json({"errorMessage": "Unknown file key"}, status=404)
+            return
+        content = self.fake.files[file_path]
+        headers = {
+            "Content-Disposition": f'attachment; filename="{file_path.split("/")[-1]}"',
+            "Accept-Ranges": "bytes",
+        }
+        if self.fake.send_etags:
+            headers["ETag"] = f'"{hashlib.sha1(content).hexdigest()}"'
+
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        status = 200
+        if match and self.fake.support_ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(content) - 1), len(content) - 1)
+            if start > 0:
+                with self.fake.lock:
+                    fail = self.fake.range_failures > 0
+                    self.fake.range_failures -= 1 if fail else 0
+                if fail:
+                    self._send_json({"errorMessage": "Range failed"}, status=500)
+                    return
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            content = content[start : end + 1]
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_html(self, html: str, status: int) -> None:
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: int = 200, headers: dict = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if self.headers.get("Connection", "").lower() == "close":
+            # echo it back like Tomcat does so the client drops the connection too
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path.split("/api", 1)[-1]
+        self.fake.count(path)
+
+        if path == "/config":
+            if self.headers.get("Authorization"):
+                session_id = self.fake.new_session()
+                self._send_json(
+                    {"loginDetails": {"NATIVE": "fake_user"}, "csrf": False},
+                    headers={"Set-Cookie": f"JSESSIONID={session_id}; Path=/"},
+                )
+            elif self._session_id():
+                self._send_json(
+                    {"loginDetails": {"NATIVE": "fake_user"}, "csrf": False}
+                )
+            else:
+                self._send_json({"csrf": False})
+        elif path.endswith("/jdbc_json") and path.startswith("/project-"):
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            self._send_json(
+                self.fake.query_data_product(
+                    path[len("/project-") : -len("/jdbc_json")],
+                    query.get("insightId"),
+                    query.get("sql", ""),
+                )
+            )
+        elif path == "/engine/downloadFile":
+            self._send_download(parse_qs(urlparse(self.path).query))
+        elif path == "/logout/all":
+            self._send_json({"success": True})
+        else:
+            self._send_json({"error": f"Unknown path {path}"}, status=404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path.split("/api", 1)[-1]
+        self.fake.count(path)
+        if path == "/uploadFile/baseUpload" and self.fake.discard_uploads:
+            self._discard_upload()
+            return
+        body = self._read_body()
+
+        if not self._session_id():
+            self._send_json({"errorMessage": "User is not logged in"}, status=401)
+            return
+
+        if path == "/engine/runPixel" and self.fake.take_gateway_error():
+            self._send_html("<html><body><h1>502 Bad Gateway</h1></body></html>", 502)
+            return
+
+        if path == "/uploadFile/baseUpload":
+            file_name = self.fake.store_upload(self.headers["Content-Type"], body)
+            if file_name is None:
+                self._send_json({"errorMessage": "Upload failed"}, status=500)
+            else:
+                self._send_json([{"fileName": file_name, "fileLocation": file_name}])
+            return
+
+        form = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+
+        if path == "/engine/runPixel":
+            time.sleep(self.fake.pixel_delay)
+            self._send_json(
+                self.fake.run_pixel(form.get("expression", ""), form.get("insightId"))
+            )
+        elif path == "/engine/runPixelAsync":
+            self._send_json({"jobId": self.fake.start_job(form.get("expression", ""))})
+        elif path == "/engine/partial":
+            self._send_json(self.fake.poll_job(form.get("jobId")))
+        else:
+            self._send_json({"error": f"Unknown path {path}"}, status=404)
@@ -0,0 +1,362 @@
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+import httpx
+from ai_server.server_resources.async_server_client import AsyncServerClient
+from ai_server.server_resources.transfers import TransferError
+from ai_server.py_client.gaas.caching import EmbeddingCache
+from ai_server.py_client.gaas.model import AsyncModelEngine, ModelEngine
+from fake_server import FakeServerTestCase
+
+
+class AsyncServerClientTests(FakeServerTestCase):
+
+    def async_login(self, **kwargs):
+        return AsyncServerClient(
+            base=self.fake_server.base_url,
+            access_key='access',
+            secret_key='secret',
+            **kwargs
+        )
+
+    def test_run_pixel(self):
+        async def run():
+            async with self.async_login() as server_client:
+                self.assertIsNotNone(server_client.cur_insight)
+                return await server_client.run_pixel('1+1')
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+    def test_concurrent_pixels_share_pool(self):
+        connections_before = self.fake_server.connections
+
+        async def run():
+            async with self.async_login(max_connections=4) as server_client:
+                return await asyncio.gather(
+                    *[server_client.run_pixel(f'{i}+1') for i in range(40)]
+                )
+
+        self.assertEqual(asyncio.run(run()), [i + 1 for i in range(40)])
+        self.assertLessEqual(
+            self.fake_server.connections - connections_before, 4)
+
+    def test_reauthenticate_on_expired_session(self):
+        async def run():
+            async with self.async_login() as server_client:
+                insight_id = server_client.cur_insight
+                self.fake_server.expire_sessions()
+                output = await server_client.run_pixel('2+2')
+                self.assertEqual(server_client.cur_insight, insight_id)
+                return output
+
+        self.assertEqual(asyncio.run(run()), 4)
+
+    def test_proxy_error_page_is_not_an_auth_failure(self):
+        async def run():
+            async with self.async_login() as server_client:
+                sessions = len(self.fake_server.sessions)
+                self.fake_server.gateway_errors = 1
+                with self.assertRaises(httpx.HTTPStatusError) as context:
+                    await server_client.run_pixel('1+1')
+                self.assertEqual(context.exception.response.status_code, 502)
+                self.assertEqual(len(self.fake_server.sessions), sessions)
+                return await server_client.run_pixel('1+1')
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+    def test_upload_failures_are_per_file(self):
+        self.fake_server.upload_failures['async_2.txt'] = 1
+        self.fake_server.upload_failures['async_5.txt'] = 10
+        progress = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            files = []
+            for i in range(8):
+                files.append(os.path.join(directory, f'async_{i}.txt'))
+                with open(files[-1], 'w') as f:
+                    f.write(f'document {i}')
+
+            async def run():
+                async with self.async_login() as server_client:
+                    results = await server_client.upload_files_parallel(
+                        files, max_concurrency=4, retries=2, retry_backoff=0.01,
+                        progress_callback=progress.append)
+                    with self.assertRaises(TransferError) as context:
+                        await server_client.upload_files(files, max_concurrency=4)
+                    return results, context.exception
+
+            try:
+                results, error = asyncio.run(run())
+            finally:
+                self.fake_server.upload_failures.clear()
+
+        self.assertEqual([result.file_name for result in results if result.ok],
+                         [f'async_{i}.txt' for i in range(8) if i != 5])
+        self.assertEqual(results[2].attempts, 2)
+        self.assertFalse(results[5].ok)
+        self.assertEqual(results[5].attempts, 3)
+        self.assertEqual(progress[-1].completed_files, 7)
+        self.assertEqual(progress[-1].failed_files, 1)
+        self.assertEqual(len(error.results), 8)
+
+    def test_file_round_trip(self):
+        content = os.urandom(3 * 1024 * 1024 + 17)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'async_large.bin')
+            target = os.path.join(directory, 'async_copy.bin')
+            with open(source, 'wb') as f:
+                f.write(content)
+
+            async def run():
+                async with self.async_login() as server_client:
+                    file_names = await server_client.upload_files([source])
+                    self.fake_server.files['version/assets/async_large.bin'] = (
+                        self.fake_server.uploads['async_large.bin'])
+                    return file_names, await server_client.download_file(
+                        'version/assets/async_large.bin', custom_filename=target)
+
+            file_names, filename = asyncio.run(run())
+            with open(filename, 'rb') as f:
+                downloaded = f.read()
+
+        self.assertEqual(file_names, ['async_large.bin'])
+        self.assertEqual(downloaded, content)
+
+    def test_async_model_engine(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: {'response': 'Paris'})
+
+        async def run():
+            async with self.async_login() as server_client:
+                model = AsyncModelEngine(engine_id='model', server=server_client)
+                return await model.ask(question='capital of france?')
+
+        self.assertEqual(asyncio.run(run()), {'response': 'Paris'})
+
+    def test_async_stream(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: 'The capital of France is Paris.')
+
+        async def run():
+            async with self.async_login(poll_interval=0.01) as server_client:
+                model = AsyncModelEngine(engine_id='model', server=server_client)
+                return [chunk async for chunk in model.stream_ask(question='capital of france?')]
+
+        self.assertEqual(''.join(asyncio.run(run())), 'The capital of France is Paris.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+@unittest.skipUnless(importlib.util.find_spec('langchain_core'), 'langchain is not installed')
+class LangchainAsyncTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.in_flight = 0
+        cls.most_in_flight = 0
+        cls.lock = threading.Lock()
+
+        def llm(expression):
+            with cls.lock:
+                cls.in_flight += 1
+                cls.most_in_flight = max(cls.most_in_flight, cls.in_flight)
+            time.sleep(0.2)
+            with cls.lock:
+                cls.in_flight -= 1
+            return {'response': 'Paris', 'messageType': 'CHAT'}
+        cls.fake_server.register_pixel('GetModelAPI', lambda expression: 'TEXT_GENERATION')
+        cls.fake_server.register_pixel('GetRoomMessages', lambda expression: [])
+        cls.fake_server.register_pixel('LLM', llm)
+
+    def setUp(self):
+        type(self).most_in_flight = 0
+        self.server_client = self.login(pool_maxsize=8)
+        self.model = ModelEngine(engine_id='llm')
+
+    def test_shares_the_sync_session(self):
+        logins = self.fake_server.request_counts.get('/config', 0)
+
+        async def run():
+            client = AsyncServerClient.from_server_client(self.server_client)
+            try:
+                return client.cur_insight, await client.run_pixel('1+1')
+            finally:
+                await client.close()
+
+        insight_id, output = asyncio.run(run())
+        self.assertEqual(output, 2)
+        self.assertEqual(insight_id, self.server_client.cur_insight)
+        self.assertEqual(self.fake_server.request_counts.get('/config', 0), logins)
+        # the sync session is still valid
+        self.assertEqual(self.server_client.run_pixel('2+2'), 4)
+
+    def test_ainvoke_and_astream(self):
+        chat = self.model.to_langchain_chat_model()
+
+        async def run():
+            try:
+                message = await chat.ainvoke('capital of France?')
+                # answered through the AsyncServerClient of this loop, not an executor thread
+                self.assertEqual(len(chat._async_engines), 1)
+                chunks = [chunk.content async for chunk in chat.astream('and of Italy?')]
+                return message, chunks
+            finally:
+                await chat.aclose()
+
+        message, chunks = asyncio.run(run())
+        self.assertEqual(message.content, 'Paris')
+        self.assertIn('Paris', ''.join(chunks))
+        self.assertEqual(len(chat.get_chat_history()), 4)
+
+    def test_pool_is_closed_with_its_loop(self):
+        chat = self.model.to_langchain_chat_model()
+
+        async def run():
+            message = await chat.ainvoke('capital of France?')
+            engine, _ = chat._async_engines[asyncio.get_running_loop()]
+            return message, engine
+
+        clients = []
+        for _ in range(3):
+            message, engine = asyncio.run(run())
+            self.assertEqual(message.content, 'Paris')
+            clients.append(engine.server.client)
+
+        # every asyncio.run got its own pool and closed it on shutdown, without aclose()
+        self.assertEqual(len({id(client) for client in clients}), 3)
+        self.assertTrue(all(client.is_closed for client in clients))
+
+    def test_default_async_client_is_kept(self):
+        previous = AsyncServerClient.da_server
+        mine = AsyncServerClient(
+            base=self.fake_server.base_url, access_key='access', secret_key='secret')
+        chat = self.model.to_langchain_chat_model()
+
+        async def run():
+            try:
+                return await chat.ainvoke('capital of France?')
+            finally:
+                await mine.close()
+
+        try:
+            self.assertEqual(asyncio.run(run()).content, 'Paris')
+            # the per loop client of the chat model did not replace the user's client
+            self.assertIs(AsyncServerClient.da_server, mine)
+        finally:
+            AsyncServerClient.da_server = previous
+
+    def test_abatch_runs_concurrently(self):
+        chat = self.model.to_langchain_chat_model(max_concurrency=4)
+
+        async def run():
+            try:
+                return await chat.abatch([f'question {i}' for i in range(8)])
+            finally:
+                await chat.aclose()
+
+        start = time.monotonic()
+        messages = asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([message.content for message in messages], ['Paris'] * 8)
+        self.assertEqual(self.most_in_flight, 4)
+        self.assertLess(elapsed, 1.2)
+
+    def test_batch_default_concurrency(self):
+        chat = self.model.to_langchain_chat_model(max_concurrency=3)
+
+        chat.batch([f'question {i}' for i in range(6)])
+        self.assertEqual(self.most_in_flight, 3)
+
+        type(self).most_in_flight = 0
+        chat.batch([f'question {i}' for i in range(4)], config={'max_concurrency': 1})
+        self.assertEqual(self.most_in_flight, 1)
+
+
+@unittest.skipUnless(importlib.util.find_spec('langchain_core'), 'langchain is not installed')
+class LangchainEmbeddingsTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.in_flight = 0
+        cls.most_in_flight = 0
+        cls.batch_sizes = []
+        cls.lock = threading.Lock()
+
+        def embeddings(expression):
+            values = json.loads(re.search(r'values=(\[.*?\])', expression).group(1))
+            with cls.lock:
+                cls.in_flight += 1
+                cls.most_in_flight = max(cls.most_in_flight, cls.in_flight)
+                cls.batch_sizes.append(len(values))
+            time.sleep(0.1)
+            with cls.lock:
+                cls.in_flight -= 1
+            return {'response': [[float(value), 1.0] for value in values],
+                    'numberOfTokensInPrompt': len(values)}
+        cls.fake_server.register_pixel('Embeddings', embeddings)
+
+    def setUp(self):
+        type(self).most_in_flight = 0
+        type(self).batch_sizes = []
+        self.login(pool_maxsize=8)
+        self.texts = [str(i) for i in range(40)]
+        self.expected = [[float(i), 1.0] for i in range(40)]
+
+    def test_embed_documents_in_batches(self):
+        embedder = ModelEngine(engine_id='embed').to_langchain_embedder(
+            batch_size=5, max_concurrency=4)
+
+        self.assertEqual(embedder.embed_documents(self.texts), self.expected)
+        self.assertEqual(self.batch_sizes, [5] * 8)
+        self.assertEqual(self.most_in_flight, 4)
+        self.assertEqual(embedder.embed_query('7'), [7.0, 1.0])
+
+    def test_aembed_documents_runs_concurrently(self):
+        embedder = ModelEngine(engine_id='embed').to_langchain_embedder(
+            batch_size=5, max_concurrency=4)
+
+        async def run():
+            try:
+                vectors = await embedder.aembed_documents(self.texts)
+                self.assertEqual(len(embedder._async_engines), 1)
+                return vectors, await embedder.aembed_query('3')
+            finally:
+                await embedder.aclose()
+
+        start = time.monotonic()
+        vectors, query = asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(vectors, self.expected)
+        self.assertEqual(query, [3.0, 1.0])
+        self.assertEqual(sorted(self.batch_sizes), [1] + [5] * 8)
+        self.assertEqual(self.most_in_flight, 4)
+        self.assertLess(elapsed, 0.6)
+
+    def test_aembed_documents_uses_the_embedding_cache(self):
+        model = ModelEngine(engine_id='embed', embedding_cache=EmbeddingCache())
+        model.embeddings_batch(self.texts[:20])
+        type(self).batch_sizes = []
+        embedder = model.to_langchain_embedder(batch_size=10)
+
+        async def run():
+            try:
+                return await embedder.aembed_documents(self.texts)
+            finally:
+                await embedder.aclose()
+
+        self.assertEqual(asyncio.run(run()), self.expected)
+        # only the 20 texts missing from the cache were sent
+        self.assertEqual(self.batch_sizes, [10, 10])
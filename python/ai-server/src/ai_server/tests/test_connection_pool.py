@@ -0,0 +1,128 @@
+import unittest
+import requests
+from ai_server.server_resources.server_client import ServerClient
+from ai_server.server_resources.codec import JSONCodec
+from fake_server import FakeAIServer, FakeServerTestCase
+
+
+class ConnectionPoolTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake_server = FakeAIServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake_server.stop()
+
+    def login(self, **kwargs):
+        return ServerClient(
+            base=self.fake_server.base_url,
+            access_key='access',
+            secret_key='secret',
+            **kwargs
+        )
+
+    def test_connections_are_reused(self):
+        connections_before = self.fake_server.connections
+        server_client = self.login()
+
+        for _ in range(20):
+            self.assertEqual(server_client.run_pixel('1+1'), 2)
+
+        # every call went through the same keep-alive connection
+        self.assertEqual(self.fake_server.connections - connections_before, 1)
+        server_client.logout()
+
+    def test_keep_alive_disabled(self):
+        connections_before = self.fake_server.connections
+        server_client = self.login(keep_alive=False)
+
+        for _ in range(5):
+            server_client.run_pixel('1+1')
+
+        self.assertGreater(self.fake_server.connections - connections_before, 5)
+        server_client.logout()
+
+    def test_logout_closes_session(self):
+        server_client = self.login()
+        adapter = server_client.session.get_adapter(self.fake_server.base_url)
+        server_client.run_pixel('1+1')
+        self.assertGreater(len(adapter.poolmanager.pools), 0)
+
+        server_client.logout()
+
+        self.assertIsNone(server_client.cookies)
+        self.assertEqual(len(adapter.poolmanager.pools), 0)
+
+
+class SessionValidityTests(FakeServerTestCase):
+
+    def test_no_login_probe_per_pixel(self):
+        server_client = self.login()
+        config_calls = self.fake_server.request_counts['/config']
+
+        for _ in range(10):
+            server_client.run_pixel('1+1')
+
+        self.assertEqual(self.fake_server.request_counts['/config'], config_calls)
+
+    def test_probe_when_ttl_expired(self):
+        server_client = self.login(session_ttl=0)
+        config_calls = self.fake_server.request_counts['/config']
+
+        for _ in range(3):
+            server_client.run_pixel('1+1')
+
+        self.assertEqual(
+            self.fake_server.request_counts['/config'], config_calls + 3)
+
+    def test_reauthenticate_on_expired_session(self):
+        server_client = self.login()
+        insight_id = server_client.cur_insight
+
+        self.fake_server.expire_sessions()
+
+        self.assertEqual(server_client.run_pixel('2+2'), 4)
+        # the client and its insight were kept, only the cookie was replaced
+        self.assertEqual(server_client.cur_insight, insight_id)
+        self.assertEqual(len(self.fake_server.sessions), 1)
+
+    def test_proxy_error_page_is_not_an_auth_failure(self):
+        server_client = self.login()
+        sessions = len(self.fake_server.sessions)
+        self.fake_server.gateway_errors = 1
+
+        with self.assertRaises(requests.HTTPError) as context:
+            server_client.run_pixel('1+1')
+
+        self.assertEqual(context.exception.response.status_code, 502)
+        # no login was attempted
+        self.assertEqual(len(self.fake_server.sessions), sessions)
+        self.assertEqual(server_client.run_pixel('1+1'), 2)
+
+    def test_reconnect_keeps_settings(self):
+        codec = JSONCodec()
+        server_client = self.login(
+            pool_maxsize=4, session_ttl=30, poll_interval=0.2, max_poll_interval=2,
+            poll_backoff=3, stream_timeout=60, multiplex_streams=True, stream_poll_workers=3,
+            upload_stream_threshold=1024, data_product_cache_size=5, json_codec=codec,
+            call_batch_window=0.01, call_batch_size=7)
+
+        server_client.reconnect()
+
+        self.assertEqual(
+            (server_client.pool_maxsize, server_client.session_ttl, server_client.poll_interval,
+             server_client.max_poll_interval, server_client.poll_backoff, server_client.stream_timeout,
+             server_client.upload_stream_threshold, server_client.call_batch_window,
+             server_client.call_batch_size),
+            (4, 30, 0.2, 2, 3, 60, 1024, 0.01, 7))
+        self.assertIs(server_client.codec, codec)
+        self.assertEqual(server_client.stream_multiplexer.max_workers, 3)
+        self.assertEqual(server_client.data_product_cache.maxsize, 5)
+        self.assertEqual(server_client.run_pixel('1+1'), 2)
+        server_client.logout()
+
+
+if __name__ == '__main__':
+    unittest.main()
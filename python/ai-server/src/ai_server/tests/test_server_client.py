@@ -0,0 +1,1380 @@
+import datetime
+import importlib.util
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import jsonpickle
+import numpy as np
+import pandas as pd
+from ai_server.server_resources.server_client import PixelError, StreamStats
+from ai_server.server_resources.server_proxy import LazyPayload, ServerProxy, decode_payload
+from ai_server.py_client.gaas.database import DatabaseEngine
+from ai_server.py_client.gaas.model import ModelEngine
+from ai_server.py_client.gaas.batching import AskStats, EmbeddingStats
+from ai_server.py_client.gaas.caching import EmbeddingCache, ResponseCache
+from ai_server.server_resources.token_stream import TokenStream, TokenStreamStats
+from ai_server.server_resources.transfers import TransferError
+from ai_server.server_resources.codec import JSONCodec, get_codec
+from fake_server import FakeServerTestCase
+
+
+class PixelBatchTests(FakeServerTestCase):
+
+    def test_single_round_trip(self):
+        server_client = self.login()
+        run_pixel_calls = self.fake_server.request_counts['/engine/runPixel']
+
+        outputs = server_client.run_pixel_batch(
+            [f'{i}+1' for i in range(100)])
+
+        self.assertEqual(outputs, [i + 1 for i in range(100)])
+        self.assertEqual(
+            self.fake_server.request_counts['/engine/runPixel'], run_pixel_calls + 1)
+
+    def test_errors_are_per_entry(self):
+        server_client = self.login()
+
+        outputs = server_client.run_pixel_batch(['1+1;', 'not a pixel', '3+3'])
+
+        self.assertEqual(outputs[0], 2)
+        self.assertIsInstance(outputs[1], PixelError)
+        self.assertEqual(outputs[1].index, 1)
+        self.assertEqual(outputs[1].expression, 'not a pixel')
+        self.assertEqual(outputs[2], 6)
+
+    def test_batch_size(self):
+        server_client = self.login()
+        run_pixel_calls = self.fake_server.request_counts['/engine/runPixel']
+
+        outputs = server_client.run_pixel_batch(
+            [f'{i}*2' for i in range(10)], batch_size=4)
+
+        self.assertEqual(outputs, [i * 2 for i in range(10)])
+        self.assertEqual(
+            self.fake_server.request_counts['/engine/runPixel'], run_pixel_calls + 3)
+
+    def test_payload_with_several_pixels_is_rejected(self):
+        server_client = self.login()
+
+        with self.assertRaises(ValueError):
+            server_client.run_pixel_batch(['1+1;2+2', '3+3'])
+
+    def test_pixel_batch_context_manager(self):
+        server_client = self.login()
+
+        with server_client.pixel_batch() as batch:
+            first = batch.add('1+1')
+            failed = batch.add('not a pixel')
+            self.assertFalse(first.done())
+
+        self.assertEqual(first.result(), 2)
+        with self.assertRaises(PixelError):
+            failed.result()
+
+
+class PartialPollingTests(FakeServerTestCase):
+
+    def tearDown(self):
+        self.fake_server.stream_delay = 0.0
+        self.fake_server.stream_chunk_interval = 0.0
+
+    def test_backoff_while_waiting_for_first_chunk(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: 'The capital of France is Paris.')
+        self.fake_server.stream_delay = 0.5
+        server_client = self.login(
+            poll_interval=0.01, max_poll_interval=0.2, poll_backoff=2)
+        stats = StreamStats()
+
+        job_id = server_client.run_pixel_async('LLM()')
+        chunks = list(server_client.get_partial_responses(job_id, stats=stats))
+
+        self.assertEqual(''.join(chunks), 'The capital of France is Paris.')
+        # a fixed 10ms interval would have polled ~50 times before the first chunk
+        self.assertLess(stats.polls, 15)
+        self.assertGreaterEqual(stats.time_to_first_chunk, 0.5)
+
+    def test_tight_polling_while_streaming(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: 'one two three four five six')
+        self.fake_server.stream_chunk_interval = 0.05
+        server_client = self.login(poll_interval=0.01, max_poll_interval=1)
+        stats = StreamStats()
+
+        job_id = server_client.run_pixel_async('LLM()')
+        chunks = list(server_client.get_partial_responses(job_id, stats=stats))
+
+        # chunks are picked up as they are produced instead of after a long backed off sleep
+        self.assertGreaterEqual(len(chunks), 5)
+        self.assertEqual(stats.chunks, len(chunks))
+        self.assertLess(stats.elapsed(), 0.6)
+
+    def test_stream_timeout(self):
+        self.fake_server.register_pixel('LLM', lambda expression: 'too late')
+        self.fake_server.stream_delay = 5
+        server_client = self.login(poll_interval=0.01)
+
+        job_id = server_client.run_pixel_async('LLM()')
+        with self.assertRaises(TimeoutError):
+            list(server_client.get_partial_responses(job_id, timeout=0.2))
+
+
+class StreamMultiplexerTests(FakeServerTestCase):
+
+    def setUp(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: 'one two three four five six')
+
+    def tearDown(self):
+        self.fake_server.stream_chunk_interval = 0.0
+
+    def test_many_streams_share_one_poller(self):
+        self.fake_server.stream_chunk_interval = 0.02
+        server_client = self.login(
+            multiplex_streams=True, stream_poll_workers=4, poll_interval=0.01)
+
+        def stream(_):
+            job_id = server_client.run_pixel_async('LLM()')
+            return ''.join(server_client.get_partial_responses(job_id))
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            outputs = list(executor.map(stream, range(50)))
+
+        self.assertEqual(outputs, ['one two three four five six'] * 50)
+        self.assertEqual(server_client.stream_multiplexer.active_jobs, 0)
+        server_client.logout()
+
+    def test_abandoned_stream_is_no_longer_polled(self):
+        self.fake_server.stream_chunk_interval = 0.2
+        server_client = self.login(multiplex_streams=True, poll_interval=0.01)
+
+        job_id = server_client.run_pixel_async('LLM()')
+        stream = server_client.get_partial_responses(job_id)
+        self.assertEqual(next(stream), 'one ')
+        stream.close()
+
+        self.assertEqual(server_client.stream_multiplexer.active_jobs, 0)
+        polls = self.fake_server.request_counts['/engine/partial']
+        time.sleep(0.1)
+        # at most the poll that was already in flight
+        self.assertLessEqual(
+            self.fake_server.request_counts['/engine/partial'], polls + 1)
+        server_client.logout()
+
+    def test_timeout_when_a_poll_hangs(self):
+        server_client = self.login(multiplex_streams=True, poll_interval=0.01)
+        release = threading.Event()
+        server_client.poll_partial = lambda job_id: release.wait(5) or {}
+
+        job_id = server_client.run_pixel_async('LLM()')
+        start = time.monotonic()
+        try:
+            with self.assertRaises(TimeoutError):
+                list(server_client.get_partial_responses(job_id, timeout=0.2))
+            self.assertLess(time.monotonic() - start, 1)
+        finally:
+            release.set()
+            server_client.logout()
+
+    def test_timeout_when_the_scheduler_dies(self):
+        server_client = self.login(multiplex_streams=True, poll_interval=0.01)
+
+        def crash():
+            raise RuntimeError('scheduler crashed')
+        server_client.stream_multiplexer._due_jobs = crash
+
+        job_id = server_client.run_pixel_async('LLM()')
+        # the scheduler's traceback is expected, keep it out of the test output
+        with mock.patch('threading.excepthook'), self.assertRaises(TimeoutError):
+            list(server_client.get_partial_responses(job_id))
+        server_client.logout()
+
+    def test_logout_stops_scheduler(self):
+        server_client = self.login(multiplex_streams=True, poll_interval=0.01)
+        job_id = server_client.run_pixel_async('LLM()')
+        list(server_client.get_partial_responses(job_id))
+        scheduler = server_client.stream_multiplexer.scheduler
+
+        server_client.logout()
+
+        self.assertFalse(scheduler.is_alive())
+
+
+class UploadTests(FakeServerTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files = []
+        for i in range(12):
+            filepath = os.path.join(self.temp_dir.name, f'parallel_{i}.txt')
+            with open(filepath, 'w') as f:
+                f.write(f'document {i}' * 100)
+            self.files.append(filepath)
+
+    def tearDown(self):
+        self.fake_server.upload_delay = 0.0
+        self.fake_server.upload_failures.clear()
+        self.temp_dir.cleanup()
+
+    def test_results_in_input_order(self):
+        self.fake_server.upload_delay = 0.05
+        server_client = self.login()
+        progress = []
+
+        start = time.monotonic()
+        results = server_client.upload_files_parallel(
+            self.files, max_workers=6, progress_callback=progress.append)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(
+            [result.file_name for result in results],
+            [os.path.basename(f) for f in self.files])
+        self.assertTrue(all(result.ok for result in results))
+        # 12 files at 50ms each would take 600ms one at a time
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(progress[-1].completed_files, 12)
+        self.assertGreater(progress[-1].mb_per_second, 0)
+        self.assertEqual(
+            self.fake_server.uploads['parallel_3.txt'], b'document 3' * 100)
+
+    def test_failures_are_per_file(self):
+        server_client = self.login()
+        self.fake_server.upload_failures['parallel_2.txt'] = 1
+        self.fake_server.upload_failures['parallel_5.txt'] = 10
+
+        results = server_client.upload_files_parallel(
+            self.files, max_workers=4, retries=2, retry_backoff=0.01)
+
+        self.assertTrue(results[2].ok)
+        self.assertEqual(results[2].attempts, 2)
+        self.assertFalse(results[5].ok)
+        self.assertEqual(results[5].attempts, 3)
+        self.assertEqual(sum(result.ok for result in results), 11)
+
+    def test_upload_files_max_workers(self):
+        server_client = self.login()
+
+        file_names = server_client.upload_files(self.files, max_workers=4)
+
+        self.assertEqual(file_names, [os.path.basename(f) for f in self.files])
+
+    def test_streaming_upload(self):
+        server_client = self.login(upload_stream_threshold=1024)
+        filepath = os.path.join(self.temp_dir.name, 'large "report".bin')
+        content = os.urandom(300 * 1024)
+        with open(filepath, 'wb') as f:
+            f.write(content)
+
+        file_names = server_client.upload_files([filepath])
+
+        self.assertEqual(file_names, ['large "report".bin'])
+        self.assertEqual(self.fake_server.uploads['large "report".bin'], content)
+
+
+class DownloadTests(FakeServerTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.target = os.path.join(self.temp_dir.name, 'report.bin')
+        self.content = os.urandom(1024 * 1024)
+        self.fake_server.files['version/assets/report.bin'] = self.content
+
+    def tearDown(self):
+        self.fake_server.support_ranges = True
+        self.fake_server.send_etags = True
+        self.fake_server.range_failures = 0
+        self.temp_dir.cleanup()
+
+    def download_requests(self):
+        return self.fake_server.request_counts.get('/engine/downloadFile', 0)
+
+    def test_parallel_ranges(self):
+        server_client = self.login()
+        requests_before = self.download_requests()
+
+        filename = server_client.download_file(
+            'version/assets/report.bin', custom_filename=self.target,
+            chunk_size=64 * 1024, max_workers=4)
+
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(self.download_requests() - requests_before, 16)
+        self.assertFalse(os.path.exists(self.target + '.part'))
+
+    def test_resume_after_failed_ranges(self):
+        server_client = self.login()
+        self.fake_server.range_failures = 3
+
+        with self.assertRaises(TransferError):
+            server_client.download_file(
+                'version/assets/report.bin', custom_filename=self.target,
+                chunk_size=64 * 1024, max_workers=1, retries=0)
+        self.assertTrue(os.path.exists(self.target + '.part'))
+        self.assertFalse(os.path.exists(self.target))
+
+        requests_before = self.download_requests()
+        filename = server_client.download_file(
+            'version/assets/report.bin', custom_filename=self.target,
+            chunk_size=64 * 1024, max_workers=1, retries=0)
+
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        # the range probe plus the three ranges that failed
+        self.assertEqual(self.download_requests() - requests_before, 4)
+
+    def test_restart_without_validator(self):
+        server_client = self.login()
+        self.fake_server.send_etags = False
+        self.fake_server.range_failures = 3
+
+        with self.assertRaises(TransferError):
+            server_client.download_file(
+                'version/assets/report.bin', custom_filename=self.target,
+                chunk_size=64 * 1024, max_workers=1, retries=0)
+
+        # same size, different content, nothing tells the two files apart
+        self.content = os.urandom(len(self.content))
+        self.fake_server.files['version/assets/report.bin'] = self.content
+        requests_before = self.download_requests()
+        filename = server_client.download_file(
+            'version/assets/report.bin', custom_filename=self.target,
+            chunk_size=64 * 1024, max_workers=1, retries=0)
+
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        # every range was fetched again
+        self.assertEqual(self.download_requests() - requests_before, 16)
+
+    def test_single_stream_without_range_support(self):
+        self.fake_server.support_ranges = False
+        server_client = self.login()
+        requests_before = self.download_requests()
+
+        filename = server_client.download_file(
+            'version/assets/report.bin', custom_filename=self.target,
+            chunk_size=64 * 1024)
+
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(self.download_requests() - requests_before, 1)
+
+
+class InMemoryDownloadTests(FakeServerTestCase):
+
+    def setUp(self):
+        self.csv = b'name,score\n' + b''.join(
+            f'row{i},{i}\n'.encode() for i in range(1000))
+        self.fake_server.files['version/assets/scores.csv'] = self.csv
+
+    def test_open_download_into_pandas(self):
+        server_client = self.login()
+
+        with server_client.open_download('version/assets/scores.csv') as f:
+            self.assertEqual(f.name, 'scores.csv')
+            self.assertEqual(f.content_length, len(self.csv))
+            df = pd.read_csv(f)
+
+        self.assertEqual(len(df), 1000)
+        self.assertEqual(df['score'].sum(), sum(range(1000)))
+
+    def test_download_bytes(self):
+        server_client = self.login()
+
+        self.assertEqual(
+            server_client.download_bytes('version/assets/scores.csv'), self.csv)
+
+    def test_download_into(self):
+        server_client = self.login()
+        buffer = bytearray(len(self.csv) + 100)
+
+        written = server_client.download_into('version/assets/scores.csv', buffer)
+
+        self.assertEqual(written, len(self.csv))
+        self.assertEqual(bytes(buffer[:written]), self.csv)
+
+    def test_download_into_small_buffer(self):
+        server_client = self.login()
+
+        with self.assertRaises(ValueError):
+            server_client.download_into(
+                'version/assets/scores.csv', bytearray(10))
+
+
+class DataProductTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_server.add_data_product(
+            'project', 'insight', 'SCORES', ['ID', 'NAME', 'SCORE'],
+            [(i, f'name {i}', i / 2) for i in range(2500)])
+
+    def jdbc_requests(self):
+        return self.fake_server.request_counts.get('/project-project/jdbc_json', 0)
+
+    def test_import_data_product(self):
+        server_client = self.login()
+
+        df = server_client.import_data_product(
+            'project', 'insight', 'SELECT * FROM SCORES WHERE SCORE >= 1000')
+
+        self.assertEqual(list(df.columns), ['ID', 'NAME', 'SCORE'])
+        self.assertEqual(len(df), 500)
+
+    def test_iter_data_product(self):
+        server_client = self.login()
+        requests_before = self.jdbc_requests()
+
+        pages = list(server_client.iter_data_product(
+            'project', 'insight', 'SELECT * FROM SCORES ORDER BY ID;', page_size=1000))
+
+        self.assertEqual([len(page) for page in pages], [1000, 1000, 500])
+        self.assertEqual(pages[2]['ID'].iloc[-1], 2499)
+        self.assertEqual(self.jdbc_requests() - requests_before, 3)
+
+    def test_cached_data_product(self):
+        server_client = self.login()
+        requests_before = self.jdbc_requests()
+        sql = 'SELECT NAME FROM SCORES WHERE ID < 10'
+
+        first = server_client.import_data_product(
+            'project', 'insight', sql, cache_ttl=60)
+        first['NAME'] = 'changed'
+        second = server_client.import_data_product(
+            'project', 'insight', sql, cache_ttl=60)
+
+        self.assertEqual(self.jdbc_requests() - requests_before, 1)
+        self.assertEqual(second['NAME'].iloc[0], 'name 0')
+
+        server_client.clear_data_product_cache()
+        server_client.import_data_product('project', 'insight', sql, cache_ttl=60)
+        self.assertEqual(self.jdbc_requests() - requests_before, 2)
+
+
+class StreamingOutputTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_server.register_pixel(
+            'Rows', lambda expression: [
+                {'ID': i, 'NAME': f'name {i}', 'TAGS': [i, {'even': i % 2 == 0}]}
+                for i in range(5000)])
+        cls.fake_server.register_pixel(
+            'Table', lambda expression: {
+                'headers': ['ID', 'SCORE'],
+                'values': {'data': [[i, i / 4] for i in range(1000)]}})
+
+    def test_rows_match_run_pixel(self):
+        server_client = self.login()
+
+        rows = list(server_client.iter_pixel_output('Rows()'))
+
+        self.assertEqual(rows, server_client.run_pixel('Rows()', full_response=True)[
+            'pixelReturn'][0]['output'])
+
+    def test_item_path_and_index(self):
+        server_client = self.login()
+
+        rows = server_client.iter_pixel_output(
+            '1+1;Table()', index=1, item_path='values.data')
+
+        self.assertEqual(sum(score for _, score in rows), sum(i / 4 for i in range(1000)))
+
+    def test_error_output(self):
+        server_client = self.login()
+
+        with self.assertRaises(PixelError) as context:
+            list(server_client.iter_pixel_output('not a pixel'))
+        self.assertEqual(context.exception.expression, 'not a pixel;')
+
+        with self.assertRaises(ValueError):
+            list(server_client.iter_pixel_output('1+1'))
+        with self.assertRaises(ValueError):
+            list(server_client.iter_pixel_output('Rows()', index=3))
+
+    def test_abandoned_iterator(self):
+        server_client = self.login()
+
+        rows = server_client.iter_pixel_output('Rows()')
+        self.assertEqual(next(rows)['ID'], 0)
+        rows.close()
+
+        self.assertEqual(server_client.run_pixel('2+2'), 4)
+
+    def test_reauthenticate_on_expired_session(self):
+        server_client = self.login()
+        server_client.run_pixel('1+1')
+
+        self.fake_server.expire_sessions()
+
+        self.assertEqual(len(list(server_client.iter_pixel_output('Rows()'))), 5000)
+
+
+class ServerProxyTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_server.engine_methods['execQuery'] = lambda query, fmt: [
+            {'query': query, 'thread': threading.current_thread().name}]
+
+        def fail():
+            raise RuntimeError('table does not exist')
+        cls.fake_server.engine_methods['fail'] = fail
+
+    def call(self, proxy, i):
+        return proxy.call(
+            engine_type='database',
+            engine_id='db',
+            method_name='execQuery',
+            method_args=[f'SELECT {i}', 'json'],
+            method_arg_types=['java.lang.String', 'java.lang.String'],
+        )[0]['query']
+
+    def test_parallel_calls_get_their_own_response(self):
+        server_client = self.login(pool_maxsize=32)
+        shared = ServerProxy()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            # half the calls share a proxy, the other half each create one like engines built per request do
+            results = list(pool.map(
+                lambda i: self.call(shared if i % 2 else ServerProxy(), i), range(2000)))
+
+        self.assertEqual(results, [f'SELECT {i}' for i in range(2000)])
+        self.assertEqual(server_client.monitors, {})
+
+    def test_epocs_are_unique_across_proxies(self):
+        self.login()
+        proxies = [ServerProxy() for _ in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            epocs = list(pool.map(
+                lambda i: proxies[i % 8].get_next_epoc(), range(10000)))
+
+        self.assertEqual(len(set(epocs)), 10000)
+
+    def test_engine_exception(self):
+        server_client = self.login()
+
+        with self.assertRaises(Exception) as context:
+            ServerProxy().call(engine_type='database', engine_id='db', method_name='fail')
+        self.assertIn('table does not exist', str(context.exception))
+        self.assertEqual(server_client.monitors, {})
+
+    def test_duplicate_epoc_is_rejected(self):
+        server_client = self.login()
+
+        server_client.register_monitor('py_duplicate')
+        with self.assertRaises(ValueError):
+            server_client.register_monitor('py_duplicate')
+        server_client.release_monitor('py_duplicate')
+
+
+class PipelinedCallTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake_server.engine_methods['execQuery'] = lambda query, fmt: [
+            {'myArrayList': [{'map': {'QUERY': query}}]}]
+
+        def fail():
+            raise RuntimeError('table does not exist')
+        cls.fake_server.engine_methods['fail'] = fail
+
+    def run_pixel_requests(self):
+        return self.fake_server.request_counts.get('/engine/runPixel', 0)
+
+    def test_calls_are_coalesced(self):
+        server_client = self.login(call_batch_window=0.05)
+        database = DatabaseEngine(engine_id='db')
+        requests_before = self.run_pixel_requests()
+
+        futures = [database.execQueryAsync(f'SELECT {i}') for i in range(100)]
+        frames = [future.result(timeout=10) for future in futures]
+
+        self.assertEqual([df['QUERY'][0] for df in frames], [f'SELECT {i}' for i in range(100)])
+        self.assertLessEqual(self.run_pixel_requests() - requests_before, 4)
+        self.assertEqual(server_client.call_dispatcher.calls_sent, 100)
+        self.assertEqual(server_client.monitors, {})
+        server_client.logout()
+
+    def test_calls_from_many_threads(self):
+        server_client = self.login(pool_maxsize=8)
+        proxy = ServerProxy()
+
+        def call(i):
+            return proxy.call_async(
+                engine_type='database', engine_id='db', method_name='echo',
+                method_args=[i], method_arg_types=['java.lang.Integer'])
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = list(pool.map(call, range(1000)))
+        results = [future.result(timeout=10) for future in futures]
+
+        self.assertEqual(results, [[i] for i in range(1000)])
+        self.assertLess(server_client.call_dispatcher.batches_sent, 1000)
+        server_client.logout()
+
+    def test_errors_are_per_call(self):
+        server_client = self.login()
+        proxy = ServerProxy()
+
+        ok = proxy.call_async(engine_type='database', engine_id='db', method_name='echo', method_args=[1])
+        failed = proxy.call_async(engine_type='database', engine_id='db', method_name='fail')
+
+        self.assertEqual(ok.result(timeout=10), [1])
+        with self.assertRaises(Exception) as context:
+            failed.result(timeout=10)
+        self.assertIn('table does not exist', str(context.exception))
+        server_client.logout()
+
+    def test_logout_sends_queued_calls(self):
+        server_client = self.login(call_batch_window=5)
+        proxy = ServerProxy()
+
+        future = proxy.call_async(engine_type='database', engine_id='db', method_name='echo', method_args=[7])
+        server_client.logout()
+
+        self.assertEqual(future.result(timeout=0), [7])
+        with self.assertRaises(RuntimeError):
+            proxy.call_async(engine_type='database', engine_id='db', method_name='echo')
+
+    def test_unencodable_call_fails_alone(self):
+        server_client = self.login(call_batch_window=0.05)
+        proxy = ServerProxy()
+
+        ok = proxy.call_async(engine_type='database', engine_id='db', method_name='echo', method_args=[1])
+        failed = proxy.call_async(
+            engine_type='database', engine_id='db', method_name='echo', method_args=[object()])
+
+        self.assertEqual(ok.result(timeout=10), [1])
+        with self.assertRaises(TypeError):
+            failed.result(timeout=10)
+        self.assertEqual(server_client.monitors, {})
+        server_client.logout()
+
+    def test_missing_replies_fail_their_calls(self):
+        server_client = self.login(call_batch_window=0.05)
+        proxy = ServerProxy()
+        run_pixel_batch = server_client.run_pixel_batch
+        # the server answers every pixel but the last
+        server_client.run_pixel_batch = lambda pixels, **kwargs: run_pixel_batch(pixels, **kwargs)[:-1]
+
+        futures = [proxy.call_async(engine_type='database', engine_id='db', method_name='echo',
+                                    method_args=[i]) for i in range(3)]
+
+        self.assertEqual([future.result(timeout=10) for future in futures[:2]], [[0], [1]])
+        with self.assertRaises(RuntimeError):
+            futures[2].result(timeout=10)
+        self.assertEqual(server_client.monitors, {})
+        server_client.logout()
+
+
+class ProcessPayloadTests(unittest.TestCase):
+
+    def test_only_envelopes_are_decoded(self):
+        date = jsonpickle.encode(datetime.date(2024, 5, 1))
+        payload = [date, 5, {'a': 1}, 'plain text', '{"a": 1}', date, '{"py/object": "no.such.Module"']
+
+        decoded = decode_payload({'payload': payload})['payload']
+
+        # duplicates are decoded too, the old list.index lookup only replaced the first one
+        self.assertEqual(decoded[:6], [datetime.date(2024, 5, 1), 5, {'a': 1}, 'plain text',
+                                       '{"a": 1}', datetime.date(2024, 5, 1)])
+        # a malformed envelope is returned unchanged
+        self.assertEqual(decoded[6], payload[6])
+
+    def test_lazy_payload(self):
+        payload = [jsonpickle.encode((i, i)) for i in range(1000)]
+
+        lazy = decode_payload({'payload': payload}, lazy=True)['payload']
+
+        self.assertIsInstance(lazy, LazyPayload)
+        self.assertEqual(lazy[-1], (999, 999))
+        self.assertEqual(lazy[10:12], [(10, 10), (11, 11)])
+        self.assertEqual(sum(lazy.decoded), 3)
+        self.assertEqual(len(list(lazy)), 1000)
+        self.assertIsInstance(payload[500], tuple)
+
+
+class EmbeddingBatchTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.failures = {}
+        cls.batches = []
+
+        def embeddings(expression):
+            values = json.loads(re.search(r'values=(\[.*\])', expression).group(1))
+            cls.batches.append(len(values))
+            for text in values:
+                if cls.failures.get(text, 0) > 0:
+                    cls.failures[text] -= 1
+                    raise RuntimeError(f'Model timed out embedding {text}')
+            return {'response': [[float(text.split()[-1]), len(text)] for text in values],
+                    'numberOfTokensInPrompt': len(values), 'numberOfTokensInResponse': 0}
+        cls.fake_server.register_pixel('Embeddings', embeddings)
+
+    def setUp(self):
+        self.batches.clear()
+        self.failures.clear()
+        self.login(pool_maxsize=8)
+        self.model = ModelEngine(engine_id='embedder')
+
+    def test_vectors_are_in_input_order(self):
+        texts = [f'text {i}' for i in range(500)]
+        stats = EmbeddingStats()
+
+        output = self.model.embeddings_batch(texts, batch_size=32, max_workers=4, stats=stats)
+
+        self.assertEqual([vector[0] for vector in output['response']], [float(i) for i in range(500)])
+        self.assertEqual(output['numberOfTokensInPrompt'], 500)
+        self.assertEqual(len(self.batches), 16)
+        self.assertEqual(stats.embedded_texts, 500)
+        self.assertGreater(stats.texts_per_second, 0)
+
+    def test_byte_budget(self):
+        texts = [('x' * 1000) + f' {i}' for i in range(20)]
+
+        output = self.model.embeddings_batch(texts, batch_size=None, max_batch_bytes=5000)
+
+        self.assertEqual(len(output['response']), 20)
+        self.assertTrue(all(size <= 4 for size in self.batches))
+
+    def test_texts_are_sent_as_json(self):
+        texts = [f'say "hi"\\n\tto ünïcode ] {i}' for i in range(6)]
+
+        output = self.model.embeddings_batch(texts, batch_size=None, max_batch_bytes=66)
+
+        self.assertEqual(output['response'], [[float(i), len(texts[i])] for i in range(6)])
+        # two texts fit the budget as raw UTF-8 but not once their quotes and backslashes are escaped
+        self.assertEqual(self.batches, [1] * 6)
+
+    def test_failed_batch_is_retried(self):
+        self.failures['text 40'] = 1
+        stats = EmbeddingStats()
+
+        output = self.model.embeddings_batch(
+            [f'text {i}' for i in range(100)], batch_size=10, retry_backoff=0, stats=stats)
+
+        self.assertEqual(len(output['response']), 100)
+        self.assertEqual(stats.retries, 1)
+        self.assertEqual(len(self.batches), 11)
+
+    def test_batch_failing_every_retry(self):
+        self.failures['text 5'] = 10
+
+        with self.assertRaises(RuntimeError) as context:
+            self.model.embeddings_batch(
+                [f'text {i}' for i in range(20)], batch_size=10, retries=1, retry_backoff=0)
+        self.assertIn('1 of 2 embedding batches failed', str(context.exception))
+
+
+class EmbeddingCacheTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sent = []
+
+        def embeddings(expression):
+            values = json.loads(re.search(r'values=(\[.*?\])', expression).group(1))
+            cls.sent.append(values)
+            return {'response': [[len(text) / 3, -1e-9] for text in values],
+                    'numberOfTokensInPrompt': len(values), 'numberOfTokensInResponse': 0}
+        cls.fake_server.register_pixel('Embeddings', embeddings)
+
+    def setUp(self):
+        self.sent.clear()
+        self.login()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'embeddings.sqlite')
+        self.cache = EmbeddingCache(self.path)
+        self.model = ModelEngine(engine_id='embedder', embedding_cache=self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_only_misses_are_sent(self):
+        first = self.model.embeddings(['a', 'bb', 'a'])
+        second = self.model.embeddings(['bb', 'ccc', 'a'])
+
+        self.assertEqual(self.sent, [['a', 'bb'], ['ccc']])
+        self.assertEqual(first['response'], [[1 / 3, -1e-9], [2 / 3, -1e-9], [1 / 3, -1e-9]])
+        self.assertEqual(second['response'], [[2 / 3, -1e-9], [1.0, -1e-9], [1 / 3, -1e-9]])
+        self.assertEqual(second['numberOfTokensInPrompt'], 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+
+    def test_full_hit_skips_the_server(self):
+        self.model.embeddings(['a', 'bb'])
+        self.sent.clear()
+
+        output = self.model.embeddings(['bb', 'a'])
+
+        self.assertEqual(self.sent, [])
+        self.assertEqual(output['response'], [[2 / 3, -1e-9], [1 / 3, -1e-9]])
+
+    def test_key_includes_engine_and_params(self):
+        self.model.embeddings(['a'])
+        self.model.embeddings(['a'], param_dict={'dimensions': 2})
+        ModelEngine(engine_id='other', embedding_cache=self.cache).embeddings(['a'])
+        self.model.embeddings(['a'], param_dict={'dimensions': 2})
+
+        self.assertEqual(len(self.sent), 3)
+
+    def test_persists_between_instances(self):
+        self.model.embeddings(['a', 'bb'])
+        self.cache.close()
+
+        self.cache = EmbeddingCache(self.path)
+        output = ModelEngine(engine_id='embedder', embedding_cache=self.cache).embeddings(['bb'])
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(output['response'], [[2 / 3, -1e-9]])
+
+    def test_least_recently_used_are_evicted(self):
+        self.cache.max_entries = 3
+        self.model.embeddings(['a', 'b', 'c'])
+        time.sleep(0.01)
+        self.model.embeddings(['a'])
+        time.sleep(0.01)
+        self.model.embeddings(['d'])
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.evictions, 1)
+        self.sent.clear()
+        self.model.embeddings(['a', 'c', 'd'])
+        self.assertEqual(self.sent, [])
+        self.model.embeddings(['b'])
+        self.assertEqual(self.sent, [['b']])
+
+    def test_batches_only_contain_misses(self):
+        self.model.embeddings([f'text {i}' for i in range(0, 100, 2)])
+        self.sent.clear()
+
+        output = self.model.embeddings_batch([f'text {i}' for i in range(100)], batch_size=10)
+
+        self.assertEqual([len(values) for values in self.sent], [10] * 5)
+        self.assertEqual(len(output['response']), 100)
+        self.assertEqual(output['numberOfTokensInPrompt'], 50)
+
+    def test_use_cache_false(self):
+        self.model.embeddings(['a'])
+        self.model.embeddings(['a'], use_cache=False)
+
+        self.assertEqual(len(self.sent), 2)
+
+
+class EmbeddingArrayTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.requests = 0
+
+        def embeddings(expression):
+            cls.requests += 1
+            values = json.loads(re.search(r'values=(\[.*?\])', expression).group(1))
+            return {'response': [[int(text) / 10, -int(text) / 20, 0.5] for text in values],
+                    'numberOfTokensInPrompt': len(values), 'numberOfTokensInResponse': 0}
+        cls.fake_server.register_pixel('Embeddings', embeddings)
+
+    def setUp(self):
+        self.login(pool_maxsize=4)
+        self.model = ModelEngine(engine_id='embedder')
+        self.texts = [str(i) for i in range(100)]
+        self.expected = np.array([[i / 10, -i / 20, 0.5] for i in range(100)], dtype=np.float32)
+
+    def test_float32_matrix(self):
+        output = self.model.embeddings(self.texts, return_numpy=True)
+
+        self.assertIsInstance(output['response'], np.ndarray)
+        self.assertEqual(output['response'].dtype, np.float32)
+        self.assertTrue(output['response'].flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(output['response'], self.expected)
+        self.assertEqual(output['numberOfTokensInPrompt'], 100)
+
+    def test_batches_fill_one_matrix(self):
+        output = self.model.embeddings_batch(self.texts, batch_size=7, max_workers=4, return_numpy=True)
+
+        np.testing.assert_array_equal(output['response'], self.expected)
+        self.assertEqual(output['numberOfTokensInPrompt'], 100)
+
+    def test_float16_and_int8(self):
+        half = self.model.embeddings(self.texts, return_numpy=True, dtype='float16')['response']
+        self.assertEqual(half.dtype, np.float16)
+        np.testing.assert_allclose(half, self.expected, rtol=1e-3)
+
+        output = self.model.embeddings_batch(self.texts, batch_size=10, return_numpy=True, dtype='int8')
+        self.assertEqual(output['response'].dtype, np.int8)
+        self.assertEqual(output['scale'].shape, (100,))
+        restored = output['response'] * output['scale'][:, None]
+        np.testing.assert_allclose(restored, self.expected, atol=self.expected.max() / 127)
+
+    def test_write_into_memmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'vectors.f32')
+            out = np.memmap(path, dtype=np.float32, mode='w+', shape=(100, 3))
+
+            output = self.model.embeddings_batch(self.texts, batch_size=16, out=out)
+            self.assertIs(output['response'], out)
+            out.flush()
+            del output, out
+
+            stored = np.memmap(path, dtype=np.float32, mode='r', shape=(100, 3))
+            np.testing.assert_array_equal(stored, self.expected)
+            del stored
+
+    def test_invalid_out_is_rejected_before_sending(self):
+        requests = self.requests
+        with self.assertRaises(ValueError):
+            self.model.embeddings(self.texts, out=np.empty((10, 3), dtype=np.float32))
+        with self.assertRaises(ValueError):
+            self.model.embeddings(self.texts, out=np.empty((100, 3), dtype=np.float64))
+        with self.assertRaises(ValueError):
+            self.model.embeddings(self.texts, return_numpy=True, dtype='float64')
+        self.assertEqual(self.requests, requests)
+
+    def test_cached_vectors(self):
+        self.model.embedding_cache = EmbeddingCache()
+        self.model.embeddings(self.texts[:50])
+
+        output = self.model.embeddings_batch(self.texts, batch_size=10, return_numpy=True)
+
+        np.testing.assert_array_equal(output['response'], self.expected)
+
+
+class AskManyTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.failures = {}
+
+        def llm(expression):
+            question = re.search(r'<encode>(.*?)</encode>', expression).group(1)
+            if cls.failures.get(question, 0) > 0:
+                cls.failures[question] -= 1
+                raise RuntimeError(f'Model could not answer {question}')
+            time.sleep(0.01)
+            return {'response': f'answer to {question}', 'messageType': 'CHAT'}
+        cls.fake_server.register_pixel('LLM', llm)
+
+    def setUp(self):
+        self.failures.clear()
+        self.server_client = self.login(pool_maxsize=8)
+        self.model = ModelEngine(engine_id='llm')
+        self.questions = [f'question {i}' for i in range(40)]
+
+    def insights_used(self):
+        return [insight for insight, pixel in self.fake_server.pixel_log if pixel.startswith('LLM')]
+
+    def test_results_keep_input_order(self):
+        stats = AskStats()
+
+        results = self.model.ask_many(self.questions, max_workers=8, stats=stats)
+
+        self.assertEqual([result.value['response'] for result in results],
+                         [f'answer to {question}' for question in self.questions])
+        self.assertEqual(stats.completed, 40)
+        self.assertEqual(len(stats.latencies), 40)
+        self.assertGreater(stats.questions_per_second, 0)
+        self.assertLessEqual(stats.p50, stats.p90)
+        self.assertLessEqual(stats.p90, stats.p99)
+        self.assertIn('useHistory=false', self.fake_server.pixel_log[-1][1])
+
+    def test_failures_are_per_question(self):
+        self.failures['question 3'] = 1
+        self.failures['question 7'] = 10
+        stats = AskStats()
+
+        results = self.model.ask_many(self.questions, retries=1, retry_backoff=0, stats=stats)
+
+        self.assertTrue(results[3].ok)
+        self.assertEqual(results[3].attempts, 2)
+        self.assertFalse(results[7].ok)
+        self.assertIn('Model could not answer question 7', str(results[7].error))
+        self.assertEqual(sum(result.ok for result in results), 39)
+        self.assertEqual((stats.completed, stats.failed, stats.retries), (39, 1, 2))
+
+    def test_shared_insight(self):
+        self.fake_server.pixel_log.clear()
+
+        self.model.ask_many(self.questions, max_workers=8)
+
+        self.assertEqual(set(self.insights_used()), {self.server_client.cur_insight})
+
+    def test_insight_per_worker(self):
+        current = self.server_client.make_new_insight()
+        self.fake_server.pixel_log.clear()
+
+        self.model.ask_many(self.questions, max_workers=4, insight_strategy='per_worker')
+
+        used = set(self.insights_used())
+        self.assertGreaterEqual(len(used), 1)
+        self.assertLessEqual(len(used), 4)
+        self.assertNotIn(current, used)
+        self.assertEqual(self.server_client.cur_insight, current)
+        # the insights created for the workers are dropped again
+        self.assertTrue(used.isdisjoint(self.fake_server.insights))
+        self.assertTrue(used.isdisjoint(self.server_client.open_insights))
+
+    def test_insight_per_question(self):
+        self.fake_server.pixel_log.clear()
+
+        self.model.ask_many(self.questions[:10], insight_strategy='per_question', close_insights=False)
+
+        used = self.insights_used()
+        self.assertEqual(len(set(used)), 10)
+        self.assertTrue(set(used) <= self.fake_server.insights)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.model.ask_many(self.questions, insight_strategy='per_thread')
+
+
+class ResponseCacheTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.asked = []
+
+        def llm(expression):
+            question = re.search(r'<encode>(.*?)</encode>', expression).group(1)
+            cls.asked.append(question)
+            return {'response': f'answer {len(cls.asked)} to {question}', 'messageType': 'CHAT'}
+        cls.fake_server.register_pixel('LLM', llm)
+
+    def setUp(self):
+        self.asked.clear()
+        self.login()
+        self.cache = ResponseCache()
+        self.model = ModelEngine(engine_id='llm', response_cache=self.cache)
+        self.greedy = {'temperature': 0, 'max_new_tokens': 100}
+
+    def test_repeated_ask_is_served_from_cache(self):
+        first = self.model.ask('capital of France?', use_history=False, param_dict=self.greedy)
+        first['response'] = 'changed by the caller'
+        second = self.model.ask('capital of France?', use_history=False,
+                                param_dict={'max_new_tokens': 100, 'temperature': 0.0})
+
+        self.assertEqual(self.asked, ['capital of France?'])
+        self.assertEqual(second['response'], 'answer 1 to capital of France?')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_covers_context_and_params(self):
+        self.model.ask('q', use_history=False, param_dict=self.greedy)
+        self.model.ask('q', context='more', use_history=False, param_dict=self.greedy)
+        self.model.ask('q', use_history=False, param_dict={**self.greedy, 'max_new_tokens': 5})
+        ModelEngine(engine_id='other', response_cache=self.cache).ask(
+            'q', use_history=False, param_dict=self.greedy)
+
+        self.assertEqual(len(self.asked), 4)
+
+    def test_bypass_rules(self):
+        for _ in range(2):
+            self.model.ask('history', use_history=True, param_dict=self.greedy)
+            self.model.ask('sampled', use_history=False, param_dict={'temperature': 0.7})
+            self.model.ask('default temperature', use_history=False)
+            self.model.ask('several', use_history=False, param_dict={**self.greedy, 'n': 3})
+
+        self.assertEqual(len(self.asked), 8)
+        self.assertEqual(self.cache.bypassed, 8)
+        self.assertEqual(len(self.cache), 0)
+
+        self.model.ask('greedy', use_history=False, param_dict={'do_sample': False})
+        self.model.ask('greedy', use_history=False, param_dict={'do_sample': False})
+        self.assertEqual(len(self.asked), 9)
+
+    def test_ttl(self):
+        self.cache.ttl = 0.05
+        self.model.ask('q', use_history=False, param_dict=self.greedy)
+        self.model.ask('q', use_history=False, param_dict=self.greedy)
+        time.sleep(0.1)
+        self.model.ask('q', use_history=False, param_dict=self.greedy)
+
+        self.assertEqual(len(self.asked), 2)
+
+    def test_max_bytes_evicts_least_recently_used(self):
+        self.cache.max_bytes = 100
+        for question in ['a', 'b', 'c']:
+            self.model.ask(question, use_history=False, param_dict=self.greedy)
+        self.assertLessEqual(self.cache.memory_bytes, 100)
+        self.assertGreater(self.cache.evictions, 0)
+
+        self.model.ask('c', use_history=False, param_dict=self.greedy)
+        self.model.ask('a', use_history=False, param_dict=self.greedy)
+        self.assertEqual(self.asked, ['a', 'b', 'c', 'a'])
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'answers.sqlite')
+            cache = ResponseCache(path=path)
+            ModelEngine(engine_id='llm', response_cache=cache).ask(
+                'q', use_history=False, param_dict=self.greedy)
+            cache.close()
+
+            cache = ResponseCache(path=path, max_bytes=0)
+            model = ModelEngine(engine_id='llm', response_cache=cache)
+            output = model.ask('q', use_history=False, param_dict=self.greedy)
+            cache.close()
+
+        self.assertEqual(self.asked, ['q'])
+        self.assertEqual(output['response'], 'answer 1 to q')
+        self.assertEqual(cache.hits, 1)
+
+
+@unittest.skipUnless(importlib.util.find_spec('langchain_core'), 'langchain is not installed')
+class LangchainHistoryTests(FakeServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.history = []
+
+        def llm(expression):
+            return {'response': f'reply {len(cls.history)}', 'messageType': 'CHAT'}
+
+        def room_messages(expression):
+            return [{'DATE_CREATED': i, 'MESSAGE_TYPE': kind, 'MESSAGE_DATA': data}
+                    for i, (kind, data) in reversed(list(enumerate(cls.history)))]
+        cls.fake_server.register_pixel('GetModelAPI', lambda expression: 'TEXT_GENERATION')
+        cls.fake_server.register_pixel('GetRoomMessages', room_messages)
+        cls.fake_server.register_pixel('LLM', llm)
+
+    def setUp(self):
+        self.history[:] = [('INPUT', 'first question'), ('RESPONSE', 'first answer')]
+        self.server_client = self.login()
+        self.model = ModelEngine(engine_id='llm', insight_id=self.server_client.make_new_insight())
+        self.fake_server.pixel_log.clear()
+
+    def history_fetches(self):
+        return sum(pixel.startswith('GetRoomMessages') for _, pixel in self.fake_server.pixel_log)
+
+    def prompts(self):
+        return [pixel for _, pixel in self.fake_server.pixel_log if pixel.startswith('LLM')]
+
+    def test_history_is_fetched_once(self):
+        chat = self.model.to_langchain_chat_model()
+        for turn in range(5):
+            self.assertEqual(chat.invoke(f'question {turn}').content, 'reply 2')
+
+        self.assertEqual(self.history_fetches(), 1)
+        history = chat.get_chat_history()
+        self.assertEqual([m.content for m in history[:4]],
+                         ['first question', 'first answer', 'question 0', 'reply 2'])
+        self.assertEqual(len(history), 12)
+        # every turn still sends the full conversation
+        self.assertIn('first question\\nfirst answer\\nquestion 0\\nreply 2\\nquestion 1', self.prompts()[1])
+
+    def test_invalidate_refetches(self):
+        chat = self.model.to_langchain_chat_model()
+        chat.invoke('question')
+        self.history.append(('INPUT', 'asked elsewhere'))
+
+        chat.invalidate_history()
+        history = chat.get_chat_history()
+
+        self.assertEqual(self.history_fetches(), 2)
+        self.assertEqual([m.content for m in history], ['first question', 'first answer', 'asked elsewhere'])
+
+    def test_stream_appends_the_joined_reply(self):
+        chat = self.model.to_langchain_chat_model()
+
+        reply = ''.join(chunk.content for chunk in chat.stream('question'))
+
+        self.assertEqual(chat.get_chat_history()[-1].content, reply)
+        self.assertEqual(self.history_fetches(), 1)
+
+    def test_history_per_insight(self):
+        chat = self.model.to_langchain_chat_model()
+        chat.invoke('question')
+        other = self.server_client.make_new_insight(set_current=False)
+
+        chat.get_chat_history(insight_id=other)
+
+        self.assertEqual(self.history_fetches(), 2)
+        self.assertEqual(len(chat.get_chat_history(insight_id=other)), 2)
+        self.assertEqual(len(chat.get_chat_history()), 4)
+
+    def test_cache_disabled(self):
+        chat = self.model.to_langchain_chat_model(cache_history=False)
+        for turn in range(3):
+            chat.invoke(f'question {turn}')
+
+        self.assertEqual(self.history_fetches(), 3)
+
+
+class TokenStreamTests(FakeServerTestCase):
+
+    def tearDown(self):
+        self.fake_server.stream_chunk_interval = 0.0
+
+    def test_coalesces_to_min_bytes(self):
+        pieces = ['The ', 'capital ', 'of ', 'France ', 'is ', 'Paris.']
+        stream = TokenStream(pieces, min_bytes=10)
+
+        chunks = list(stream)
+
+        self.assertEqual(''.join(chunks), 'The capital of France is Paris.')
+        self.assertTrue(all(len(chunk) >= 10 for chunk in chunks[:-1]))
+        self.assertEqual(stream.stats.pieces, 6)
+        self.assertEqual(stream.stats.chunks, len(chunks))
+        self.assertEqual(len(stream.stats.gaps), len(chunks) - 1)
+        self.assertTrue(stream.closed)
+
+    def test_max_delay_flushes_small_chunks(self):
+        def pieces():
+            yield 'Hello'
+            time.sleep(0.3)
+            yield ' world'
+
+        stream = TokenStream(pieces(), min_bytes=1000, max_delay=0.05)
+
+        self.assertEqual(list(stream), ['Hello', ' world'])
+        self.assertLess(stream.stats.time_to_first_token, 0.2)
+        self.assertGreaterEqual(stream.stats.max_gap, 0.2)
+
+    def test_slow_consumer_pauses_the_reader(self):
+        produced = []
+
+        def pieces():
+            for i in range(50):
+                produced.append(i)
+                yield f'{i} '
+
+        stream = TokenStream(pieces(), max_pending=4)
+        chunks = iter(stream)
+        next(chunks)
+        time.sleep(0.3)
+        # the queue plus the piece waiting to be queued
+        self.assertLessEqual(len(produced), 6)
+
+        rest = list(chunks)
+        self.assertEqual(len(rest), 49)
+        self.assertGreater(stream.stats.blocked, 0)
+
+    def test_close_stops_reading(self):
+        closed = threading.Event()
+
+        def pieces():
+            try:
+                for i in range(1000):
+                    yield f'{i} '
+            finally:
+                closed.set()
+
+        with TokenStream(pieces(), max_pending=2) as stream:
+            self.assertEqual(next(iter(stream)), '0 ')
+
+        self.assertTrue(closed.wait(1))
+
+    def test_abandoned_stream_stops_reading(self):
+        pulled = []
+
+        def pieces():
+            for i in range(1000):
+                time.sleep(0.01)
+                pulled.append(i)
+                yield f'{i} '
+
+        stream = TokenStream(pieces())
+        for chunk in stream:
+            break
+        read_at_close = len(pulled)
+        time.sleep(0.2)
+
+        # at most the piece that was being read when the consumer left
+        self.assertLessEqual(len(pulled), read_at_close + 1)
+
+    def test_on_chunk_callback(self):
+        received = []
+        stream = TokenStream(['a', 'b', 'c', 'd'], min_bytes=2, on_chunk=received.append)
+
+        stats = stream.wait(timeout=1)
+
+        self.assertEqual(received, ['ab', 'cd'])
+        self.assertEqual(stats.chunks, 2)
+        with self.assertRaises(RuntimeError):
+            list(stream)
+
+    def test_errors_reach_the_consumer(self):
+        def pieces():
+            yield 'partial'
+            raise RuntimeError('Stream failed or canceled. Status: Error')
+
+        with self.assertRaises(RuntimeError):
+            list(TokenStream(pieces(), min_bytes=100))
+        with self.assertRaises(RuntimeError):
+            TokenStream(pieces(), on_chunk=lambda chunk: None).wait(timeout=1)
+
+    def test_open_stream(self):
+        self.fake_server.register_pixel(
+            'LLM', lambda expression: 'one two three four five six')
+        self.fake_server.stream_chunk_interval = 0.05
+        self.login(poll_interval=0.01)
+        stats = TokenStreamStats()
+        poll_stats = StreamStats()
+
+        stream = ModelEngine(engine_id='llm').open_stream(
+            'count to six', min_bytes=8, max_delay=0.2, stats=stats, poll_stats=poll_stats)
+
+        self.assertEqual(''.join(stream), 'one two three four five six')
+        self.assertIsNotNone(stats.time_to_first_token)
+        self.assertLess(stats.chunks, stats.pieces)
+        self.assertGreater(stats.tokens_per_second, 0)
+        self.assertGreaterEqual(poll_stats.polls, stats.pieces)
+
+
+class JSONCodecTests(FakeServerTestCase):
+
+    payload = {
+        'insightID': 'insight',
+        'pixelReturn': [{
+            'pixelId': '0',
+            'output': {'response': [[0.25, -1.5e-08, 3.0]], 'text': 'caf\u00e9 \u2603 "quoted"'},
+            'operationType': ['OPERATION'],
+        }],
+    }
+
+    def test_codecs_round_trip(self):
+        for name in ['auto', 'orjson', 'stdlib']:
+            with self.subTest(codec=name):
+                codec = get_codec(name)
+                encoded = codec.dumps(self.payload)
+                self.assertIn('caf\u00e9', encoded)
+                self.assertEqual(codec.loads(encoded), self.payload)
+                self.assertEqual(codec.loads(encoded.encode('utf-8')), self.payload)
+
+    def test_fallback_to_stdlib(self):
+        codec = get_codec('orjson')
+        big = {'value': 2 ** 70, 1: 'int key'}
+
+        self.assertEqual(codec.loads(codec.dumps(big)), {'value': 2 ** 70, '1': 'int key'})
+        with self.assertRaises(ValueError):
+            codec.loads(b'<html>login</html>')
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+
+    def test_client_codec(self):
+        server_client = self.login(json_codec='stdlib')
+
+        self.assertEqual(type(server_client.codec), JSONCodec)
+        self.assertEqual(server_client.run_pixel('1+1'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()